@@ -2,17 +2,84 @@
 
 import streamlit as st
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import Filter, FieldCondition, MatchValue, PointStruct, VectorParams, Distance
+from qdrant_client.http.models import Filter, FieldCondition, MatchValue, PointStruct, PointIdsList, VectorParams, Distance
+from concurrent.futures import ThreadPoolExecutor
 import uuid
 import pandas as pd
 import io
 
-# Qdrant 연결
-client = QdrantClient(host="localhost", port=6333)
+PAGE_SIZE_OPTIONS = [50, 100, 200, 500]
+ENCODE_BATCH_SIZE = 64  # 한 번에 임베딩하고 업로드할 문서 수
+
+
+# ✅ 리런마다 다시 만들지 않도록 공유 리소스로 캐시
+@st.cache_resource
+def get_client():
+    return QdrantClient(host="localhost", port=6333)
+
+
+@st.cache_resource
+def get_embed_model():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer("intfloat/e5-large")
+
+
+@st.cache_resource
+def get_background_executor():
+    # 대량 삭제처럼 오래 걸리는 작업을 UI를 막지 않고 실행하기 위한 워커
+    return ThreadPoolExecutor(max_workers=2)
+
 
 st.set_page_config(page_title="Qdrant Admin Tool", layout="wide")
 st.title("🧩 Qdrant 문서 관리 도구")
 
+client = get_client()
+
+
+def build_filter(query_text, filter_tag, filter_age):
+    filter_conditions = []
+    if query_text:
+        filter_conditions.append(FieldCondition(key="text", match=MatchValue(value=query_text)))
+    if filter_tag:
+        filter_conditions.append(FieldCondition(key="tag", match=MatchValue(value=filter_tag)))
+    if filter_age:
+        filter_conditions.append(FieldCondition(key="age_group", match=MatchValue(value=filter_age)))
+    return Filter(must=filter_conditions) if filter_conditions else None
+
+
+def build_document(collection_name, text, tag, summary, age_group):
+    """임베딩할 텍스트와 payload를 컬렉션 형식에 맞게 구성합니다."""
+    if collection_name == "product_feature_data":
+        enriched_text = f"{text}\n태그: {tag}"
+        payload = {
+            "text": text,
+            "tag": tag
+        }
+    else:
+        enriched_text = f"{text}\n태그: {tag}\n요약: {summary}\n연령대: {age_group}"
+        payload = {
+            "text": text,
+            "tag": tag,
+            "summary": summary,
+            "age_group": age_group
+        }
+    return enriched_text, payload
+
+
+def parse_point_ids(raw_ids):
+    ids = []
+    for token in raw_ids.replace("\n", ",").split(","):
+        token = token.strip()
+        if token:
+            ids.append(int(token) if token.isdigit() else token)
+    return ids
+
+
+def run_bulk_delete(collection_name, points_selector):
+    result = get_client().delete(collection_name=collection_name, points_selector=points_selector, wait=True)
+    return result.dict()
+
+
 # ✅ 컬렉션 선택
 with st.sidebar:
     st.header("📁 컬렉션 선택 및 필터")
@@ -23,32 +90,57 @@ with st.sidebar:
     query_text = st.text_input("🔍 포함 키워드", placeholder="예: 흡습속건")
     filter_tag = st.text_input("🔖 태그 필터", placeholder="예: 여름")
     filter_age = st.selectbox("🎯 연령대 필터", ["", "10대", "20대", "30대", "40대", "50대 이상"])
-    delete_text = st.text_input("🗑️ 삭제할 정확한 텍스트 입력", placeholder="문서 전체 내용이 정확히 일치해야 함")
+    page_size = st.selectbox("📄 페이지당 문서 수", PAGE_SIZE_OPTIONS, index=1)
 
 st.markdown("---")
 
-# ✅ 데이터 조회
-col1, col2 = st.columns([1, 4])
+# ✅ 데이터 조회 (커서 기반 페이지네이션)
+# 조회 조건이 바뀌면 커서를 처음으로 되돌립니다.
+query_key = (selected_collection, query_text, filter_tag, filter_age, page_size)
+if st.session_state.get("query_key") != query_key:
+    st.session_state["query_key"] = query_key
+    st.session_state["page_offsets"] = [None]  # 각 페이지의 시작 커서 (첫 페이지는 None)
+    st.session_state.pop("last_results", None)
+    st.session_state.pop("next_offset", None)
+    st.session_state.pop("total_count", None)
+
+filter_condition = build_filter(query_text, filter_tag, filter_age)
+
+col1, col2, col3, col4 = st.columns([1, 1, 1, 3])
 with col1:
-    if st.button("🔎 문서 조회"):
-        filter_conditions = []
-        if query_text:
-            filter_conditions.append(FieldCondition(key="text", match=MatchValue(value=query_text)))
-        if filter_tag:
-            filter_conditions.append(FieldCondition(key="tag", match=MatchValue(value=filter_tag)))
-        if filter_age:
-            filter_conditions.append(FieldCondition(key="age_group", match=MatchValue(value=filter_age)))
-
-        filter_condition = Filter(must=filter_conditions) if filter_conditions else None
-
-        results, _ = client.scroll(
-            collection_name=selected_collection,
-            scroll_filter=filter_condition,
-            limit=100,
-            with_payload=True
-        )
-
-        st.session_state["last_results"] = results
+    load_clicked = st.button("🔎 문서 조회")
+with col2:
+    prev_clicked = st.button("◀ 이전", disabled=len(st.session_state["page_offsets"]) <= 1)
+with col3:
+    next_clicked = st.button("다음 ▶", disabled=st.session_state.get("next_offset") is None)
+
+if prev_clicked:
+    st.session_state["page_offsets"].pop()
+if next_clicked:
+    st.session_state["page_offsets"].append(st.session_state["next_offset"])
+
+if load_clicked or prev_clicked or next_clicked:
+    results, next_offset = client.scroll(
+        collection_name=selected_collection,
+        scroll_filter=filter_condition,
+        limit=page_size,
+        offset=st.session_state["page_offsets"][-1],
+        with_payload=True
+    )
+    total = client.count(
+        collection_name=selected_collection,
+        count_filter=filter_condition,
+        exact=True
+    ).count
+
+    st.session_state["last_results"] = results
+    st.session_state["next_offset"] = next_offset
+    st.session_state["total_count"] = total
+
+with col4:
+    if "total_count" in st.session_state:
+        page_no = len(st.session_state["page_offsets"])
+        st.markdown(f"**전체 {st.session_state['total_count']:,}건** · {page_no}페이지")
 
 # 결과 출력
 if "last_results" in st.session_state:
@@ -58,15 +150,46 @@ if "last_results" in st.session_state:
             for k, v in doc.payload.items():
                 st.markdown(f"- **{k}**: {v}")
 
-# ✅ 데이터 삭제
+# ✅ 데이터 삭제 (필터 또는 ID 목록, 백그라운드 실행)
 st.markdown("---")
-if st.button("🗑️ 삭제 실행") and delete_text:
-    delete_filter = Filter(
-        must=[FieldCondition(key="text", match=MatchValue(value=delete_text))]
-    )
-    result = client.delete(collection_name=selected_collection, points_selector=delete_filter)
-    st.success("✅ 삭제 요청 완료됨")
-    st.json(result.dict())
+st.subheader("🗑️ 대량 삭제")
+delete_mode = st.radio("삭제 방식", ["현재 필터와 일치하는 문서", "ID 목록"], horizontal=True)
+delete_ids_text = ""
+if delete_mode == "ID 목록":
+    delete_ids_text = st.text_area("삭제할 문서 ID (쉼표 또는 줄바꿈으로 구분)", height=80)
+elif filter_condition is None:
+    st.warning("⚠️ 필터가 비어 있습니다. 사이드바에서 조건을 입력해야 필터 삭제를 실행할 수 있습니다.")
+
+if st.button("🗑️ 삭제 실행"):
+    if delete_mode == "ID 목록":
+        ids = parse_point_ids(delete_ids_text)
+        points_selector = PointIdsList(points=ids) if ids else None
+    else:
+        points_selector = filter_condition
+
+    if points_selector is None:
+        st.error("❌ 삭제할 대상이 없습니다.")
+    else:
+        future = get_background_executor().submit(run_bulk_delete, selected_collection, points_selector)
+        st.session_state.setdefault("delete_jobs", []).append({
+            "collection": selected_collection,
+            "description": delete_mode,
+            "future": future,
+        })
+        st.info("⏳ 삭제 작업이 백그라운드에서 시작되었습니다.")
+
+if st.session_state.get("delete_jobs"):
+    st.button("🔄 삭제 작업 상태 새로고침")
+    for job in st.session_state["delete_jobs"]:
+        future = job["future"]
+        label = f"[{job['collection']}] {job['description']}"
+        if not future.done():
+            st.write(f"⏳ {label}: 진행 중")
+        elif future.exception():
+            st.write(f"❌ {label}: 실패 ({future.exception()})")
+        else:
+            st.write(f"✅ {label}: 완료")
+            st.json(future.result())
 
 # ✅ 데이터 추가
 st.markdown("---")
@@ -81,23 +204,8 @@ with col_age:
     new_age_group = st.selectbox("연령대", ["", "10대", "20대", "30대", "40대", "50대 이상"])
 
 if st.button("⬆️ 문서 추가") and new_text:
-    from sentence_transformers import SentenceTransformer
-    embed_model = SentenceTransformer("intfloat/e5-large")
-
-    if selected_collection == "product_feature_data":
-        enriched_text = f"{new_text}\n태그: {new_tag}"
-        payload = {
-            "text": new_text,
-            "tag": new_tag
-        }
-    else:
-        enriched_text = f"{new_text}\n태그: {new_tag}\n요약: {new_summary}\n연령대: {new_age_group}"
-        payload = {
-            "text": new_text,
-            "tag": new_tag,
-            "summary": new_summary,
-            "age_group": new_age_group
-        }
+    embed_model = get_embed_model()
+    enriched_text, payload = build_document(selected_collection, new_text, new_tag, new_summary, new_age_group)
 
     vector = embed_model.encode(enriched_text).tolist()
     point = PointStruct(id=str(uuid.uuid4()), vector=vector, payload=payload)
@@ -109,39 +217,34 @@ st.markdown("---")
 st.subheader("📁 CSV 파일 업로드")
 uploaded_file = st.file_uploader("CSV 파일을 업로드하세요 (text, tag, summary, age_group 컬럼 필요)", type=["csv"])
 
-if uploaded_file:
+if uploaded_file and st.button("⬆️ CSV 업로드 실행"):
     df = pd.read_csv(uploaded_file)
 
     if "text" not in df.columns:
         st.error("❌ 'text' 컬럼이 있어야 합니다.")
     else:
-        from sentence_transformers import SentenceTransformer
-        embed_model = SentenceTransformer("intfloat/e5-large")
+        embed_model = get_embed_model()
 
         texts = df["text"].astype(str).tolist()
         tags = df["tag"].astype(str).tolist() if "tag" in df.columns else ["" for _ in texts]
         summaries = df["summary"].astype(str).tolist() if "summary" in df.columns else ["" for _ in texts]
         ages = df["age_group"].astype(str).tolist() if "age_group" in df.columns else ["" for _ in texts]
 
-        points = []
-        for i, text in enumerate(texts):
-            if selected_collection == "product_feature_data":
-                enriched_text = f"{text}\n태그: {tags[i]}"
-                payload = {
-                    "text": text,
-                    "tag": tags[i]
-                }
-            else:
-                enriched_text = f"{text}\n태그: {tags[i]}\n요약: {summaries[i]}\n연령대: {ages[i]}"
-                payload = {
-                    "text": text,
-                    "tag": tags[i],
-                    "summary": summaries[i],
-                    "age_group": ages[i]
-                }
-
-            vector = embed_model.encode(enriched_text).tolist()
-            points.append(PointStruct(id=str(uuid.uuid4()), vector=vector, payload=payload))
-
-        client.upsert(collection_name=selected_collection, points=points)
-        st.success(f"✅ 총 {len(points)}개 문서가 업로드되었습니다.")
+        progress = st.progress(0.0, text="임베딩 및 업로드 준비 중...")
+        uploaded = 0
+        for start in range(0, len(texts), ENCODE_BATCH_SIZE):
+            end = min(start + ENCODE_BATCH_SIZE, len(texts))
+            documents = [
+                build_document(selected_collection, texts[i], tags[i], summaries[i], ages[i])
+                for i in range(start, end)
+            ]
+            vectors = embed_model.encode([enriched for enriched, _ in documents], batch_size=ENCODE_BATCH_SIZE)
+            points = [
+                PointStruct(id=str(uuid.uuid4()), vector=vector.tolist(), payload=payload)
+                for (_, payload), vector in zip(documents, vectors)
+            ]
+            client.upsert(collection_name=selected_collection, points=points)
+            uploaded += len(points)
+            progress.progress(uploaded / len(texts), text=f"{uploaded}/{len(texts)}건 업로드됨")
+
+        st.success(f"✅ 총 {uploaded}개 문서가 업로드되었습니다.")
@@ -0,0 +1,297 @@
+# agents/artifact_store.py
+"""
+워크스페이스(Redis JSON) 밖에 큰 수치 데이터를 보관하는 사이드 아티팩트 저장소입니다.
+TF-IDF 같은 희소 행렬을 CSR 구성요소(data/indices/indptr) 그대로 .npy 바이너리로 저장하고,
+워크스페이스에는 작은 참조(ref) dict만 남깁니다. 로드는 mmap으로 하므로 복사 없이 바로 사용할 수 있습니다.
+저장소는 ARTIFACT_MAX_BYTES 를 넘으면 가장 오래 사용하지 않은 아티팩트부터 지웁니다. (LRU, 디렉터리 mtime 기준)
+단, 살아 있는 워크스페이스가 가리키는 아티팩트는 지우지 않습니다. 워크스페이스를 저장할 때 세션별 pin 파일
+(ARTIFACT_DIR/pins/{session_id}.json)에 참조하는 아티팩트 ID를 기록하고, pin은 워크스페이스와 같은 TTL로 만료됩니다.
+아직 워크스페이스에 저장되기 전인 아티팩트(요청 도중, 작업 결과 반영 전)는 ARTIFACT_MIN_AGE 동안 지우지 않습니다.
+pin이 없는 캐시 참조(memo, corpus_tfidf)는 artifact_exists로 확인해 다시 계산합니다.
+다시 만들 수 없는 원본 데이터(검색 결과 표)는 durable로 저장해 용량 기준 정리에서 빼고, pin이 풀린 뒤
+ARTIFACT_DURABLE_TTL 동안 쓰이지 않았을 때만 지웁니다.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", "./artifact_store")
+ARTIFACT_MAX_BYTES = int(os.getenv("ARTIFACT_MAX_BYTES", 4 * 1024 * 1024 * 1024))
+ARTIFACT_MIN_AGE = int(os.getenv("ARTIFACT_MIN_AGE", 3600))
+ARTIFACT_DURABLE_TTL = int(os.getenv("ARTIFACT_DURABLE_TTL", 7 * 86400))
+DURABLE_MARKER = "durable"
+PIN_DIR = os.path.join(ARTIFACT_DIR, "pins")
+
+_evict_lock = threading.Lock()
+
+
+def _artifact_path(artifact_id: str) -> str:
+    return os.path.join(ARTIFACT_DIR, artifact_id[:2], artifact_id)
+
+
+def _content_id(kind: str, arrays: list, shape) -> str:
+    """내용이 같으면 같은 ID가 나오도록 배열 바이트로 해시를 만듭니다. (중복 저장 방지)"""
+    h = hashlib.sha1(kind.encode("utf-8"))
+    h.update(json.dumps(list(shape)).encode("utf-8"))
+    for arr in arrays:
+        h.update(str(arr.dtype).encode("utf-8"))
+        h.update(np.ascontiguousarray(arr).tobytes())
+    return h.hexdigest()
+
+
+def _write_arrays(path: str, arrays: dict, meta: dict):
+    # 임시 디렉터리에 쓴 뒤 rename 하여, 쓰는 도중의 파일을 다른 프로세스가 읽지 않도록 합니다.
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    os.makedirs(tmp_path, exist_ok=True)
+    for name, arr in arrays.items():
+        np.save(os.path.join(tmp_path, f"{name}.npy"), arr, allow_pickle=False)
+    with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        # 다른 프로세스가 같은 내용을 먼저 저장한 경우
+        for name in list(arrays) + ["meta"]:
+            ext = "json" if name == "meta" else "npy"
+            os.remove(os.path.join(tmp_path, f"{name}.{ext}"))
+        os.rmdir(tmp_path)
+
+
+def _touch(path: str):
+    """LRU: 최근 사용 시각 갱신"""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _is_artifact_dir(name: str, length: int) -> bool:
+    # ARTIFACT_DIR 아래의 pins/, tfidf_index/ 같은 다른 디렉터리와 쓰는 중인 임시 디렉터리는 건너뜁니다.
+    return len(name) == length and all(c in "0123456789abcdef" for c in name)
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for entry in os.scandir(path):
+        try:
+            total += entry.stat().st_size
+        except OSError:
+            pass
+    return total
+
+
+def artifact_ids(value) -> set:
+    """값 안에 들어 있는 모든 아티팩트 참조의 ID."""
+    if is_artifact_ref(value):
+        return {value["artifact_id"]}
+    if isinstance(value, dict):
+        return set().union(*(artifact_ids(v) for v in value.values())) if value else set()
+    if isinstance(value, (list, tuple)):
+        return set().union(*(artifact_ids(v) for v in value)) if value else set()
+    return set()
+
+
+def _pin_path(owner: str) -> str:
+    return os.path.join(PIN_DIR, f"{owner}.json")
+
+
+def _read_pins(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def pin_artifacts(owner: str, changed: dict, deleted: list = (), ttl: int = 86400, replace: bool = False):
+    """
+    owner(세션 ID)가 참조하는 아티팩트를 기록합니다. changed: {아티팩트 이름: 값}, deleted: 지워진 아티팩트 이름.
+    바뀐 이름의 참조만 갱신하므로 읽지 않은 아티팩트의 pin은 그대로 유지됩니다. (replace=True면 전체를 바꿉니다)
+    """
+    path = _pin_path(owner)
+    os.makedirs(PIN_DIR, exist_ok=True)
+    with _evict_lock:
+        pins = {} if replace else _read_pins(path).get("artifacts", {})
+        for name, value in changed.items():
+            ids = sorted(artifact_ids(value))
+            if ids:
+                pins[name] = ids
+            else:
+                pins.pop(name, None)
+        for name in deleted:
+            pins.pop(name, None)
+        tmp_path = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"ttl": ttl, "artifacts": pins}, f)
+        os.replace(tmp_path, path)
+
+
+def has_pins(owner: str) -> bool:
+    return os.path.exists(_pin_path(owner))
+
+
+def touch_pins(owner: str):
+    """워크스페이스를 불러와 TTL이 갱신될 때 pin의 만료도 함께 늦춥니다."""
+    _touch(_pin_path(owner))
+
+
+def _pinned_ids() -> set:
+    """만료되지 않은 pin이 가리키는 아티팩트 ID. 만료된 pin 파일은 지웁니다."""
+    pinned, now = set(), time.time()
+    try:
+        entries = [e for e in os.scandir(PIN_DIR) if e.name.endswith(".json")]
+    except FileNotFoundError:
+        return pinned
+    for entry in entries:
+        record = _read_pins(entry.path)
+        try:
+            if entry.stat().st_mtime + record.get("ttl", 0) < now:
+                os.remove(entry.path)
+                continue
+        except OSError:
+            continue
+        for ids in record.get("artifacts", {}).values():
+            pinned.update(ids)
+    return pinned
+
+
+def _evict_if_needed(keep: str | None = None):
+    """
+    저장소 크기가 ARTIFACT_MAX_BYTES를 넘으면 오래 사용하지 않은 아티팩트부터 삭제합니다.
+    keep(방금 저장한 것), pin된 아티팩트, ARTIFACT_MIN_AGE 안에 쓰거나 읽은 아티팩트는 지우지 않습니다.
+    """
+    with _evict_lock:
+        entries = []
+        try:
+            prefixes = [e for e in os.scandir(ARTIFACT_DIR) if e.is_dir() and _is_artifact_dir(e.name, 2)]
+        except FileNotFoundError:
+            return
+        for prefix in prefixes:
+            for entry in os.scandir(prefix.path):
+                if not (entry.is_dir() and _is_artifact_dir(entry.name, 40)):
+                    continue
+                try:
+                    entries.append((entry.stat().st_mtime, _dir_size(entry.path), entry.path))
+                except OSError:
+                    continue
+        total = sum(size for _, size, _ in entries)
+        if total <= ARTIFACT_MAX_BYTES:
+            return
+        now = time.time()
+        pinned, cutoff, durable_cutoff = _pinned_ids(), now - ARTIFACT_MIN_AGE, now - ARTIFACT_DURABLE_TTL
+        for mtime, size, path in sorted(entries):
+            if total <= ARTIFACT_MAX_BYTES:
+                break
+            if path == keep or mtime > cutoff or os.path.basename(path) in pinned:
+                continue
+            if mtime > durable_cutoff and os.path.exists(os.path.join(path, DURABLE_MARKER)):
+                continue
+            # 이미 mmap으로 열린 파일은 지워도 닫을 때까지 읽을 수 있습니다.
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+
+def _mark_durable(path: str):
+    marker = os.path.join(path, DURABLE_MARKER)
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+
+
+def _save(artifact_id: str, arrays: dict, meta: dict, durable: bool = False) -> str:
+    path = _artifact_path(artifact_id)
+    if os.path.exists(path):
+        if durable:
+            _mark_durable(path)
+        _touch(path)
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _write_arrays(path, arrays, meta)
+    if durable:
+        _mark_durable(path)
+    _evict_if_needed(keep=path)
+    return path
+
+
+def _open(ref: dict) -> str:
+    path = _artifact_path(ref["artifact_id"])
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"아티팩트를 찾을 수 없습니다: {ref['artifact_id']}")
+    _touch(path)
+    return path
+
+
+def save_sparse_matrix(matrix) -> dict:
+    """CSR 행렬을 저장하고 워크스페이스에 넣을 참조 dict를 반환합니다."""
+    matrix = csr_matrix(matrix)
+    shape = matrix.shape
+    artifact_id = _content_id("csr", [matrix.data, matrix.indices, matrix.indptr], shape)
+    _save(
+        artifact_id,
+        {"data": matrix.data, "indices": matrix.indices, "indptr": matrix.indptr},
+        {"kind": "csr", "shape": list(shape)},
+    )
+    return {"kind": "csr", "artifact_id": artifact_id, "shape": list(shape), "nnz": int(matrix.nnz)}
+
+
+def load_sparse_matrix(ref: dict) -> csr_matrix:
+    """참조 dict로 CSR 행렬을 불러옵니다. 구성요소는 읽기 전용 mmap이므로 복사가 일어나지 않습니다."""
+    path = _open(ref)
+    data = np.load(os.path.join(path, "data.npy"), mmap_mode="r")
+    indices = np.load(os.path.join(path, "indices.npy"), mmap_mode="r")
+    indptr = np.load(os.path.join(path, "indptr.npy"), mmap_mode="r")
+    return csr_matrix((data, indices, indptr), shape=tuple(ref["shape"]), copy=False)
+
+
+def save_array(array) -> dict:
+    """밀집 배열(클러스터 라벨 등)을 저장하고 참조 dict를 반환합니다."""
+    array = np.ascontiguousarray(array)
+    artifact_id = _content_id("ndarray", [array], array.shape)
+    _save(artifact_id, {"array": array}, {"kind": "ndarray", "shape": list(array.shape)})
+    return {"kind": "ndarray", "artifact_id": artifact_id, "shape": list(array.shape), "dtype": str(array.dtype)}
+
+
+def load_array(ref: dict) -> np.ndarray:
+    """참조 dict로 밀집 배열을 읽기 전용 mmap으로 불러옵니다."""
+    path = _open(ref)
+    return np.load(os.path.join(path, "array.npy"), mmap_mode="r")
+
+
+def save_table(columns: dict, meta: dict | None = None, durable: bool = False) -> dict:
+    """
+    길이가 같은 1차원 배열 여러 개(열)를 하나의 아티팩트로 저장하고 참조 dict를 반환합니다.
+    열 이름은 meta.json에만 기록하고 파일 이름은 c0, c1 ... 을 씁니다.
+    durable=True면 용량 기준 LRU 정리에서 뺍니다. (다시 만들 수 없는 원본 데이터용)
+    """
+    names = list(columns)
+    arrays = {f"c{i}": np.ascontiguousarray(columns[name]) for i, name in enumerate(names)}
+    meta = {"kind": "table", "columns": names, **(meta or {})}
+    artifact_id = _content_id("table:" + json.dumps(meta, sort_keys=True, ensure_ascii=False),
+                              list(arrays.values()), [len(names)])
+    _save(artifact_id, arrays, meta, durable=durable)
+    return {"kind": "table", "artifact_id": artifact_id, **{k: v for k, v in meta.items() if k != "kind"}}
+
+
+def load_table(ref: dict) -> dict:
+    """참조 dict로 표 아티팩트를 불러옵니다. {열 이름: 읽기 전용 mmap 배열}"""
+    path = _open(ref)
+    return {name: np.load(os.path.join(path, f"c{i}.npy"), mmap_mode="r") for i, name in enumerate(ref["columns"])}
+
+
+def artifact_exists(ref: dict) -> bool:
+    """캐시(memo, corpus_tfidf)가 참조를 다시 쓰기 전에 확인하므로, 있으면 사용한 것으로 보고 시각을 갱신합니다."""
+    path = _artifact_path(ref["artifact_id"])
+    if not os.path.exists(path):
+        return False
+    _touch(path)
+    return True
+
+
+def is_artifact_ref(value) -> bool:
+    return isinstance(value, dict) and "artifact_id" in value and "kind" in value
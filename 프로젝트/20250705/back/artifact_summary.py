@@ -0,0 +1,70 @@
+# agents/artifact_summary.py
+"""
+아티팩트 한 줄 요약입니다. (LLM 시스템 프롬프트의 "현재 워크스페이스 아티팩트" 목록)
+요약은 저장할 때 바뀐 아티팩트만 다시 계산해 워크스페이스 meta에 함께 저장하므로,
+요청마다 모든 아티팩트를 Redis에서 읽지 않고도 프롬프트를 만들 수 있습니다. (workspace_store.LazyArtifacts.summaries)
+"""
+
+from .web_table import count_web_results
+
+
+def summarize_value(key: str, value) -> str | None:
+    """아티팩트 하나의 요약 줄. 요약할 내용이 없으면 None."""
+    if key == "retrieved_data" and count_web_results(value):
+        return f"- 검색된 VOC 데이터: {count_web_results(value)}건"
+    if not value:
+        return None
+    if key == "cx_ward_clustering_results" and value.get("cluster_summaries"):
+        return f"- 워드 클러스터링: {len(value['cluster_summaries'])}개 클러스터"
+    if key == "cx_lda_results" and value.get("topics"):
+        return f"- 토픽 모델링: {len(value['topics'])}개 토픽"
+    if key == "cx_lda_results_by_cluster":
+        return f"- 클러스터별 토픽 모델링: {len(value)}개 클러스터 완료됨 (ID: {', '.join(sorted(value))})"
+    if key == "cx_cam_results":
+        return f"- 고객 행동 맵: {len(value)}개 생성됨"
+    if key == "cx_opportunity_scores":
+        return f"- 기회 점수 분석: {len(value)}개 완료됨"
+    if key == "cx_sna_results":
+        return f"- 의미 네트워크 분석: {len(value)}개 완료됨"
+    if key == "personas" and isinstance(value, list):
+        names = ", ".join([p.get("name", "이름 없음") for p in value])
+        return f"- 페르소나: {len(value)}개 ({names})"
+    if key == "selected_persona" and value.get("name"):
+        return f"- 현재 선택된 페르소나: {value['name']}"
+    if key == "service_ideas" and isinstance(value, list):
+        names = ", ".join([s.get("service_name", "이름 없음") for s in value])
+        return f"- 서비스 아이디어: {len(value)}개 ({names})"
+    if key == "selected_service_idea" and value.get("service_name"):
+        return f"- 현재 선택된 서비스 아이디어: {value['service_name']}"
+    if key == "data_plan_for_service" and isinstance(value, list):
+        names = ", ".join([p.get("service_name", "이름 없음") for p in value])
+        return f"- 데이터 기획안: {len(value)}개 ({names})"
+    if key == "selected_data_plan_for_service" and value.get("service_name"):
+        return f"- 현재 선택된 데이터 기획안: {value['service_name']}"
+    if key == "cdp_definition":
+        return f"- C-D-P 정의서: {len(value)}개 생성됨"
+    if key == "sensor_data":
+        return f"- 센서 데이터: {len(value)}건"
+    if key == "product_data":
+        return f"- 제품 데이터: {len(value)}건"
+    if key == "columns_product":
+        return f"- 제품 메타데이터: {len(value)}개 필드"
+    if key == "data_plan_recommendation_message":
+        return "- 데이터 기획 추천 메시지: 저장됨"
+    if key == "selected_cdp_definition":
+        return "- 현재 선택된 C-D-P 정의서: 저장됨"
+    return None
+
+
+def artifact_summaries(artifacts) -> dict:
+    """{아티팩트 이름: 요약 줄}. 지연 로딩 아티팩트는 읽지 않은 값에 대해 저장된 요약을 씁니다."""
+    if not artifacts:
+        return {}
+    if hasattr(artifacts, "summaries"):
+        return artifacts.summaries()
+    summaries = {}
+    for key, value in artifacts.items():
+        line = summarize_value(key, value)
+        if line:
+            summaries[key] = line
+    return summaries
@@ -0,0 +1,2 @@
+# agents/benchmarks
+# 성능 측정용 스크립트 모음입니다. 각 모듈은 `python -m agents.benchmarks.<모듈명>` 으로 실행합니다.
@@ -0,0 +1,290 @@
+# agents/benchmarks/cx_pipeline.py
+"""
+CX 분석 파이프라인 벤치마크입니다.
+한국어 명사 문자열을 가진 합성 web_results를 만들고 문서 수(기본 1k/10k/100k)별로
+군집화 → SNA → LDA → 기회 점수 계산을 차례로 실행하며, 단계마다 다음을 기록합니다.
+  - 실행 시간(wall time)
+  - 단계 동안의 최대 RSS (본 프로세스 / 자식 프로세스, /proc을 RSS_SAMPLE_INTERVAL 간격으로 샘플링)
+문서 수마다 새 하위 프로세스에서 실행하므로 앞선 크기의 메모리 사용이 다음 크기의 측정에 섞이지 않습니다.
+프로세스 전체의 최댓값(resource.getrusage)은 크기별로 process_max_rss_mb 에 따로 남깁니다.
+  - 단계 직후 워크스페이스를 JSON으로 직렬화한 크기와 직렬화 시간
+감성 모델은 기본적으로 텍스트 해시 기반 스텁을 쓰고, --real-sentiment 를 주면 실제 모델을 사용합니다.
+메모이제이션/미리 계산/코퍼스 캐시가 결과를 왜곡하지 않도록 임시 디렉터리와 비활성화 설정으로 실행합니다.
+
+실행:
+    python -m agents.benchmarks.cx_pipeline --sizes 1000 10000 100000 --out cx_pipeline.json
+"""
+
+import os
+import sys
+import time
+import glob
+import json
+import zlib
+import resource
+import tempfile
+import argparse
+import platform
+import threading
+import subprocess
+from datetime import datetime, timedelta
+
+# 캐시가 결과를 왜곡하지 않도록 관련 모듈을 불러오기 전에 설정합니다.
+_BENCH_DIR = tempfile.mkdtemp(prefix="cx_bench_")
+os.environ.setdefault("ARTIFACT_DIR", os.path.join(_BENCH_DIR, "artifacts"))
+os.environ.setdefault("MEMO_DIR", os.path.join(_BENCH_DIR, "memo"))
+os.environ["MEMO_ENABLED"] = "0"
+os.environ["PRECOMPUTE_ENABLED"] = "0"
+
+import numpy as np
+
+from .. import cx_analysis
+from ..workspace_codec import serialize, FORMAT_JSON
+from ..web_table import pack_web_results
+
+# 가전 VOC에서 자주 나오는 명사들. 주제별로 묶어 두고, 문서는 한 주제에서 대부분의 명사를 고릅니다.
+THEMES = {
+    "소음": ["소음", "진동", "모터", "회전", "탈수", "밤", "층간", "소리", "덜컹", "스피커"],
+    "냄새": ["냄새", "곰팡이", "세균", "살균", "필터", "통세척", "배수", "습기", "건조", "물때"],
+    "배송설치": ["배송", "설치", "기사", "일정", "방문", "포장", "박스", "예약", "지연", "연락"],
+    "가격": ["가격", "할인", "쿠폰", "카드", "혜택", "구독", "렌탈", "요금", "가성비", "이벤트"],
+    "디자인": ["디자인", "색상", "크기", "공간", "인테리어", "문", "손잡이", "유리", "조명", "마감"],
+    "앱연동": ["앱", "연동", "와이파이", "알림", "원격", "업데이트", "스마트폰", "로그인", "오류", "연결"],
+    "세탁성능": ["세탁", "얼룩", "세제", "코스", "헹굼", "온수", "섬유", "이불", "수건", "구김"],
+    "고객지원": ["서비스", "상담", "센터", "수리", "보증", "부품", "교체", "환불", "응대", "문의"],
+}
+COMMON_NOUNS = ["제품", "사용", "생각", "정도", "기능", "느낌", "하루", "시간", "가족", "구매",
+                "만족", "불편", "문제", "장점", "단점", "추천", "후기", "기대", "처음", "이번"]
+POSITIVE_ENDINGS = ["정말 만족스러워요", "생각보다 훨씬 좋네요", "추천합니다", "편해서 좋아요"]
+NEGATIVE_ENDINGS = ["너무 불편해요", "실망스럽네요", "개선이 필요해요", "다시는 안 살 것 같아요"]
+
+
+def _long_tail_nouns(size: int, rng) -> list:
+    """주제 명사 외의 드문 복합 명사(어휘 꼬리)를 만듭니다."""
+    heads = [n for nouns in THEMES.values() for n in nouns]
+    tails = ["문제", "기능", "모드", "부분", "상태", "관리", "방식", "수준"]
+    combos = {f"{rng.choice(heads)}{rng.choice(tails)}" for _ in range(size * 2)}
+    return sorted(combos)[:size]
+
+
+def synthetic_web_results(num_docs: int, seed: int = 42) -> list:
+    """retrieve 결과와 같은 형태의 web_results를 만듭니다. (id, original_text, text, score, sentence_nouns, date_timestamp)"""
+    rng = np.random.default_rng(seed)
+    theme_names = list(THEMES)
+    theme_weights = rng.dirichlet(np.ones(len(theme_names)) * 2)
+    tail = _long_tail_nouns(2000, rng)
+    tail_probs = 1.0 / np.arange(1, len(tail) + 1)
+    tail_probs /= tail_probs.sum()
+    now = datetime.now()
+
+    results = []
+    for i in range(num_docs):
+        theme = theme_names[rng.choice(len(theme_names), p=theme_weights)]
+        nouns = list(rng.choice(THEMES[theme], size=rng.integers(3, 7)))
+        nouns += list(rng.choice(COMMON_NOUNS, size=rng.integers(1, 4)))
+        nouns += list(rng.choice(tail, size=rng.integers(0, 3), p=tail_probs))
+        positive = rng.random() < 0.45
+        ending = rng.choice(POSITIVE_ENDINGS if positive else NEGATIVE_ENDINGS)
+        sentence = f"{nouns[0]}은 {' '.join(nouns[1:4])} 쪽이 {ending} ({i})"
+        results.append({
+            "id": str(i),
+            "sentence": sentence,
+            "original_text": sentence,
+            "text": sentence,
+            "score": round(float(1.0 / (i + 60)), 4),
+            "sentence_nouns": " ".join(nouns),
+            "date_timestamp": int((now - timedelta(minutes=int(rng.integers(0, 525600)))).timestamp()),
+        })
+    return results
+
+
+def _stub_score_texts(texts: list, **kwargs):
+    """감성 모델 대신 텍스트 해시로 -1~1 점수를 만듭니다. (모델 로딩/추론 비용 제외)"""
+    scores = {text: zlib.crc32(text.encode("utf-8")) / 0xFFFFFFFF * 2 - 1 for text in texts}
+    return scores, {"requested": len(texts), "unique": len(scores), "cache_hits": 0,
+                    "cache_misses": len(scores), "stub": True}
+
+
+RSS_SAMPLE_INTERVAL = 0.01
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _process_max_rss_mb() -> dict:
+    """프로세스가 시작된 뒤의 최대 RSS. (크기마다 새 프로세스이므로 그 크기 전체의 최댓값입니다)"""
+    # Linux는 KB, macOS는 바이트 단위입니다.
+    unit = 1 if sys.platform == "darwin" else 1024
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit / 2**20, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit / 2**20, 1),
+    }
+
+
+def _rss_bytes(pid) -> int:
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _child_pids(pid) -> list:
+    pids = []
+    for path in glob.glob(f"/proc/{pid}/task/*/children"):
+        try:
+            with open(path) as f:
+                pids.extend(f.read().split())
+        except OSError:
+            pass
+    return pids + [c for p in pids for c in _child_pids(p)]
+
+
+class StepRssSampler:
+    """
+    with StepRssSampler() as rss: ... 블록 동안의 최대 RSS를 샘플링합니다. (Linux /proc 기준, 그 밖의 OS에서는 None)
+    rss.result(): {"start", "peak", "peak_delta"} (본 프로세스) + "children_peak" (ProcessPool 등 자식 프로세스 합)
+    """
+
+    def __init__(self, interval: float = RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.supported = os.path.exists("/proc/self/statm")
+        self.start = self.peak = self.children_peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        pid = os.getpid()
+        self.peak = max(self.peak, _rss_bytes(pid))
+        self.children_peak = max(self.children_peak, sum(_rss_bytes(c) for c in _child_pids(pid)))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        if self.supported:
+            self.start = self.peak = _rss_bytes(os.getpid())
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+            self._sample()
+        return False
+
+    def result(self) -> dict | None:
+        if not self.supported:
+            return None
+        mb = lambda b: round(b / 2**20, 1)
+        return {"start": mb(self.start), "peak": mb(self.peak), "peak_delta": mb(self.peak - self.start),
+                "children_peak": mb(self.children_peak)}
+
+
+def _workspace_size(workspace: dict) -> dict:
+    started = time.perf_counter()
+    payload = serialize(workspace, FORMAT_JSON)
+    return {"bytes": len(payload), "serialize_s": round(time.perf_counter() - started, 4)}
+
+
+def _largest_cluster(workspace: dict) -> int:
+    docs_map = workspace["artifacts"]["_cx_temp_data"]["cluster_docs_map"]
+    return int(max(docs_map, key=lambda c: len(docs_map[c])))
+
+
+def run_pipeline(num_docs: int, num_clusters: int = 8, num_topics: int = 5, weighting: str = "hard",
+                 seed: int = 42) -> dict:
+    web_results = synthetic_web_results(num_docs, seed)
+    report = {"docs": num_docs, "steps": [],
+              "workspace_rows": _workspace_size({"artifacts": {"retrieved_data": {"web_results": web_results}}})}
+
+    # 검색 결과는 data_retriever와 같은 열 단위 형식으로 저장합니다. (행 dict 리스트 크기는 workspace_rows 로 비교)
+    started = time.perf_counter()
+    workspace = {"artifacts": {"retrieved_data": {"query": "bench", **pack_web_results(web_results)}}}
+    report["pack_web_results_s"] = round(time.perf_counter() - started, 4)
+    report["workspace_initial"] = _workspace_size(workspace)
+
+    steps = [
+        ("clustering", lambda: cx_analysis.run_ward_clustering(workspace, num_clusters=num_clusters)),
+        ("sna", lambda: cx_analysis.run_semantic_network_analysis(workspace, _largest_cluster(workspace))),
+        ("lda", lambda: cx_analysis.run_topic_modeling_lda(workspace, _largest_cluster(workspace), num_topics)),
+        ("opportunity", lambda: cx_analysis.calculate_opportunity_scores(workspace, weighting=weighting)),
+    ]
+    for name, step in steps:
+        with StepRssSampler() as rss:
+            started = time.perf_counter()
+            result = step()
+            elapsed = time.perf_counter() - started
+        entry = {
+            "step": name,
+            "seconds": round(elapsed, 4),
+            "ok": isinstance(result, dict) and "error" not in result,
+            "step_rss_mb": rss.result(),
+            "workspace": _workspace_size(workspace),
+        }
+        if not entry["ok"]:
+            entry["error"] = (result or {}).get("error")
+        report["steps"].append(entry)
+        print(f"⏱️ [{num_docs} docs] {name}: {entry}")
+        if not entry["ok"]:
+            break
+    report["process_max_rss_mb"] = _process_max_rss_mb()
+    return report
+
+
+def run_isolated(num_docs: int, num_clusters: int, num_topics: int, real_sentiment: bool, weighting: str) -> dict:
+    """문서 수 하나를 새 하위 프로세스에서 실행하고 그 결과를 반환합니다."""
+    out_path = os.path.join(_BENCH_DIR, f"result_{num_docs}.json")
+    cmd = [sys.executable, "-m", f"{__package__}.cx_pipeline", "--single", str(num_docs),
+           "--clusters", str(num_clusters), "--topics", str(num_topics), "--weighting", weighting, "--out", out_path]
+    if real_sentiment:
+        cmd.append("--real-sentiment")
+    completed = subprocess.run(cmd)
+    if completed.returncode != 0:
+        return {"docs": num_docs, "error": f"benchmark process exited with {completed.returncode}"}
+    with open(out_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def run_benchmark(sizes: list, num_clusters: int, num_topics: int, real_sentiment: bool,
+                  weighting: str = "hard") -> dict:
+    report = {
+        "benchmark": "cx_pipeline",
+        "created_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "sentiment": "real" if real_sentiment else "stub",
+        "num_clusters": num_clusters,
+        "num_topics": num_topics,
+        "weighting": weighting,
+        "results": [],
+    }
+    for num_docs in sizes:
+        report["results"].append(run_isolated(num_docs, num_clusters, num_topics, real_sentiment, weighting))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CX 분석 파이프라인 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--clusters", type=int, default=8)
+    parser.add_argument("--topics", type=int, default=5)
+    parser.add_argument("--weighting", choices=["hard", "soft"], default="hard",
+                        help="기회 점수 계산 시 문서-토픽 가중 방식")
+    parser.add_argument("--real-sentiment", action="store_true", help="스텁 대신 실제 감성 모델을 사용합니다.")
+    parser.add_argument("--single", type=int, default=None, help=argparse.SUPPRESS)  # run_isolated 하위 프로세스용
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    if args.single is not None:
+        if not args.real_sentiment:
+            cx_analysis.score_texts = _stub_score_texts
+        report = run_pipeline(args.single, args.clusters, args.topics, args.weighting)
+    else:
+        report = run_benchmark(args.sizes, args.clusters, args.topics, args.real_sentiment, args.weighting)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📄 Report written to {args.out}")
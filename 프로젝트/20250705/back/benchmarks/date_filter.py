@@ -0,0 +1,142 @@
+# agents/benchmarks/date_filter.py
+"""
+기간 필터 검색 지연시간 벤치마크입니다.
+1년치 합성 데이터를 임시 컬렉션에 넣고, "최근 N개월" 검색을 다음 세 가지 구성으로 비교합니다.
+  1) payload 인덱스 없음  2) date_timestamp 정수 범위 인덱스  3) 기간 파티션 라우팅
+
+실행:
+    python -m agents.benchmarks.date_filter --points 200000 --queries 20
+"""
+
+import time
+import json
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+from qdrant_client.http.models import (
+    VectorParams, Distance, PointStruct, Filter, FieldCondition, Range, SearchRequest, NamedVector,
+)
+
+from ..utils import get_qdrant_client
+from ..collection_setup import (
+    PAYLOAD_INDEXES, create_payload_indexes, partition_name, partitions_for_range,
+)
+
+BENCH_COLLECTION = "bench_web_data"
+VECTOR_SIZES = {"meaning": 1024, "topic": 768}
+MONTH_WINDOWS = [1, 3, 6, 12]
+
+
+def _create_collection(client, name):
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    client.create_collection(
+        collection_name=name,
+        vectors_config={k: VectorParams(size=v, distance=Distance.COSINE) for k, v in VECTOR_SIZES.items()},
+    )
+
+
+def _random_vectors(rng, n):
+    return {k: rng.standard_normal((n, v), dtype=np.float32) for k, v in VECTOR_SIZES.items()}
+
+
+def load_synthetic_year(num_points: int, batch_size: int = 1000, granularity: str = "quarter", seed: int = 42):
+    """최근 1년에 고르게 퍼진 date_timestamp를 갖는 합성 포인트를 원본/파티션 컬렉션에 함께 적재합니다."""
+    client = get_qdrant_client()
+    rng = np.random.default_rng(seed)
+    now = int(datetime.now().timestamp())
+    year_ago = int((datetime.now() - timedelta(days=365)).timestamp())
+
+    _create_collection(client, BENCH_COLLECTION)
+    partitions = set()
+    for start in range(0, num_points, batch_size):
+        n = min(batch_size, num_points - start)
+        vectors = _random_vectors(rng, n)
+        timestamps = rng.integers(year_ago, now, size=n)
+        points = [
+            PointStruct(
+                id=start + i,
+                vector={k: vectors[k][i].tolist() for k in VECTOR_SIZES},
+                payload={"date_timestamp": int(timestamps[i]), "sentence": f"bench {start + i}"},
+            )
+            for i in range(n)
+        ]
+        client.upsert(collection_name=BENCH_COLLECTION, points=points)
+
+        grouped = {}
+        for point in points:
+            name = partition_name(point.payload["date_timestamp"], granularity).replace("web_data", BENCH_COLLECTION, 1)
+            grouped.setdefault(name, []).append(point)
+        for name, group in grouped.items():
+            if name not in partitions:
+                _create_collection(client, name)
+                create_payload_indexes(name, PAYLOAD_INDEXES["web_data"])
+                partitions.add(name)
+            client.upsert(collection_name=name, points=group)
+    print(f"✅ Loaded {num_points} synthetic points ({len(partitions)} partitions)")
+    return sorted(partitions)
+
+
+def _time_queries(client, collections, query_vectors, start_ts, end_ts, top_k):
+    query_filter = Filter(must=[FieldCondition(key="date_timestamp", range=Range(gte=start_ts, lte=end_ts))])
+    latencies = []
+    for meaning_vec, topic_vec in query_vectors:
+        requests = [
+            SearchRequest(vector=NamedVector(name="meaning", vector=meaning_vec), limit=top_k, filter=query_filter),
+            SearchRequest(vector=NamedVector(name="topic", vector=topic_vec), limit=top_k, filter=query_filter),
+        ]
+        started = time.perf_counter()
+        for name in collections:
+            client.search_batch(collection_name=name, requests=requests)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return {"p50_ms": round(float(np.percentile(latencies, 50)), 2), "p95_ms": round(float(np.percentile(latencies, 95)), 2)}
+
+
+def run_benchmark(num_points: int = 200_000, num_queries: int = 20, top_k: int = 2000, cleanup: bool = True) -> dict:
+    client = get_qdrant_client()
+    partitions = load_synthetic_year(num_points)
+    rng = np.random.default_rng(7)
+    query_vectors = [
+        (rng.standard_normal(VECTOR_SIZES["meaning"]).tolist(), rng.standard_normal(VECTOR_SIZES["topic"]).tolist())
+        for _ in range(num_queries)
+    ]
+    now = int(datetime.now().timestamp())
+    partition_names = [p.replace(BENCH_COLLECTION, "web_data", 1) for p in partitions]
+
+    report = {"points": num_points, "queries": num_queries, "top_k": top_k, "results": {}}
+    for stage in ["no_index", "range_index", "partitioned"]:
+        if stage == "range_index":
+            create_payload_indexes(BENCH_COLLECTION, PAYLOAD_INDEXES["web_data"])
+        for months in MONTH_WINDOWS:
+            start_ts = int((datetime.now() - timedelta(days=30 * months)).timestamp())
+            if stage == "partitioned":
+                selected = partitions_for_range(start_ts, now, partitions=partition_names)
+                collections = [p.replace("web_data", BENCH_COLLECTION, 1) for p in selected]
+            else:
+                collections = [BENCH_COLLECTION]
+            result = _time_queries(client, collections, query_vectors, start_ts, now, top_k)
+            result["collections"] = len(collections)
+            report["results"].setdefault(stage, {})[f"{months}m"] = result
+            print(f"⏱️ {stage:12s} 최근 {months:2d}개월: {result}")
+
+    if cleanup:
+        for name in [BENCH_COLLECTION] + partitions:
+            client.delete_collection(name)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="기간 필터 검색 지연시간 벤치마크")
+    parser.add_argument("--points", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=2000)
+    parser.add_argument("--keep", action="store_true", help="벤치마크 컬렉션을 삭제하지 않습니다.")
+    parser.add_argument("--out", default=None, help="결과를 저장할 JSON 경로")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.points, args.queries, args.top_k, cleanup=not args.keep)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 Report saved: {args.out}")
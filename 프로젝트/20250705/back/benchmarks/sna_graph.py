@@ -0,0 +1,141 @@
+# agents/benchmarks/sna_graph.py
+"""
+SNA 그래프 생성 벤치마크입니다.
+기존 방식(모든 (i, j) 쌍을 희소 행렬에서 원소 단위로 조회)과
+sna_graph.build_cooccurrence_graph(상삼각 일괄 임계값 처리)를 피처 수 500/2000/5000 에서 비교합니다.
+--network 를 주면 커뮤니티 탐지 + 중심성까지 포함한 전체 SNA 단계도 비교합니다.
+  (기존: 전체 그래프 Louvain + 커뮤니티별 서브그래프 중심성 / 신규: analyze_cooccurrence_network)
+
+실행:
+    python -m agents.benchmarks.sna_graph --docs 400 --features 500 2000 5000
+    python -m agents.benchmarks.sna_graph --docs 5000 --features 2000 --network
+"""
+
+import time
+import json
+import argparse
+
+import numpy as np
+import networkx as nx
+from scipy import sparse
+
+from ..sna_graph import build_cooccurrence_graph, analyze_cooccurrence_network, DEFAULT_EDGE_THRESHOLD
+
+
+def synthetic_tfidf(num_docs: int, num_features: int, terms_per_doc: int = 12, seed: int = 42):
+    """문서당 몇 개의 단어만 가진 L2 정규화 TF-IDF 형태의 희소 행렬을 만듭니다. (Zipf 분포로 단어 선택)"""
+    rng = np.random.default_rng(seed)
+    ranks = np.arange(1, num_features + 1)
+    probs = (1.0 / ranks) / (1.0 / ranks).sum()
+    rows, cols = [], []
+    for doc in range(num_docs):
+        terms = np.unique(rng.choice(num_features, size=terms_per_doc, p=probs))
+        rows.extend([doc] * len(terms))
+        cols.extend(terms.tolist())
+    data = rng.random(len(rows)) + 0.1
+    X = sparse.csr_matrix((data, (rows, cols)), shape=(num_docs, num_features))
+    norms = np.sqrt(X.multiply(X).sum(axis=1)).A.ravel()
+    return sparse.diags(1.0 / np.maximum(norms, 1e-12)) @ X
+
+
+def legacy_graph(cluster_matrix, feature_names, threshold=DEFAULT_EDGE_THRESHOLD):
+    """cx_analysis 의 이전 구현을 그대로 옮긴 기준선입니다."""
+    co_occurrence_matrix = (cluster_matrix.T * cluster_matrix).tocsr()
+    co_occurrence_matrix.setdiag(0)
+    G = nx.Graph()
+    for name in feature_names:
+        G.add_node(name, id=name, name=name)
+    for i in range(co_occurrence_matrix.shape[0]):
+        for j in range(i + 1, co_occurrence_matrix.shape[1]):
+            weight = co_occurrence_matrix[i, j]
+            if weight > threshold:
+                G.add_edge(feature_names[i], feature_names[j], weight=float(weight))
+    return G
+
+
+def legacy_network(G):
+    """이전 SNA 단계: 전체 그래프 Louvain 후 커뮤니티마다 서브그래프 중심성, 마지막에 전체 중심성 한 번 더."""
+    import community as co
+
+    partitions = co.best_partition(G)
+    for community_id in set(partitions.values()):
+        nodes = [n for n, p in partitions.items() if p == community_id]
+        nx.degree_centrality(G.subgraph(nodes))
+    nx.degree_centrality(G)
+    return partitions
+
+
+def run_network_benchmark(num_docs: int, feature_sizes: list, modes: list) -> list:
+    results = []
+    for num_features in feature_sizes:
+        X = synthetic_tfidf(num_docs, num_features)
+        feature_names = [f"단어{i}" for i in range(num_features)]
+
+        started = time.perf_counter()
+        G = build_cooccurrence_graph(X, feature_names)
+        partitions = legacy_network(G)
+        result = {
+            "features": num_features,
+            "legacy_s": round(time.perf_counter() - started, 4),
+            "legacy_edges": G.number_of_edges(),
+            "legacy_communities": len(set(partitions.values())),
+        }
+        for mode in modes:
+            started = time.perf_counter()
+            network = analyze_cooccurrence_network(X, feature_names, mode=mode)
+            result[mode] = {
+                "seconds": round(time.perf_counter() - started, 4),
+                "edges": int(network["adjacency"].nnz // 2),
+                "communities": int(len(np.unique(network["labels"]))),
+                "method": network["community_method"],
+            }
+        results.append(result)
+        print(f"⏱️ {result}")
+    return results
+
+
+def run_benchmark(num_docs: int, feature_sizes: list, legacy_max_features: int = 2000) -> dict:
+    report = {"docs": num_docs, "results": []}
+    for num_features in feature_sizes:
+        X = synthetic_tfidf(num_docs, num_features)
+        feature_names = [f"단어{i}" for i in range(num_features)]
+
+        started = time.perf_counter()
+        G = build_cooccurrence_graph(X, feature_names)
+        vectorized_s = time.perf_counter() - started
+
+        result = {
+            "features": num_features,
+            "vectorized_s": round(vectorized_s, 4),
+            "nodes": G.number_of_nodes(),
+            "edges": G.number_of_edges(),
+        }
+        if num_features <= legacy_max_features:
+            started = time.perf_counter()
+            legacy = legacy_graph(X, feature_names)
+            result["legacy_s"] = round(time.perf_counter() - started, 4)
+            result["speedup"] = round(result["legacy_s"] / max(vectorized_s, 1e-9), 1)
+            # 고립 노드만 다르고 엣지 집합은 같아야 합니다.
+            assert legacy.number_of_edges() == G.number_of_edges()
+        report["results"].append(result)
+        print(f"⏱️ {result}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SNA 그래프 생성 벤치마크")
+    parser.add_argument("--docs", type=int, default=400)
+    parser.add_argument("--features", type=int, nargs="+", default=[500, 2000, 5000])
+    parser.add_argument("--legacy-max-features", type=int, default=2000,
+                        help="이 값보다 피처가 많으면 기존 루프 방식은 건너뜁니다. (5000 피처는 수 분 소요)")
+    parser.add_argument("--network", action="store_true", help="커뮤니티 탐지 + 중심성까지 포함해 비교합니다.")
+    parser.add_argument("--modes", nargs="+", default=["auto", "top_k", "budget"])
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    report = run_benchmark(args.docs, args.features, args.legacy_max_features)
+    if args.network:
+        report["network"] = run_network_benchmark(args.docs, args.features, args.modes)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
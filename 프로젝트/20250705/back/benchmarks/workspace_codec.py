@@ -0,0 +1,189 @@
+# agents/benchmarks/workspace_codec.py
+"""
+워크스페이스 직렬화 방식별 크기/지연시간 비교 벤치마크입니다.
+Redis에 저장된 실제 세션 워크스페이스(새 형식 session:*:ws:meta, 이전 형식 session:*:workspace)를 불러와
+다음 방식으로 인코딩/디코딩한 크기와 시간을 비교합니다.
+  - json_legacy  : 스키마 도입 전 방식 (전체를 순회하며 datetime을 문자열로 바꿔 json.dumps /
+                   json.loads 후 모든 문자열에 fromisoformat 시도, id/function dict를 tool_call로 변환)
+  - json_tagged  : 타입 태그 JSON (orjson이 있으면 orjson)
+  - msgpack      : 타입 태그 msgpack
+  - 위 두 방식 각각 + gzip / + zstd (zstandard 설치 시)
+Redis 없이 실행하려면 --files 로 워크스페이스 JSON 파일을 넘깁니다.
+
+실행:
+    python -m agents.benchmarks.workspace_codec --limit 50 --out workspace_codec.json
+    python -m agents.benchmarks.workspace_codec --files ws1.json ws2.json
+"""
+
+import time
+import json
+import argparse
+import statistics
+from datetime import datetime, date
+
+from ..utils import get_redis_binary_client
+from ..workspace_store import load_workspace, workspace_to_dict
+from ..workspace_model import workspace_from_record
+from ..workspace_codec import (
+    msgpack, zstandard, serialize, deserialize, frame, unframe,
+    FORMAT_JSON, FORMAT_MSGPACK, COMPRESS_NONE, COMPRESS_GZIP, COMPRESS_ZSTD,
+)
+
+
+def _legacy_to_str(obj):
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if hasattr(obj, '__dict__') and hasattr(obj, 'id') and hasattr(obj, 'function'):
+        return {'id': obj.id, 'type': getattr(obj, 'type', 'function'),
+                'function': {'name': obj.function.name, 'arguments': obj.function.arguments}}
+    if isinstance(obj, list):
+        return [_legacy_to_str(elem) for elem in obj]
+    if isinstance(obj, dict):
+        return {k: _legacy_to_str(v) for k, v in obj.items()}
+    return obj
+
+
+def _legacy_from_str(obj):
+    if isinstance(obj, str):
+        try:
+            return datetime.fromisoformat(obj)
+        except ValueError:
+            try:
+                return date.fromisoformat(obj)
+            except ValueError:
+                pass
+    if isinstance(obj, dict) and 'id' in obj and 'function' in obj:
+        from openai.types.chat import ChatCompletionMessageToolCall
+        return ChatCompletionMessageToolCall(id=obj['id'], type=obj.get('type', 'function'), function=obj['function'])
+    if isinstance(obj, list):
+        return [_legacy_from_str(elem) for elem in obj]
+    if isinstance(obj, dict):
+        return {k: _legacy_from_str(v) for k, v in obj.items()}
+    return obj
+
+
+def _legacy_encode(value) -> bytes:
+    return json.dumps(_legacy_to_str(value), ensure_ascii=False).encode("utf-8")
+
+
+def _legacy_decode(payload: bytes):
+    return _legacy_from_str(json.loads(payload))
+
+
+def _codec(fmt: bytes, compression: bytes):
+    def encode(value) -> bytes:
+        return frame(serialize(value, fmt), fmt, compression)
+
+    def decode(payload: bytes):
+        payload_fmt, raw = unframe(payload)
+        return deserialize(raw, payload_fmt)
+    return encode, decode
+
+
+def available_codecs() -> dict:
+    codecs = {"json_legacy": (_legacy_encode, _legacy_decode)}
+    formats = {"json_tagged": FORMAT_JSON}
+    if msgpack is not None:
+        formats["msgpack"] = FORMAT_MSGPACK
+    compressions = {"": COMPRESS_NONE, "+gzip": COMPRESS_GZIP}
+    if zstandard is not None:
+        compressions["+zstd"] = COMPRESS_ZSTD
+    for fmt_name, fmt in formats.items():
+        for suffix, compression in compressions.items():
+            codecs[fmt_name + suffix] = _codec(fmt, compression)
+    return codecs
+
+
+def session_workspaces(limit: int) -> list:
+    """Redis에서 세션 워크스페이스를 최대 limit개 불러옵니다. [(session_id, workspace dict)]"""
+    r = get_redis_binary_client()
+    if r is None:
+        raise RuntimeError("Redis에 연결할 수 없습니다. --files 로 워크스페이스 파일을 지정하세요.")
+    session_ids = []
+    for pattern, suffix in ((b"session:*:ws:meta", b":ws:meta"), (b"session:*:workspace", b":workspace")):
+        for key in r.scan_iter(match=pattern, count=500):
+            session_id = key[len(b"session:"):-len(suffix)].decode("utf-8")
+            if session_id not in session_ids:
+                session_ids.append(session_id)
+            if len(session_ids) >= limit:
+                break
+    workspaces = []
+    for session_id in session_ids[:limit]:
+        workspace = load_workspace(session_id)
+        if workspace:
+            workspaces.append((session_id, workspace_to_dict(workspace)))
+    return workspaces
+
+
+def file_workspaces(paths: list) -> list:
+    workspaces = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            workspaces.append((path, workspace_from_record(json.load(f))))
+    return workspaces
+
+
+def _median_seconds(func, arg, repeat: int):
+    timings, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(arg)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), result
+
+
+def run_benchmark(workspaces: list, repeat: int = 5) -> dict:
+    codecs = available_codecs()
+    report = {
+        "benchmark": "workspace_codec",
+        "created_at": datetime.now().isoformat(),
+        "workspaces": len(workspaces),
+        "repeat": repeat,
+        "sessions": [],
+        "summary": {},
+    }
+    totals = {name: {"bytes": 0, "encode_s": 0.0, "decode_s": 0.0} for name in codecs}
+    for session_id, workspace in workspaces:
+        entry = {"session": session_id, "codecs": {}}
+        for name, (encode, decode) in codecs.items():
+            encode_s, payload = _median_seconds(encode, workspace, repeat)
+            decode_s, _ = _median_seconds(decode, payload, repeat)
+            entry["codecs"][name] = {
+                "bytes": len(payload),
+                "encode_ms": round(encode_s * 1000, 3),
+                "decode_ms": round(decode_s * 1000, 3),
+            }
+            totals[name]["bytes"] += len(payload)
+            totals[name]["encode_s"] += encode_s
+            totals[name]["decode_s"] += decode_s
+        report["sessions"].append(entry)
+        print(f"⏱️ {session_id}: " + ", ".join(f"{k}={v['bytes']}B/{v['encode_ms']}ms/{v['decode_ms']}ms"
+                                            for k, v in entry["codecs"].items()))
+
+    baseline = totals["json_legacy"]["bytes"] or 1
+    for name, total in totals.items():
+        report["summary"][name] = {
+            "total_bytes": total["bytes"],
+            "size_ratio_vs_legacy": round(total["bytes"] / baseline, 3),
+            "total_encode_ms": round(total["encode_s"] * 1000, 3),
+            "total_decode_ms": round(total["decode_s"] * 1000, 3),
+        }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="워크스페이스 직렬화 방식 비교 벤치마크")
+    parser.add_argument("--limit", type=int, default=50, help="Redis에서 불러올 최대 세션 수")
+    parser.add_argument("--files", nargs="*", default=None, help="Redis 대신 사용할 워크스페이스 JSON 파일")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    workspaces = file_workspaces(args.files) if args.files else session_workspaces(args.limit)
+    report = run_benchmark(workspaces, args.repeat)
+    for name, summary in report["summary"].items():
+        print(f"📊 {name}: {summary}")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📄 Report written to {args.out}")
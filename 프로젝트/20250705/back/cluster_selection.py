@@ -0,0 +1,126 @@
+# agents/cluster_selection.py
+"""
+클러스터 개수(k) 자동 선택 모듈입니다.
+k 범위의 MiniBatchKMeans를 프로세스 풀에서 병렬로 학습하고(작업 워커 안에서는 차례로), 각 k를 다음 두 지표로 평가합니다.
+- silhouette: 표본(sample)에서 계산 (전체 계산은 O(n²)이므로)
+- Calinski–Harabasz: 희소 행렬 연산으로 전체 문서에 대해 계산
+TF-IDF 행렬(또는 임베딩 특징 행렬)은 artifact_store에 한 번만 저장하고, 각 워커는 참조(ref)로 mmap 로드하므로 복사 없이 공유됩니다.
+모든 후보의 라벨도 artifact_store에 저장해 두어, 이후 k를 바꾸면 재학습 없이 바로 불러옵니다.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.metrics import silhouette_score, calinski_harabasz_score
+
+from .artifact_store import load_sparse_matrix, load_array, save_array
+from .jobs import report_progress, in_job
+
+AUTO_K_MIN = 2
+AUTO_K_MAX = 10
+SILHOUETTE_SAMPLE_SIZE = 2000
+AUTO_K_WORKERS = int(os.getenv("AUTO_K_WORKERS", min(4, os.cpu_count() or 1)))
+
+
+def calinski_harabasz_sparse(X, labels: np.ndarray) -> float:
+    """
+    Calinski–Harabasz 점수를 희소 행렬 그대로 계산합니다. (sklearn 구현은 밀집 행렬을 요구)
+    총 분산 = Σ‖x‖² − n‖μ‖², 군집 내 분산 = Σ‖x‖² − Σ_k n_k‖μ_k‖²
+    """
+    n, k = X.shape[0], int(labels.max()) + 1
+    if k < 2 or n <= k:
+        return 0.0
+    sq_norm_sum = float(X.multiply(X).sum())
+    indicator = csr_matrix((np.ones(n), (labels, np.arange(n))), shape=(k, n))
+    cluster_sums = np.asarray((indicator @ X).todense())
+    counts = np.bincount(labels, minlength=k).astype(float)
+    total_sum = cluster_sums.sum(axis=0)
+
+    within = sq_norm_sum - float(((cluster_sums ** 2).sum(axis=1) / np.maximum(counts, 1)).sum())
+    total = sq_norm_sum - float((total_sum ** 2).sum()) / n
+    between = total - within
+    if within <= 0:
+        return 0.0
+    return (between / (k - 1)) / (within / (n - k))
+
+
+def _fit_candidate(matrix_ref: dict, k: int, sample_size: int, random_state: int) -> dict:
+    """워커 프로세스에서 실행: 공유 TF-IDF 행렬로 k개 클러스터를 학습하고 평가합니다."""
+    # TF-IDF(희소, csr)와 임베딩 특징(밀집, ndarray) 참조를 모두 받습니다.
+    X = load_sparse_matrix(matrix_ref) if matrix_ref["kind"] == "csr" else np.asarray(load_array(matrix_ref))
+    kmeans = MiniBatchKMeans(n_clusters=k, random_state=random_state, n_init=10)
+    labels = kmeans.fit_predict(X).astype(np.int32)
+
+    if len(np.unique(labels)) < 2:
+        silhouette, calinski = -1.0, 0.0
+    else:
+        silhouette = float(silhouette_score(
+            X, labels, sample_size=min(sample_size, X.shape[0]), random_state=random_state
+        ))
+        calinski = float(calinski_harabasz_sparse(X, labels) if matrix_ref["kind"] == "csr"
+                         else calinski_harabasz_score(X, labels))
+
+    return {"k": k, "silhouette": silhouette, "calinski_harabasz": calinski, "labels_ref": save_array(labels)}
+
+
+def _minmax(values: list) -> np.ndarray:
+    arr = np.asarray(values, dtype=float)
+    span = arr.max() - arr.min()
+    return np.zeros_like(arr) if span == 0 else (arr - arr.min()) / span
+
+
+def select_num_clusters(matrix_ref: dict, k_min: int = AUTO_K_MIN, k_max: int = AUTO_K_MAX,
+                        sample_size: int = SILHOUETTE_SAMPLE_SIZE, workers: int = AUTO_K_WORKERS,
+                        random_state: int = 42) -> dict:
+    """
+    k_min~k_max 범위의 후보를 병렬로 평가하고 추천 k를 반환합니다.
+    추천 기준: 후보들 사이에서 min-max 정규화한 silhouette과 Calinski–Harabasz의 평균이 가장 높은 k.
+    Returns:
+        {"recommended_k": int,
+         "candidates": [{"k", "silhouette", "calinski_harabasz", "score"}, ...],
+         "labels_refs": {"k": labels_ref, ...}}
+    """
+    n_docs = matrix_ref["shape"][0]
+    k_max = min(k_max, n_docs - 1)
+    ks = list(range(max(2, k_min), k_max + 1))
+    if not ks:
+        raise ValueError("클러스터 개수를 자동으로 선택하기에 문서 수가 너무 적습니다.")
+
+    if in_job():
+        # 작업 워커 안에서는 이미 JOB_WORKERS 만큼 프로세스가 돌고 있으므로 후보를 차례로 평가합니다.
+        workers = 1
+    print(f"🔢 Auto-k: evaluating k={ks[0]}..{ks[-1]} on {n_docs} docs with {workers} workers")
+    if workers > 1 and len(ks) > 1:
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(ks)))
+        try:
+            futures = [executor.submit(_fit_candidate, matrix_ref, k, sample_size, random_state) for k in ks]
+            results = [f.result() for f in futures]
+        except BaseException:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown(wait=True)
+    else:
+        results = []
+        for i, k in enumerate(ks, start=1):
+            results.append(_fit_candidate(matrix_ref, k, sample_size, random_state))
+            report_progress(0.2 + 0.4 * i / len(ks), f"클러스터 수 후보 {i}/{len(ks)} 평가 완료")
+
+    combined = (_minmax([r["silhouette"] for r in results]) + _minmax([r["calinski_harabasz"] for r in results])) / 2
+    candidates = []
+    for r, score in zip(results, combined):
+        candidates.append({
+            "k": r["k"],
+            "silhouette": round(r["silhouette"], 4),
+            "calinski_harabasz": round(r["calinski_harabasz"], 2),
+            "score": round(float(score), 4),
+        })
+    recommended = candidates[int(np.argmax(combined))]["k"]
+    print(f"✅ Auto-k recommended k={recommended}")
+    return {
+        "recommended_k": recommended,
+        "candidates": candidates,
+        "labels_refs": {str(r["k"]): r["labels_ref"] for r in results},
+    }
@@ -0,0 +1,225 @@
+# agents/collection_setup.py
+"""
+Qdrant 컬렉션 설정 도구입니다.
+- 검색 필터에 쓰이는 필드(date_timestamp, product_type, Product)에 payload 인덱스를 생성합니다.
+- (선택) web_data를 기간별 컬렉션(web_data__2024q1, web_data__2024_03 ...)으로 나누어,
+  기간이 지정된 검색은 해당 기간과 겹치는 파티션에만 보내도록 합니다. (data_retriever.resolve_web_collections)
+  파티션을 만든 뒤 새로 적재하는 문장은 upsert_web_points()가 web_data와 해당 파티션에 함께 씁니다.
+
+사용 예:
+    python -m agents.collection_setup indexes
+    python -m agents.collection_setup partition --granularity quarter
+"""
+
+import argparse
+from datetime import datetime
+
+from qdrant_client.http.models import (
+    PayloadSchemaType, IntegerIndexParams, IntegerIndexType, VectorParams, PointStruct,
+)
+from .utils import get_qdrant_client
+
+WEB_COLLECTION = "web_data"
+PARTITION_SEPARATOR = "__"
+UNDATED_PARTITION = f"{WEB_COLLECTION}{PARTITION_SEPARATOR}undated"
+
+# 컬렉션별로 인덱스가 필요한 payload 필드
+# - date_timestamp: "최근 N개월" Range 필터 (정수, 범위 검색만 필요하므로 lookup 비활성화)
+# - product_type / Product: MatchValue 필터 (keyword)
+PAYLOAD_INDEXES = {
+    "web_data": {"date_timestamp": "integer_range"},
+    "product_data": {"product_type": "keyword"},
+    "product_metadata": {"product_type": "keyword"},
+    "sensor_data": {"Product": "keyword"},
+}
+
+
+def _index_schema(kind: str):
+    if kind == "integer_range":
+        return IntegerIndexParams(type=IntegerIndexType.INTEGER, lookup=False, range=True)
+    return PayloadSchemaType.KEYWORD
+
+
+def create_payload_indexes(collection_name: str, fields: dict | None = None):
+    """컬렉션에 payload 인덱스를 생성합니다. 이미 있는 인덱스는 건너뜁니다."""
+    client = get_qdrant_client()
+    fields = fields if fields is not None else PAYLOAD_INDEXES.get(collection_name, {})
+    existing = client.get_collection(collection_name).payload_schema or {}
+
+    for field_name, kind in fields.items():
+        if field_name in existing:
+            print(f"ℹ️ Index already exists: {collection_name}.{field_name}")
+            continue
+        client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field_name,
+            field_schema=_index_schema(kind),
+            wait=True,
+        )
+        print(f"✅ Payload index created: {collection_name}.{field_name} ({kind})")
+
+
+def create_all_payload_indexes():
+    client = get_qdrant_client()
+    for collection_name in PAYLOAD_INDEXES:
+        if client.collection_exists(collection_name):
+            create_payload_indexes(collection_name)
+        else:
+            print(f"⚠️ 컬렉션이 없어 건너뜀: {collection_name}")
+    # 이미 만들어진 기간 파티션에도 동일한 인덱스를 보장합니다.
+    for name in list_web_partitions():
+        create_payload_indexes(name, PAYLOAD_INDEXES[WEB_COLLECTION])
+
+
+# --- 기간 파티션 ---
+def partition_name(timestamp: int | None, granularity: str = "quarter") -> str:
+    """date_timestamp(초)가 속한 파티션 컬렉션 이름을 반환합니다."""
+    if timestamp is None:
+        return UNDATED_PARTITION
+    dt = datetime.fromtimestamp(timestamp)
+    if granularity == "month":
+        suffix = f"{dt.year}_{dt.month:02d}"
+    else:
+        suffix = f"{dt.year}q{(dt.month - 1) // 3 + 1}"
+    return f"{WEB_COLLECTION}{PARTITION_SEPARATOR}{suffix}"
+
+
+def partition_range(name: str) -> tuple[int, int] | None:
+    """파티션 이름에서 포함하는 기간 [start, end) 를 timestamp(초)로 계산합니다. 날짜 없는 파티션은 None."""
+    suffix = name.split(PARTITION_SEPARATOR, 1)[-1]
+    if "q" in suffix:
+        year, quarter = suffix.split("q")
+        year, start_month, months = int(year), (int(quarter) - 1) * 3 + 1, 3
+    elif "_" in suffix:
+        year, month = suffix.split("_")
+        year, start_month, months = int(year), int(month), 1
+    else:
+        return None
+
+    end_month = start_month + months
+    end_year = year + (end_month - 1) // 12
+    end_month = (end_month - 1) % 12 + 1
+    start = datetime(year, start_month, 1)
+    end = datetime(end_year, end_month, 1)
+    return int(start.timestamp()), int(end.timestamp())
+
+
+def list_web_partitions() -> list:
+    client = get_qdrant_client()
+    prefix = f"{WEB_COLLECTION}{PARTITION_SEPARATOR}"
+    return sorted(c.name for c in client.get_collections().collections if c.name.startswith(prefix))
+
+
+def partition_granularity(partitions: list) -> str:
+    """기존 파티션 이름에서 분할 단위를 알아냅니다. (web_data__2024_03 이면 month, 그 밖에는 quarter)"""
+    for name in partitions:
+        suffix = name.split(PARTITION_SEPARATOR, 1)[-1]
+        if "_" in suffix:
+            return "month"
+    return "quarter"
+
+
+def partitions_for_range(start_ts: int, end_ts: int, partitions: list | None = None) -> list:
+    """[start_ts, end_ts] 구간과 겹치는 파티션 이름만 반환합니다."""
+    partitions = partitions if partitions is not None else list_web_partitions()
+    selected = []
+    for name in partitions:
+        bounds = partition_range(name)
+        if bounds and bounds[0] <= end_ts and start_ts < bounds[1]:
+            selected.append(name)
+    return selected
+
+
+def _web_vectors_config(client):
+    vectors_config = client.get_collection(WEB_COLLECTION).config.params.vectors
+    if isinstance(vectors_config, dict):
+        return {name: VectorParams(size=p.size, distance=p.distance) for name, p in vectors_config.items()}
+    return VectorParams(size=vectors_config.size, distance=vectors_config.distance)
+
+
+def _ensure_partition(client, name: str, vectors_config):
+    if not client.collection_exists(name):
+        client.create_collection(collection_name=name, vectors_config=vectors_config)
+        create_payload_indexes(name, PAYLOAD_INDEXES[WEB_COLLECTION])
+
+
+def upsert_web_points(points: list, collection_name: str = WEB_COLLECTION) -> int:
+    """
+    웹 문장 포인트를 적재합니다. web_data에 쓰고, 이미 기간 파티션이 있으면 date_timestamp에 맞는 파티션에도 씁니다.
+    (partition_web_data는 한 번 복사하는 것이므로, 이후 적재분도 파티션 검색에 보이려면 함께 써야 합니다)
+    """
+    client = get_qdrant_client()
+    client.upsert(collection_name=collection_name, points=points)
+    if collection_name != WEB_COLLECTION:
+        return len(points)
+    partitions = list_web_partitions()
+    if not partitions:
+        return len(points)
+
+    granularity = partition_granularity(partitions)
+    grouped = {}
+    for point in points:
+        name = partition_name((point.payload or {}).get("date_timestamp"), granularity)
+        grouped.setdefault(name, []).append(point)
+    vectors_config = None
+    for name, group in grouped.items():
+        if name not in partitions:
+            vectors_config = vectors_config or _web_vectors_config(client)
+            _ensure_partition(client, name, vectors_config)
+        client.upsert(collection_name=name, points=group)
+    return len(points)
+
+
+def partition_web_data(granularity: str = "quarter", page_size: int = 512) -> dict:
+    """
+    web_data 전체를 scroll로 순회하며 date_timestamp 기준 파티션 컬렉션으로 복사합니다.
+    원본 web_data는 그대로 두므로, 파티션 검색을 끄면 기존 방식으로 바로 돌아갈 수 있습니다.
+    """
+    client = get_qdrant_client()
+    vectors_config = _web_vectors_config(client)
+
+    created, counts = set(), {}
+    offset = None
+    while True:
+        records, offset = client.scroll(
+            collection_name=WEB_COLLECTION, limit=page_size, offset=offset,
+            with_payload=True, with_vectors=True,
+        )
+        if not records:
+            break
+
+        grouped = {}
+        for record in records:
+            name = partition_name((record.payload or {}).get("date_timestamp"), granularity)
+            grouped.setdefault(name, []).append(record)
+
+        for name, group in grouped.items():
+            if name not in created:
+                _ensure_partition(client, name, vectors_config)
+                created.add(name)
+            client.upsert(
+                collection_name=name,
+                points=[PointStruct(id=r.id, vector=r.vector, payload=r.payload) for r in group],
+            )
+            counts[name] = counts.get(name, 0) + len(group)
+
+        print(f"  ↳ {sum(counts.values())} points partitioned")
+        if offset is None:
+            break
+
+    print(f"✅ web_data partitioned into {len(counts)} collections: {counts}")
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Qdrant 컬렉션 설정 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("indexes", help="payload 인덱스를 생성합니다.")
+    partition_parser = sub.add_parser("partition", help="web_data를 기간별 컬렉션으로 나눕니다.")
+    partition_parser.add_argument("--granularity", choices=["month", "quarter"], default="quarter")
+
+    args = parser.parse_args()
+    if args.command == "indexes":
+        create_all_payload_indexes()
+    else:
+        partition_web_data(granularity=args.granularity)
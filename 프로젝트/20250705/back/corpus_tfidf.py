@@ -0,0 +1,117 @@
+# agents/corpus_tfidf.py
+"""
+코퍼스 단위 TF-IDF 캐시입니다.
+검색 결과 문서 집합의 지문(fingerprint)과 벡터라이저 설정을 키로, 학습된 어휘(피처 이름)·IDF와
+CSR 행렬을 artifact_store에 저장합니다. 같은 검색 결과로 다시 군집화하거나(k 변경 등) SNA/LDA/키워드 라벨링을
+할 때는 토큰화와 학습을 다시 하지 않고 이 결과를 그대로 씁니다. 다른 세션이 같은 검색 결과를 분석해도 공유됩니다.
+"""
+
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from .artifact_store import ARTIFACT_DIR, save_sparse_matrix, save_array, artifact_exists
+
+TFIDF_PARAMS = {"max_features": 2000, "min_df": 0.01}
+TFIDF_INDEX_DIR = os.path.join(ARTIFACT_DIR, "tfidf_index")
+_MEMORY_CACHE_SIZE = 32
+
+# Comprehensive Korean Stopwords List for Web Content
+NOUN_STOPWORDS = [
+    # 1. 한 글자 명사 및 의존 명사
+    '것', '수', '일', '점', '때', '곳', '분', '데', '중', '안', '앞', '뒤', '속', '위', '아래', '뿐', '만', '쪽', '편', '겸', '김', '낯', '이', '그', '저',
+    # 2. 일반/추상 명사
+    '문제', '경우', '생각', '이유', '부분', '사실', '내용', '상황', '사람', '정도', '가지', '결과', '과정', '방법', '사용', '기능', '제품', '정보', '느낌', '마음', '기분', '순간', '처음', '마지막', '시작', '하루', '오늘', '어제', '내일', '지금', '요즘', '최근', '이전', '이후', '현재', '미래', '세상', '시대', '사회',
+    # 3. 대명사 (명사로 분류될 수 있는)
+    '저', '나', '내', '제', '우리', '저희', '너', '당신', '그', '그녀', '그들', '누구', '무엇', '여기', '저기', '거기', '어디',
+    # 4. 시간/장소/수량 관련 명사
+    '하나', '둘', '한번', '두번', '이번', '다음', '일단', '먼저', '약간', '조금', '계속', '요새', '근래',
+    # 5. 사용자 피드백 기반 추가 (웹 환경)
+    '진짜', '완전', '정말', '최고', '그냥', '바로'
+]
+
+
+_memory_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def corpus_fingerprint(documents: list) -> str:
+    """문서 집합의 지문. 문서 내용과 순서가 같으면 같은 값입니다."""
+    h = hashlib.sha1()
+    for doc in documents:
+        h.update(doc.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _cache_key(fingerprint: str) -> str:
+    config = json.dumps({"params": TFIDF_PARAMS, "stop_words": NOUN_STOPWORDS}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(f"{fingerprint}:{config}".encode("utf-8")).hexdigest()
+
+
+def _index_path(key: str) -> str:
+    return os.path.join(TFIDF_INDEX_DIR, f"{key}.json")
+
+
+def _remember(key: str, entry: dict):
+    with _lock:
+        _memory_cache[key] = entry
+        _memory_cache.move_to_end(key)
+        while len(_memory_cache) > _MEMORY_CACHE_SIZE:
+            _memory_cache.popitem(last=False)
+
+
+def _lookup(key: str) -> dict | None:
+    with _lock:
+        entry = _memory_cache.get(key)
+    if entry is None:
+        try:
+            with open(_index_path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+    # 아티팩트 파일이 정리(삭제)된 경우에는 다시 계산합니다.
+    if not artifact_exists(entry["tfidf_matrix_ref"]):
+        return None
+    _remember(key, entry)
+    return entry
+
+
+def get_corpus_tfidf(documents: list) -> dict | None:
+    """
+    문서 집합의 TF-IDF 결과를 반환합니다. 캐시에 없으면 한 번 학습해 저장합니다.
+    Returns:
+        {"fingerprint", "tfidf_matrix_ref", "feature_names", "idf_ref", "cached"}
+        유효한 단어가 하나도 없으면 None.
+    """
+    fingerprint = corpus_fingerprint(documents)
+    key = _cache_key(fingerprint)
+    entry = _lookup(key)
+    if entry is not None:
+        print(f"⚡ Reusing corpus TF-IDF ({entry['tfidf_matrix_ref']['shape']})")
+        return {**entry, "cached": True}
+
+    vectorizer = TfidfVectorizer(stop_words=NOUN_STOPWORDS, **TFIDF_PARAMS)
+    X = vectorizer.fit_transform(documents)
+    if X.shape[1] == 0:
+        return None
+
+    entry = {
+        "fingerprint": fingerprint,
+        "tfidf_matrix_ref": save_sparse_matrix(X),
+        "feature_names": vectorizer.get_feature_names_out().tolist(),
+        "idf_ref": save_array(np.asarray(vectorizer.idf_)),
+    }
+    os.makedirs(TFIDF_INDEX_DIR, exist_ok=True)
+    tmp_path = f"{_index_path(key)}.tmp{os.getpid()}.{threading.get_ident()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(entry, f, ensure_ascii=False)
+    os.replace(tmp_path, _index_path(key))
+    _remember(key, entry)
+    print(f"💾 Corpus TF-IDF cached: {X.shape[0]} docs x {X.shape[1]} terms")
+    return {**entry, "cached": False}
@@ -0,0 +1,357 @@
+# agents/crawler.py
+"""
+네이버 블로그 비동기 크롤러입니다.
+Selenium으로 URL마다 time.sleep(3)을 두고 순차 수집하던 노트북 크롤러를 대체하며,
+수집한 글은 CSV를 거치지 않고 바로 ingestion 큐로 흘려보내 web_data 컬렉션에 적재합니다.
+
+- 전체 동시 요청 수(concurrency)와 호스트별 최소 요청 간격(per_host_delay)을 설정할 수 있습니다.
+- 429/5xx/네트워크 오류는 지수 백오프로 재시도합니다.
+- 본문은 우선 mainFrame iframe HTML을 가볍게 파싱하고,
+  정적 HTML에서 본문을 찾지 못할 때만 헤드리스 브라우저 풀(playwright)을 사용합니다.
+- 명사 추출(Okt)과 임베딩은 스레드에서 실행해 크롤링 이벤트 루프를 막지 않습니다.
+"""
+
+import re
+import uuid
+import time
+import random
+import asyncio
+from datetime import datetime
+from urllib.parse import urljoin, urlparse
+
+import aiohttp
+from bs4 import BeautifulSoup
+
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/98.0.4758.102"}
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# 블로그 본문 선택자 (스마트에디터 ONE → 구버전 에디터 순)
+CONTENT_SELECTORS = ["div.se-main-container", "div#postViewArea", "div.se_component_wrap"]
+TITLE_SELECTORS = ["div.se-title-text", "h3.se_textarea", "span.pcol1"]
+DATE_SELECTORS = ["span.se_publishDate", "p.date", "span.date"]
+
+
+class CrawlError(Exception):
+    """재시도 후에도 페이지를 가져오지 못한 경우 발생합니다."""
+
+
+def clean_text(text: str) -> str:
+    """노트북 크롤러와 동일하게 제로폭 공백/줄바꿈을 정리합니다."""
+    text = text.replace("\u200b", "")
+    text = re.sub(r"function _flash_removeCallback\(\) \{\}", "", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _select_text(soup, selectors) -> str:
+    for selector in selectors:
+        element = soup.select_one(selector)
+        if element:
+            text = clean_text(element.get_text(" "))
+            if text:
+                return text
+    return ""
+
+
+def parse_blog_post(html: str) -> dict | None:
+    """블로그 본문(iframe 내부) HTML에서 제목/날짜/본문을 추출합니다. 본문이 없으면 None."""
+    soup = BeautifulSoup(html, "html.parser")
+    content = _select_text(soup, CONTENT_SELECTORS)
+    if not content:
+        return None
+    return {
+        "title": _select_text(soup, TITLE_SELECTORS),
+        "date": _select_text(soup, DATE_SELECTORS),
+        "content": content,
+    }
+
+
+def find_main_frame_url(html: str, base_url: str) -> str | None:
+    """블로그 외곽 페이지에서 실제 본문이 들어 있는 mainFrame iframe 주소를 찾습니다."""
+    soup = BeautifulSoup(html, "html.parser")
+    iframe = soup.select_one("iframe#mainFrame")
+    if iframe and iframe.get("src"):
+        return urljoin(base_url, iframe["src"])
+    return None
+
+
+def parse_post_date(date_text: str) -> int | None:
+    """'2024. 3. 5. 14:20' 형태의 날짜를 web_data의 date_timestamp(초)로 변환합니다."""
+    match = re.search(r"(\d{4})\.\s*(\d{1,2})\.\s*(\d{1,2})", date_text or "")
+    if not match:
+        return None
+    year, month, day = map(int, match.groups())
+    return int(datetime(year, month, day).timestamp())
+
+
+class BrowserPool:
+    """정적 파싱이 실패한 페이지만 렌더링하기 위한 헤드리스 브라우저 페이지 풀."""
+
+    def __init__(self, size: int = 2):
+        self.size = size
+        self._playwright = None
+        self._browser = None
+        self._pages = None
+        self._lock = asyncio.Lock()
+
+    async def _start(self):
+        from playwright.async_api import async_playwright
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=True)
+        self._pages = asyncio.Queue()
+        for _ in range(self.size):
+            await self._pages.put(await self._browser.new_page(extra_http_headers=DEFAULT_HEADERS))
+        print(f"🌀 Headless browser pool started ({self.size} pages)")
+
+    async def render(self, url: str, timeout_ms: int = 15000) -> str:
+        async with self._lock:
+            if self._browser is None:
+                await self._start()
+        page = await self._pages.get()
+        try:
+            await page.goto(url, timeout=timeout_ms, wait_until="networkidle")
+            frame = page.frame(name="mainFrame")
+            return await (frame or page.main_frame).content()
+        finally:
+            await self._pages.put(page)
+
+    async def close(self):
+        if self._browser is not None:
+            await self._browser.close()
+            await self._playwright.stop()
+            self._browser = None
+
+
+class NaverBlogCrawler:
+    """
+    블로그 URL 목록을 비동기로 수집해 out_queue에 게시글 dict를 넣습니다.
+    수집이 끝나면 out_queue에 None(종료 신호)을 넣습니다.
+    """
+
+    def __init__(self, concurrency: int = 8, per_host_delay: float = 1.0, max_retries: int = 3,
+                 backoff_base: float = 1.0, timeout: float = 15.0, browser_pool_size: int = 2,
+                 use_browser_fallback: bool = True):
+        self.concurrency = concurrency
+        self.per_host_delay = per_host_delay
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.browser_pool = BrowserPool(browser_pool_size) if use_browser_fallback else None
+        self._host_locks = {}
+        self._host_last_request = {}
+        self.stats = {"fetched": 0, "parsed": 0, "browser_fallback": 0, "failed": 0, "retries": 0}
+
+    async def _wait_for_host(self, url: str):
+        """같은 호스트에는 per_host_delay 간격 이상으로만 요청합니다."""
+        host = urlparse(url).netloc
+        lock = self._host_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            elapsed = time.monotonic() - self._host_last_request.get(host, 0.0)
+            if elapsed < self.per_host_delay:
+                await asyncio.sleep(self.per_host_delay - elapsed)
+            self._host_last_request[host] = time.monotonic()
+
+    async def fetch(self, session: aiohttp.ClientSession, url: str) -> str:
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_host(url)
+            try:
+                async with session.get(url) as response:
+                    if response.status in RETRYABLE_STATUS:
+                        raise aiohttp.ClientResponseError(response.request_info, response.history,
+                                                          status=response.status, message="retryable status")
+                    response.raise_for_status()
+                    self.stats["fetched"] += 1
+                    return await response.text()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status = getattr(e, "status", None)
+                if attempt == self.max_retries or (status is not None and status not in RETRYABLE_STATUS):
+                    raise CrawlError(f"{url}: {e}") from e
+                self.stats["retries"] += 1
+                delay = self.backoff_base * (2 ** attempt) + random.uniform(0, self.backoff_base)
+                print(f"⚠️ 재시도 {attempt + 1}/{self.max_retries} ({url}) - {delay:.1f}s 후")
+                await asyncio.sleep(delay)
+
+    async def crawl_post(self, session: aiohttp.ClientSession, url: str) -> dict | None:
+        outer_html = await self.fetch(session, url)
+        frame_url = find_main_frame_url(outer_html, url)
+        post = parse_blog_post(outer_html) if frame_url is None else None
+        if post is None and frame_url is not None:
+            post = parse_blog_post(await self.fetch(session, frame_url))
+
+        if post is None and self.browser_pool is not None:
+            self.stats["browser_fallback"] += 1
+            await self._wait_for_host(url)
+            post = parse_blog_post(await self.browser_pool.render(url))
+
+        if post is None:
+            return None
+        post["url"] = url
+        post["date_timestamp"] = parse_post_date(post["date"])
+        self.stats["parsed"] += 1
+        return post
+
+    async def run(self, urls: list, out_queue: asyncio.Queue):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.perf_counter()
+
+        async def _worker(session, url):
+            async with semaphore:
+                try:
+                    post = await self.crawl_post(session, url)
+                    if post:
+                        await out_queue.put(post)
+                    else:
+                        print(f"⚠️ 본문을 찾지 못했습니다: {url}")
+                except CrawlError as e:
+                    self.stats["failed"] += 1
+                    print(f"❌ 크롤링 실패: {e}")
+                except Exception as e:  # 브라우저 렌더링 오류 등으로 전체 수집이 멈추지 않도록
+                    self.stats["failed"] += 1
+                    print(f"❌ 크롤링 중 예상치 못한 오류 ({url}): {e}")
+
+        try:
+            async with aiohttp.ClientSession(headers=DEFAULT_HEADERS, timeout=self.timeout) as session:
+                await asyncio.gather(*(_worker(session, url) for url in urls))
+        except BaseException:
+            # 취소(적재 실패 등)나 오류로 끝날 때는 큐가 가득 차 있어도 기다리지 않습니다. (소비자가 이미 멈췄을 수 있음)
+            try:
+                out_queue.put_nowait(None)
+            except asyncio.QueueFull:
+                pass
+            raise
+        finally:
+            if self.browser_pool is not None:
+                await self.browser_pool.close()
+        await out_queue.put(None)
+
+        elapsed = time.perf_counter() - started
+        print(f"✅ Crawl finished in {elapsed:.1f}s: {self.stats}")
+        return self.stats
+
+
+# --- ingestion ---
+_okt = None
+
+
+def split_sentences(text: str) -> list:
+    sentences = re.split(r"(?<=[.!?])\s+|\n+", text)
+    return [s.strip() for s in sentences if len(s.strip()) >= 10]
+
+
+def _fallback_nouns(sentence: str) -> str:
+    return " ".join(re.findall(r"[가-힣]{2,}", sentence))
+
+
+def extract_nouns(sentence: str) -> str:
+    """
+    sentence_nouns 필드를 만듭니다. konlpy가 있으면 Okt 명사 추출을 쓰고,
+    없거나 실패하면(JVM 오류 등) 한글 토큰으로 대신합니다. Okt 초기화에 실패하면 다시 시도하지 않습니다.
+    """
+    global _okt
+    if _okt is False:
+        return _fallback_nouns(sentence)
+    try:
+        if _okt is None:
+            from konlpy.tag import Okt
+            _okt = Okt()
+    except Exception as e:
+        print(f"⚠️ Okt를 사용할 수 없어 한글 토큰으로 명사를 대신합니다: {e}")
+        _okt = False
+        return _fallback_nouns(sentence)
+    try:
+        return " ".join(_okt.nouns(sentence))
+    except Exception as e:
+        print(f"⚠️ 명사 추출 실패, 한글 토큰으로 대신합니다: {e}")
+        return _fallback_nouns(sentence)
+
+
+def _embed_and_upsert(sentences: list, collection_name: str):
+    """문장마다 명사를 추출하고 meaning/topic 두 벡터로 배치 임베딩하여 upsert 합니다. (스레드에서 실행)"""
+    from qdrant_client.http.models import PointStruct
+    from .utils import get_embedding_models
+    from .collection_setup import upsert_web_points
+
+    for s in sentences:
+        s["sentence_nouns"] = extract_nouns(s["sentence"])
+    meaning_model, topic_model = get_embedding_models()
+    texts = [s["sentence"] for s in sentences]
+    meaning_vecs = meaning_model.encode(["passage: " + t for t in texts], batch_size=32)
+    topic_vecs = topic_model.encode(texts, batch_size=32)
+
+    points = [
+        PointStruct(
+            id=str(uuid.uuid5(uuid.NAMESPACE_URL, f"{s['url']}#{s['sentence']}")),
+            vector={"meaning": meaning_vecs[i].tolist(), "topic": topic_vecs[i].tolist()},
+            payload=s,
+        )
+        for i, s in enumerate(sentences)
+    ]
+    # web_data에 적재하면 기간 파티션이 있는 경우 해당 파티션에도 함께 씁니다.
+    return upsert_web_points(points, collection_name=collection_name)
+
+
+async def ingest_posts(in_queue: asyncio.Queue, collection_name: str = "web_data", batch_size: int = 256,
+                       progress: dict | None = None):
+    """
+    크롤러가 넣은 게시글을 문장 단위로 나눠 batch_size 만큼 모이면 임베딩 후 적재합니다.
+    포인트 ID는 (URL, 문장)으로 결정되므로 같은 글을 다시 수집해도 중복 저장되지 않습니다.
+    progress: 중간에 실패해도 호출한 쪽이 알 수 있도록 {"ingested", "unsaved"} 문장 수를 기록할 dict.
+    취소되면(크롤러 실패 등) 그때까지 모은 문장을 적재하고 끝냅니다.
+    """
+    progress = progress if progress is not None else {}
+    progress.update(ingested=0, unsaved=0)
+    buffer, total = [], 0
+    try:
+        while True:
+            post = await in_queue.get()
+            if post is not None:
+                for sentence in split_sentences(post["content"]):
+                    buffer.append({
+                        "sentence": sentence,
+                        "title": post.get("title", ""),
+                        "url": post["url"],
+                        "date_timestamp": post.get("date_timestamp"),
+                        "source": "naver_blog",
+                    })
+            if buffer and (post is None or len(buffer) >= batch_size):
+                total += await asyncio.to_thread(_embed_and_upsert, buffer, collection_name)
+                progress["ingested"] = total
+                print(f"📦 {total}개 문장 적재 완료 ({collection_name})")
+                buffer = []
+            if post is None:
+                return total
+    except asyncio.CancelledError:
+        if buffer:
+            try:
+                total += await asyncio.to_thread(_embed_and_upsert, buffer, collection_name)
+                progress["ingested"] = total
+                print(f"📦 중단 전 남은 {len(buffer)}개 문장 적재 완료 ({collection_name})")
+                buffer = []
+            except Exception as e:
+                print(f"❌ 중단 전 남은 문장 적재 실패: {e}")
+        raise
+    finally:
+        progress["unsaved"] = len(buffer)
+
+
+async def crawl_and_ingest(urls: list, collection_name: str = "web_data", queue_size: int = 100, **crawler_options):
+    """
+    크롤링과 적재를 동시에 실행합니다. 큐 크기로 수집 속도가 적재 속도를 앞서지 않게 제한합니다.
+    한쪽이 실패하면 다른 쪽을 취소하고(TaskGroup), 적재하지 못한 문장/게시글 수와 함께 {"error": ...}를 반환합니다.
+    """
+    queue = asyncio.Queue(maxsize=queue_size)
+    crawler = NaverBlogCrawler(**crawler_options)
+    progress = {}
+    try:
+        async with asyncio.TaskGroup() as tg:
+            crawl_task = tg.create_task(crawler.run(urls, queue))
+            tg.create_task(ingest_posts(queue, collection_name=collection_name, progress=progress))
+    except ExceptionGroup as eg:
+        error = eg.exceptions[0]
+        unsaved_posts = 0
+        while not queue.empty():
+            unsaved_posts += queue.get_nowait() is not None
+        print(f"❌ 크롤링/적재 중단: {error} (미적재 문장 {progress.get('unsaved', 0)}개, 게시글 {unsaved_posts}개)")
+        return {**crawler.stats, "ingested_sentences": progress.get("ingested", 0),
+                "unsaved_sentences": progress.get("unsaved", 0), "unsaved_posts": unsaved_posts,
+                "error": f"크롤링/적재 중 오류가 발생했습니다: {error}"}
+    return {**crawl_task.result(), "ingested_sentences": progress["ingested"]}
@@ -6,43 +6,54 @@ import pandas as pd
 import networkx as nx
 
 
-from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.cluster import MiniBatchKMeans
-from sklearn.decomposition import LatentDirichletAllocation
 from sklearn.metrics.pairwise import cosine_similarity
-from .utils import get_sentiment_analyzer
 from .utils import get_openai_client
+from .sentiment import score_texts
 from scipy.sparse import csr_matrix # 희소 행렬 변환 시 필요
 from collections import defaultdict 
 from sklearn.decomposition import PCA, LatentDirichletAllocation
-from scipy.sparse import csr_matrix # 🚨 추가: csr_matrix 임포트
-import community as co
+from .artifact_store import save_sparse_matrix, load_sparse_matrix, save_array, load_array
+from .cluster_selection import select_num_clusters, AUTO_K_MIN, AUTO_K_MAX
+from .sna_graph import (
+    analyze_cooccurrence_network, network_micro_segments, network_graph_data,
+    DEFAULT_EDGE_THRESHOLD, DEFAULT_TOP_K, DEFAULT_EDGE_BUDGET,
+)
+from scipy.sparse.linalg import LinearOperator, svds
+from scipy.sparse import issparse
+from sklearn.cluster import AgglomerativeClustering
+from .data_retriever import fetch_stored_vectors
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+import os
+from .precompute import precompute_scheduler, PRECOMPUTE_ENABLED
+from .memo import memoize_cx_step
+from .corpus_tfidf import get_corpus_tfidf
+from .jobs import report_progress, in_job
+from .web_table import web_column, web_results_id
+
+# 벡터 클러스터링 모드: PCA 축소 차원, 진짜 Ward(병합 군집)를 허용하는 최대 문서 수 (O(n²) 메모리)
+VECTOR_PCA_DIM = 50
+WARD_MAX_DOCS = 10000
+
+# 전체 클러스터 LDA(run_topic_modeling_lda_all)에 쓰는 프로세스 수
+LDA_WORKERS = int(os.getenv("LDA_WORKERS", min(4, os.cpu_count() or 1)))
+
+# SNA 그래프 구성 방식(auto/threshold/top_k/budget)과 커뮤니티 탐지 방식(auto/louvain/leiden/label_propagation)
+SNA_GRAPH_MODE = os.getenv("SNA_GRAPH_MODE", "auto")
+SNA_TOP_K = int(os.getenv("SNA_TOP_K", DEFAULT_TOP_K))
+SNA_EDGE_BUDGET = int(os.getenv("SNA_EDGE_BUDGET", DEFAULT_EDGE_BUDGET))
+SNA_COMMUNITY_METHOD = os.getenv("SNA_COMMUNITY_METHOD", "auto")
+
+# 군집화 직후 SNA/LDA를 미리 계산해 둘 클러스터 수 (큰 순서), 미리 계산하는 LDA 토픽 수
+PRECOMPUTE_TOP_CLUSTERS = int(os.getenv("PRECOMPUTE_TOP_CLUSTERS", 3))
+PRECOMPUTE_NUM_TOPICS = 3
+
+# 클러스터 산점도에 그릴 최대 문서 수 (이보다 많으면 클러스터 비율대로 샘플링)
+VISUAL_MAX_POINTS = 5000
 
 
 # --- 내부 헬퍼(보조) 함수들 ---
-def _get_sentiment_score(text: str) -> float:
-    """텍스트의 감성 점수를 계산합니다. (동기 버전)"""
-    analyzer = get_sentiment_analyzer() # 동기 함수이므로 await 없음
-    if analyzer is None:
-        print("❌ 감성 분석 모델이 로드되지 않았습니다. 감성 점수 계산 불가.")
-        return 0.0 # 모델 로드 실패 시 중립 점수 반환
-    
-    try:
-        # Hugging Face pipeline 결과는 리스트 [{label: 'LABEL_0', score: 0.99}] 형태
-        # bert-nsmc 모델은 LABEL_0 (부정)과 LABEL_1 (긍정)을 반환합니다.
-        result = analyzer(text[:512])[0] # 모델 입력 길이 제한 (예: 512)
-        print(result)
-        # LABEL_1 (긍정)은 긍정 점수, LABEL_0 (부정)은 부정 점수로 매핑
-        if result['label'] == 'positive': # 긍정
-            return float(result['score'])
-        elif result['label'] == 'negative': # 부정
-            return -float(result['score'])
-        else: # 중립 또는 알 수 없는 경우 (없을 가능성 높음)
-            return 0.0
-    except Exception as e:
-        print(f"감성 점수 계산 중 오류 발생: {e}")
-        return 0.0 # 오류 발생 시 중립 점수 반환
-
 def _get_top_keywords(feature_names, topic_components, n_top_words):
     """
     LDA 토픽 모델의 컴포넌트(단어-토픽 분포)에서 각 토픽별 상위 N개 키워드를 추출합니다.
@@ -65,42 +76,274 @@ def _get_top_keywords(feature_names, topic_components, n_top_words):
     return top_keywords
 
 
-def run_ward_clustering(workspace, num_clusters=5):
+def _has_tfidf_matrix(temp_data: dict) -> bool:
+    return bool(temp_data.get("tfidf_matrix_ref") or temp_data.get("tfidf_matrix"))
+
+
+def _load_tfidf_matrix(temp_data: dict, docs_indices=None) -> csr_matrix:
+    """
+    _cx_temp_data에 저장된 참조로 TF-IDF CSR 행렬을 불러옵니다. (mmap, 복사 없음)
+    이전 버전 세션에 남아 있는 dense 리스트(tfidf_matrix)도 그대로 읽을 수 있습니다.
+    """
+    if temp_data.get("tfidf_matrix_ref"):
+        matrix = load_sparse_matrix(temp_data["tfidf_matrix_ref"])
+    else:
+        matrix = csr_matrix(np.array(temp_data["tfidf_matrix"]))
+    return matrix[docs_indices] if docs_indices is not None else matrix
+
+
+def _sample_for_visualization(labels: np.ndarray, max_points: int, seed: int = 42) -> np.ndarray:
+    """클러스터 비율을 유지하면서 시각화용 문서 인덱스를 max_points 개 이하로 샘플링합니다."""
+    rng = np.random.default_rng(seed)
+    sampled = []
+    for label in np.unique(labels):
+        members = np.where(labels == label)[0]
+        quota = max(1, int(round(len(members) * max_points / len(labels))))
+        sampled.append(rng.choice(members, size=min(quota, len(members)), replace=False))
+    return np.sort(np.concatenate(sampled))
+
+
+def _centered_pca_2d(X) -> np.ndarray:
+    """
+    희소 행렬을 dense로 바꾸지 않고 PCA 2D 좌표를 계산합니다.
+    평균을 뺀 행렬 (X - 1·mu)를 LinearOperator로만 표현해 상위 2개 특이벡터를 구합니다.
+    """
+    n_docs, n_features = X.shape
+    if not issparse(X):
+        # 임베딩 벡터처럼 이미 밀집된 저차원 행렬은 일반 PCA로 충분합니다.
+        return PCA(n_components=min(2, n_docs, n_features), random_state=42).fit_transform(X)
+    if min(n_docs, n_features) <= 2:
+        # 아주 작은 행렬은 dense로 계산해도 부담이 없습니다.
+        return PCA(n_components=min(2, n_docs, n_features), random_state=42).fit_transform(X.toarray())
+
+    mu = np.asarray(X.mean(axis=0)).ravel()
+    ones = np.ones(n_docs)
+    centered = LinearOperator(
+        shape=X.shape,
+        matvec=lambda v: X @ np.ravel(v) - ones * (mu @ np.ravel(v)),
+        rmatvec=lambda u: X.T @ np.ravel(u) - mu * np.ravel(u).sum(),
+        dtype=np.float64,
+    )
+    v0 = np.random.default_rng(42).random(min(n_docs, n_features))
+    U, S, _ = svds(centered, k=2, v0=v0)
+    order = np.argsort(S)[::-1]  # svds는 특이값을 오름차순으로 반환
+    return U[:, order] * S[order]
+
+
+def _project_2d(X, labels: np.ndarray, max_points: int = VISUAL_MAX_POINTS) -> dict:
+    """
+    클러스터 산점도용 2D 좌표를 만듭니다.
+    문서 수가 max_points를 넘으면 클러스터 비율대로 샘플링한 문서에 대해서만 투영하고,
+    sample_indices로 원래 문서 인덱스를 함께 반환합니다.
+    """
+    labels = np.asarray(labels)
+    sample_indices = None
+    if X.shape[0] > max_points:
+        sample_indices = _sample_for_visualization(labels, max_points)
+        X, labels = X[sample_indices], labels[sample_indices]
+        print(f"ℹ️ 문서 수가 많아 {len(sample_indices)}개 샘플로 산점도를 생성합니다.")
+
+    if X.shape[0] < 2:
+        # 데이터 포인트가 2개 미만이면 PCA를 적용할 수 없으므로 모든 점을 원점에
+        coords = np.zeros((X.shape[0], 2))
+    else:
+        coords = _centered_pca_2d(X)
+        if coords.shape[1] < 2:
+            coords = np.hstack([coords, np.zeros((coords.shape[0], 2 - coords.shape[1]))])
+
+    visual_data = {
+        "reduced_features_2d": coords.tolist(),
+        "cluster_labels": labels.tolist(),
+    }
+    if sample_indices is not None:
+        visual_data["sample_indices"] = sample_indices.tolist()
+    return visual_data
+
+
+def _vector_features(doc_ids: list, dims: int = VECTOR_PCA_DIM):
+    """
+    검색 시 저장된 meaning/topic 벡터를 한 번에 가져와 클러스터링용 특징 행렬을 만듭니다.
+    두 벡터를 각각 L2 정규화해 이어 붙인 뒤 PCA로 dims 차원까지 줄입니다.
+    벡터가 없는 문서가 하나라도 있으면 None을 반환합니다. (TF-IDF 모드로 대체)
+    """
+    ids = [str(doc_id) for doc_id in doc_ids]
+    stored = fetch_stored_vectors(ids)
+    if len(stored) < len(ids) or not ids:
+        print(f"⚠️ 저장된 벡터를 찾지 못한 문서가 있습니다 ({len(stored)}/{len(ids)}).")
+        return None
+
+    blocks = []
+    for name in ("meaning", "topic"):
+        mat = np.asarray([stored[i][name] for i in ids], dtype=np.float32)
+        norms = np.linalg.norm(mat, axis=1, keepdims=True)
+        blocks.append(mat / np.maximum(norms, 1e-12))
+    features = np.hstack(blocks)
+
+    n_components = min(dims, features.shape[0], features.shape[1])
+    if n_components >= 2:
+        features = PCA(n_components=n_components, random_state=42).fit_transform(features)
+    return features.astype(np.float32)
+
+
+def _candidate_key(num_clusters: int, feature_source: str, method: str) -> str:
+    """후보 라벨 캐시 키. TF-IDF + KMeans 는 기존처럼 k만 사용합니다."""
+    if feature_source == "tfidf":
+        return str(num_clusters)
+    return f"{feature_source}:{method}:{num_clusters}"
+
+
+# --- 메모이제이션 입력 지문 (memo.memoize_cx_step) ---
+# 결과에 영향을 주는 다른 모듈(그래프 구성, 감성 점수, TF-IDF, k 선택, 검색 결과 표)과 설정.
+# 이 모듈들의 소스나 설정값이 바뀌면 이전 캐시를 쓰지 않습니다.
+_MEMO_DEPENDS = (analyze_cooccurrence_network, score_texts, get_corpus_tfidf, select_num_clusters, web_column)
+
+
+def _memo_config() -> dict:
+    return {
+        "SNA_GRAPH_MODE": SNA_GRAPH_MODE, "SNA_TOP_K": SNA_TOP_K, "SNA_EDGE_BUDGET": SNA_EDGE_BUDGET,
+        "SNA_COMMUNITY_METHOD": SNA_COMMUNITY_METHOD, "VECTOR_PCA_DIM": VECTOR_PCA_DIM, "WARD_MAX_DOCS": WARD_MAX_DOCS,
+        "SENTIMENT_MODEL_ID": os.getenv("SENTIMENT_MODEL_ID"),
+    }
+
+
+def _web_corpus_fingerprint(artifacts: dict):
+    retrieved_data = artifacts.get("retrieved_data")
+    # 열 단위 표는 내용 기반 ID를 가지므로 행을 다시 읽지 않아도 됩니다.
+    table_id = web_results_id(retrieved_data)
+    if table_id:
+        return table_id
+    ids, nouns = web_column(retrieved_data, "id"), web_column(retrieved_data, "sentence_nouns")
+    return list(zip(ids, nouns)) or None
+
+
+def _clustering_fingerprint(artifacts: dict):
+    # clustering_id는 (문서 집합, 클러스터 라벨)이 같으면 같으므로 SNA/LDA 입력 지문으로 충분합니다.
+    return (artifacts.get("_cx_temp_data") or {}).get("clustering_id")
+
+
+def _opportunity_fingerprint(artifacts: dict):
+    lda_results = artifacts.get("cx_lda_results")
+    retrieved_data = artifacts.get("retrieved_data")
+    if not lda_results or not retrieved_data:
+        return None
+    by_cluster = artifacts.get("cx_lda_results_by_cluster") or {}
+    return {
+        "topics": lda_results.get("topics_summary_list"),
+        "doc_topic": lda_results.get("doc_topic_ref"),
+        "all_clusters": {cid: (r.get("clustering_id"), r.get("doc_topic_ref")) for cid, r in by_cluster.items()},
+        "docs": web_results_id(retrieved_data) or web_column(retrieved_data, "original_text"),
+    }
+
+
+def _reschedule_precompute(workspace: dict, previous: dict | None = None):
+    """
+    군집화 결과를 캐시에서 복원했을 때도 SNA/LDA 미리 계산을 예약합니다.
+    previous(복원 전 outputs)의 클러스터링이 다르면 그 세대의 미리 계산 작업은 취소합니다. (직접 실행 경로와 동일)
+    """
+    try:
+        temp_data = workspace["artifacts"]["_cx_temp_data"]
+        previous_generation = ((previous or {}).get("_cx_temp_data") or {}).get("clustering_id")
+        if previous_generation and previous_generation != temp_data.get("clustering_id"):
+            precompute_scheduler.cancel_generation(previous_generation)
+        _schedule_precompute(temp_data)
+    except Exception as e:
+        print(f"⚠️ Precompute scheduling failed: {e}")
+
+
+def _schedule_precompute(temp_data: dict, top_n: int = PRECOMPUTE_TOP_CLUSTERS):
+    """군집화 직후, 가장 큰 클러스터 top_n개의 SNA와 LDA를 백그라운드 작업으로 예약합니다."""
+    if not PRECOMPUTE_ENABLED or not temp_data.get("tfidf_matrix_ref"):
+        return
+    generation = temp_data["clustering_id"]
+    largest = sorted(temp_data["cluster_docs_map"].items(), key=lambda kv: len(kv[1]), reverse=True)[:top_n]
+    args = (temp_data["tfidf_matrix_ref"], temp_data["feature_names"])
+    for rank, (cluster_id, docs_indices) in enumerate(largest):
+        # 큰 클러스터부터, 같은 클러스터는 SNA → LDA 순서로 실행합니다.
+        precompute_scheduler.submit(generation, "sna", cluster_id, None,
+                                    _compute_sna_from_ref, (*args, docs_indices), priority=rank * 2)
+        if len(docs_indices) >= PRECOMPUTE_NUM_TOPICS:
+            precompute_scheduler.submit(generation, "lda", cluster_id, PRECOMPUTE_NUM_TOPICS,
+                                        _fit_cluster_lda_from_ref,
+                                        (*args, docs_indices, cluster_id, PRECOMPUTE_NUM_TOPICS), priority=rank * 2 + 1)
+    print(f"🗓️ Precompute: scheduled SNA/LDA for clusters {[c for c, _ in largest]}")
+
+
+@memoize_cx_step(
+    inputs=_web_corpus_fingerprint,
+    outputs=("_cx_temp_data", "cx_ward_clustering_results", "cx_lda_results_by_cluster", "analysis_results"),
+    on_hit=_reschedule_precompute,
+    depends=_MEMO_DEPENDS,
+    config=_memo_config,
+)
+def run_ward_clustering(workspace, num_clusters=5, auto_k=False, k_min=AUTO_K_MIN, k_max=AUTO_K_MAX,
+                        feature_source="tfidf", method="kmeans"):
     """
     고객의 목소리(VOC) 데이터를 워드 클러스터링하여 주요 주제 그룹을 발견하고,
     각 클러스터의 대표 키워드를 추출합니다.
+    auto_k=True 이면 k_min~k_max 범위를 병렬로 평가해 추천 k로 클러스터링합니다.
+    같은 데이터에서 이미 평가한 k로 다시 요청하면 저장된 라벨을 그대로 재사용합니다.
+    feature_source="vectors" 이면 검색 시 저장된 meaning/topic 임베딩(PCA 축소)으로 군집화하고,
+    method="ward" 이면 MiniBatchKMeans 대신 Ward 병합 군집을 사용합니다. TF-IDF는 키워드 추출에만 쓰입니다.
     """
-    print(f"[CX Analysis] Running Ward Clustering with {num_clusters} clusters (동기 모드)")
+    mode = f"auto-k {k_min}~{k_max}" if auto_k else f"{num_clusters} clusters"
+    print(f"[CX Analysis] Running Ward Clustering with {mode}, features={feature_source}, method={method} (동기 모드)")
 
     retrieved_data = workspace["artifacts"].get("retrieved_data")
     if not retrieved_data:
         return {"error": "데이터 클러스터링을 위한 검색된 데이터가 워크스페이스에 없습니다. 먼저 데이터 검색을 해주세요."}
 
-    documents = [d.get('sentence_nouns', '') for d in retrieved_data.get('web_results', []) if d.get('sentence_nouns')]
+    all_nouns = web_column(retrieved_data, "sentence_nouns")
+    doc_ids = [doc_id for doc_id, nouns in zip(web_column(retrieved_data, "id"), all_nouns) if nouns]
+    documents = [nouns for nouns in all_nouns if nouns]
     
     if not documents:
         return {"error": "클러스터링할 유효한 텍스트 문서가 없습니다. 검색 결과를 확인해주세요."}
 
-    # Comprehensive Korean Stopwords List for Web Content
-    noun_stopwords = [
-        # 1. 한 글자 명사 및 의존 명사
-        '것', '수', '일', '점', '때', '곳', '분', '데', '중', '안', '앞', '뒤', '속', '위', '아래', '뿐', '만', '쪽', '편', '겸', '김', '낯', '이', '그', '저',
-        # 2. 일반/추상 명사
-        '문제', '경우', '생각', '이유', '부분', '사실', '내용', '상황', '사람', '정도', '가지', '결과', '과정', '방법', '사용', '기능', '제품', '정보', '느낌', '마음', '기분', '순간', '처음', '마지막', '시작', '하루', '오늘', '어제', '내일', '지금', '요즘', '최근', '이전', '이후', '현재', '미래', '세상', '시대', '사회',
-        # 3. 대명사 (명사로 분류될 수 있는)
-        '저', '나', '내', '제', '우리', '저희', '너', '당신', '그', '그녀', '그들', '누구', '무엇', '여기', '저기', '거기', '어디',
-        # 4. 시간/장소/수량 관련 명사
-        '하나', '둘', '한번', '두번', '이번', '다음', '일단', '먼저', '약간', '조금', '계속', '요새', '근래',
-        # 5. 사용자 피드백 기반 추가 (웹 환경)
-        '진짜', '완전', '정말', '최고', '그냥', '바로'
-    ]
     try:
         # 2. 텍스트 벡터화 (TF-IDF)
-        vectorizer = TfidfVectorizer(max_features=2000, min_df=0.01, stop_words=noun_stopwords)
-        X = vectorizer.fit_transform(documents)
-
-        if X.shape[1] == 0: # 문서-단어 행렬에 유효한 피처(단어)가 없는 경우
+        # 코퍼스 단위 캐시: 같은 문서 집합이면 다시 토큰화/학습하지 않고 저장된 어휘와 CSR 행렬을 씁니다.
+        corpus = get_corpus_tfidf(documents)
+        if corpus is None: # 문서-단어 행렬에 유효한 피처(단어)가 없는 경우
             return {"error": "TF-IDF 벡터화 후 유효한 단어가 추출되지 않았습니다. 데이터를 확인하거나 TfidfVectorizer 설정을 조정하세요."}
+        fingerprint = corpus["fingerprint"]
+        tfidf_matrix_ref = corpus["tfidf_matrix_ref"]
+        X = load_sparse_matrix(tfidf_matrix_ref)
+        feature_names = np.array(corpus["feature_names"])
+        report_progress(0.2, "TF-IDF 벡터화 완료")
+
+        # 같은 문서 집합으로 이전에 평가한 후보 라벨/벡터 특징도 재사용합니다. (k만 바꾸면 KMeans만 다시 학습)
+        prev_temp = workspace["artifacts"].get("_cx_temp_data") or {}
+        if prev_temp.get("corpus_fingerprint") == fingerprint:
+            k_candidates = prev_temp.get("k_candidates", {})
+            k_selection = prev_temp.get("k_selection")
+            vector_features_ref = prev_temp.get("vector_features_ref")
+        else:
+            k_candidates, k_selection, vector_features_ref = {}, None, None
+
+        # 2-0. (선택) 저장된 임베딩 벡터로 군집화할 특징 행렬 준비
+        cluster_input, cluster_input_ref = X, tfidf_matrix_ref
+        if feature_source == "vectors":
+            if vector_features_ref is None:
+                features = _vector_features(doc_ids)
+                vector_features_ref = save_array(features) if features is not None else None
+            if vector_features_ref is not None:
+                cluster_input, cluster_input_ref = np.asarray(load_array(vector_features_ref)), vector_features_ref
+            else:
+                print("⚠️ 벡터 모드를 사용할 수 없어 TF-IDF로 군집화합니다.")
+                feature_source = "tfidf"
+        if method == "ward" and feature_source != "vectors":
+            print("⚠️ Ward 병합 군집은 벡터 모드에서만 지원되어 MiniBatchKMeans를 사용합니다.")
+            method = "kmeans"
+
+        # 2-1. (선택) 클러스터 개수 자동 선택: 후보 k를 병렬 평가하고 모든 후보 라벨을 보관합니다.
+        if auto_k:
+            selection = select_num_clusters(cluster_input_ref, k_min=k_min, k_max=k_max)
+            num_clusters = selection["recommended_k"]
+            k_candidates = {
+                **k_candidates,
+                **{_candidate_key(int(k), feature_source, "kmeans"): ref for k, ref in selection["labels_refs"].items()},
+            }
+            k_selection = selection["candidates"]
 
         # 3. K-Means 클러스터링 수행
         if num_clusters > X.shape[0]:
@@ -110,17 +353,28 @@ def run_ward_clustering(workspace, num_clusters=5):
         if num_clusters < 2:
             return {"error": "클러스터 개수는 최소 2개 이상이어야 합니다."}
 
-        kmeans = MiniBatchKMeans(n_clusters=num_clusters, random_state=42, n_init=10)
-        kmeans.fit(X)
-        cluster_labels = kmeans.labels_.tolist() # 🚨 클러스터 라벨 리스트로 변환
+        if method == "ward" and X.shape[0] > WARD_MAX_DOCS:
+            print(f"⚠️ 문서 수가 {WARD_MAX_DOCS}개를 넘어 Ward 대신 MiniBatchKMeans를 사용합니다.")
+            method = "kmeans"
 
-        # 4. 각 클러스터의 대표 키워드 추출
-        feature_names = np.array(vectorizer.get_feature_names_out())
-        cluster_centers = kmeans.cluster_centers_
+        candidate_key = _candidate_key(num_clusters, feature_source, method)
+        if candidate_key in k_candidates:
+            labels = np.asarray(load_array(k_candidates[candidate_key]))
+            print(f"⚡ Reusing cached labels for {candidate_key}")
+        else:
+            if method == "ward":
+                labels = AgglomerativeClustering(n_clusters=num_clusters, linkage="ward").fit_predict(cluster_input)
+            else:
+                kmeans = MiniBatchKMeans(n_clusters=num_clusters, random_state=42, n_init=10)
+                labels = kmeans.fit_predict(cluster_input)
+            k_candidates = {**k_candidates, candidate_key: save_array(labels.astype(np.int32))}
+        cluster_labels = labels.tolist() # 🚨 클러스터 라벨 리스트로 변환
+        report_progress(0.6, f"{num_clusters}개 클러스터로 군집화 완료")
 
+        # 4. 각 클러스터의 대표 키워드 추출
         cluster_summaries = {}
         for i in range(num_clusters):
-            cluster_docs_indices = np.where(kmeans.labels_ == i)[0]
+            cluster_docs_indices = np.where(labels == i)[0]
             num_docs_in_cluster = len(cluster_docs_indices)
 
             if num_docs_in_cluster == 0:
@@ -136,18 +390,11 @@ def run_ward_clustering(workspace, num_clusters=5):
                 "description": f"{i}번 그룹 ({num_docs_in_cluster}개 문서)은 주로 '{', '.join(top_keywords[:5])}...' 등의 키워드를 포함합니다."
             }
         
-        # 🚨 추가: 시각화를 위한 2D 데이터 축소 (PCA)
-        # 데이터 포인트가 2개 미만일 경우 PCA 오류 방지
-        if X.shape[0] < 2:
-            # 데이터 포인트가 2개 미만이면 PCA를 적용할 수 없으므로, 더미 데이터 생성 또는 빈 리스트 반환
-            reduced_features_2d = np.array([[0.0, 0.0]] * X.shape[0]).tolist() # 모든 점을 원점에
-        else:
-            pca = PCA(n_components=2, random_state=42)
-            # X (TF-IDF 행렬)는 scipy.sparse.csr_matrix 타입이므로, toarray()로 변환하여 PCA에 전달
-            reduced_features_2d = pca.fit_transform(X.toarray()).tolist() # 🚨 numpy 배열을 리스트로 변환
+        # 🚨 추가: 시각화를 위한 2D 데이터 축소 (희소 행렬 그대로 PCA, 대용량이면 샘플링)
+        visual_data = _project_2d(cluster_input, labels)
+        report_progress(0.9, "시각화 데이터 생성 완료")
 
         # 5. 워크스페이스에 임시 데이터 저장 (LDA, SNA를 위해)
-        tfidf_matrix_list = X.toarray().tolist()
         feature_names_list = feature_names.tolist()
 
         cluster_docs_map = defaultdict(list)
@@ -156,20 +403,35 @@ def run_ward_clustering(workspace, num_clusters=5):
 
         workspace["artifacts"]["_cx_temp_data"] = {
             "cluster_labels": cluster_labels,
-            "tfidf_matrix": tfidf_matrix_list,
+            "tfidf_matrix_ref": tfidf_matrix_ref,
             "feature_names": feature_names_list,
             "documents": documents,
             "cluster_docs_map": dict(cluster_docs_map),
+            "corpus_fingerprint": fingerprint,
+            "k_candidates": k_candidates,
+            "k_selection": k_selection,
+            "vector_features_ref": vector_features_ref,
+            # 클러스터링 결과가 바뀌면 달라지는 ID. 미리 계산된 LDA/SNA 결과가 현재 클러스터링 것인지 확인하는 데 씁니다.
+            "clustering_id": f"{fingerprint[:12]}-{k_candidates[candidate_key]['artifact_id'][:12]}",
         }
+        # 이전 클러스터링 기준으로 계산된 클러스터별 LDA 결과는 더 이상 유효하지 않습니다.
+        workspace["artifacts"]["cx_lda_results_by_cluster"] = {}
+        if prev_temp.get("clustering_id") != workspace["artifacts"]["_cx_temp_data"]["clustering_id"]:
+            precompute_scheduler.cancel_generation(prev_temp.get("clustering_id"))
+        try:
+            _schedule_precompute(workspace["artifacts"]["_cx_temp_data"])
+        except Exception as e:
+            # 미리 계산은 부가 기능이므로 실패해도 군집화 결과는 그대로 반환합니다.
+            print(f"⚠️ Precompute scheduling failed: {e}")
 
         workspace["artifacts"]["cx_ward_clustering_results"] = {
             "num_clusters": num_clusters,
             "cluster_labels": cluster_labels,
             "cluster_summaries": cluster_summaries,
-            "visual_data": {
-                "reduced_features_2d": reduced_features_2d,
-                "cluster_labels": cluster_labels,
-            }
+            "visual_data": visual_data,
+            "k_selection": k_selection,
+            "feature_source": feature_source,
+            "method": method,
         }
         workspace["artifacts"]["analysis_results"] = (
             "Ward clustering analysis complete. 각 클러스터의 대표 키워드를 확인해보세요. "
@@ -183,10 +445,10 @@ def run_ward_clustering(workspace, num_clusters=5):
                 "num_clusters": num_clusters,
                 "cluster_labels": cluster_labels, # 🚨 클러스터 라벨 포함
                 "cluster_summaries": cluster_summaries,
-                "visual_data": { # 🚨 추가: 시각화 데이터 포함
-                    "reduced_features_2d": reduced_features_2d,
-                    "cluster_labels": cluster_labels,
-                }
+                "visual_data": visual_data, # 🚨 추가: 시각화 데이터 포함
+                "k_selection": k_selection, # 자동 k 선택 시 후보별 점수 (없으면 None)
+                "feature_source": feature_source,
+                "method": method,
             },
             "analysis_results": "Ward clustering analysis complete. 각 클러스터의 대표 키워드를 확인해보세요. 특정 클러스터에 대해 더 깊은 분석(의미 연결망 분석)을 원하시면 클러스터 ID와 함께 요청해주세요."
         }
@@ -199,115 +461,57 @@ def run_ward_clustering(workspace, num_clusters=5):
 
 
 
+def _compute_sna(cluster_matrix, feature_names: list) -> tuple[list, dict]:
+    """
+    클러스터 문서-단어 행렬(CSR)로 동시 출현 네트워크를 만들고 커뮤니티(micro segment)와 그래프 데이터를 계산합니다.
+    워크스페이스를 건드리지 않는 순수 계산 함수이므로 백그라운드 워커에서도 실행할 수 있습니다.
+    Returns:
+        (micro_segments, graph_data)
+    """
+    # 🚨 엣지는 임계값(기본 0.1)으로 거르되, 큰 클러스터는 엣지 예산에 맞게 임계값을 올리거나 노드별 상위 k개만 남깁니다.
+    # 커뮤니티와 중심성은 networkx 서브그래프 없이 희소 인접 행렬에서 한 번에 계산합니다. (sna_graph 참고)
+    network = analyze_cooccurrence_network(
+        cluster_matrix, feature_names,
+        mode=SNA_GRAPH_MODE, threshold=DEFAULT_EDGE_THRESHOLD,
+        top_k=SNA_TOP_K, edge_budget=SNA_EDGE_BUDGET, community_method=SNA_COMMUNITY_METHOD,
+    )
+    print(f"🕸️ SNA graph: {len(network['names'])} nodes, {network['adjacency'].nnz // 2} edges, "
+          f"communities by {network['community_method']}")
+    return network_micro_segments(network), network_graph_data(network)
+
+
+def _compute_sna_from_ref(tfidf_matrix_ref: dict, feature_names: list, docs_indices: list) -> dict:
+    """워커 프로세스용: 공유 TF-IDF 행렬(mmap)에서 클러스터 행만 잘라 SNA를 계산합니다."""
+    cluster_matrix = load_sparse_matrix(tfidf_matrix_ref)[docs_indices]
+    micro_segments, graph_data = _compute_sna(cluster_matrix, feature_names)
+    return {"micro_segments": micro_segments, "graph_data": graph_data}
+
+
+@memoize_cx_step(inputs=_clustering_fingerprint, outputs=("cx_sna_results", "analysis_results"),
+                 depends=_MEMO_DEPENDS, config=_memo_config)
 def run_semantic_network_analysis(workspace: dict, cluster_id: int):
     """PDF 2단계: 특정 클러스터에 대해 SNA를 수행하여 핵심 노드를 찾습니다."""
     print(f"✅ [CX Agent] Step 2: Running SNA for Cluster ID: {cluster_id} (동기 모드)")
     temp_data = workspace.get("artifacts", {}).get("_cx_temp_data", {})
     
     if not temp_data.get("cluster_labels"): return {"error": "군집화를 먼저 수행해야 합니다."}
-    if not temp_data.get("tfidf_matrix"): return {"error": "TF-IDF 행렬이 워크스페이스에 없습니다."}
+    if not _has_tfidf_matrix(temp_data): return {"error": "TF-IDF 행렬이 워크스페이스에 없습니다."}
     if not temp_data.get("feature_names"): return {"error": "피처 이름이 워크스페이스에 없습니다."}
 
     try:
         docs_indices = [i for i, label in enumerate(temp_data["cluster_labels"]) if label == cluster_id]
         if not docs_indices: return {"error": f"ID가 {cluster_id}인 클러스터에 문서가 없습니다."}
         
-        cluster_matrix = csr_matrix(np.array(temp_data["tfidf_matrix"])[docs_indices])
-
-        co_occurrence_matrix = (cluster_matrix.T * cluster_matrix)
-        co_occurrence_matrix.setdiag(0)
-
-        G = nx.Graph()
         feature_names = temp_data["feature_names"]
-        
-        # 노드 추가: 노드 ID를 실제 키워드 이름으로 직접 할당
-        for i, name in enumerate(feature_names):
-            G.add_node(name, id=name, name=name) # 🚨 노드 ID를 키워드 이름으로 명시
-
-        # 🚨 엣지 추가: 동시 출현 빈도 임계값 조정 (매우 중요!)
-        # 0에 가까울수록 더 많은 엣지 생성. 데이터에 따라 적절한 값 찾기.
-        threshold = 0.1 # 🚨 초기값 2에서 1.0으로 조정 (더 많은 엣지 생성 시도)
-                        # 만약 여전히 그래프가 안 나오면 0.5, 0.1 등으로 더 낮춰보세요.
-                        # 아주 드문 경우 0으로 설정하여 모든 연결을 시도할 수도 있습니다.
-        
-        # TF-IDF 기반 동시 출현 행렬의 값을 직접 사용하여 엣지를 추가
-        # feature_names에 대한 인덱스를 기반으로 엣지를 추가하고, 실제 키워드 이름은 노드 자체의 'id'와 'name' 속성을 통해 프론트엔드로 전달됨
-        for i in range(co_occurrence_matrix.shape[0]):
-            for j in range(i + 1, co_occurrence_matrix.shape[1]):
-                weight = co_occurrence_matrix[i, j]
-                if weight > threshold:
-                    # 🚨 엣지 소스/타겟을 인덱스 대신 실제 키워드 이름으로 변경 (네트워크X 엣지는 노드 ID로 연결)
-                    G.add_edge(feature_names[i], feature_names[j], weight=float(weight)) # 🚨 키워드 이름으로 엣지 연결
-
-        # 4. 핵심 노드 (핵심 키워드) 추출 및 Micro-segments, Graph Data 구성
-        micro_segments = []
-        graph_data = {} # 🚨 graph_data 변수를 여기서 초기화
-
-        # 커뮤니티 감지 및 그래프 데이터 구성 (python-louvain 활용)
-        try:
-            # import community as co # 이미 상단에 임포트됨
-            partitions = co.best_partition(G)
-            
-            for community_id in set(partitions.values()):
-                community_nodes_names = [node_name for node_name, part_id in partitions.items() if part_id == community_id]
-                
-                if community_nodes_names:
-                    # 서브그래프는 실제 노드 이름으로 구성
-                    subgraph = G.subgraph(community_nodes_names)
-                    if subgraph.nodes():
-                        # 해당 커뮤니티에서 중심성이 가장 높은 노드를 핵심 키워드로
-                        sub_centrality = nx.degree_centrality(subgraph)
-                        core_keyword_name = max(sub_centrality, key=sub_centrality.get)
-                    else:
-                        core_keyword_name = community_nodes_names[0]
-
-                    micro_segments.append({
-                        "community_id": community_id,
-                        "core_keyword": core_keyword_name,
-                        "keywords": community_nodes_names # 커뮤니티에 속하는 모든 키워드 (이름)
-                    })
-            micro_segments = sorted(micro_segments, key=lambda x: (x['community_id'], x['core_keyword']))
-
-            # 🚨 최종 graph_data 생성 및 노드에 커뮤니티 정보 추가
-            graph_data_temp = nx.node_link_data(G)
-            for node_data in graph_data_temp['nodes']:
-                node_data['community'] = partitions.get(node_data['id'], None)
-            centrality = nx.degree_centrality(G)    
-            for node_data in graph_data_temp['nodes']:
-                node_data['centrality'] = float(centrality.get(node_data['id'], 0.0))
-            graph_data = graph_data_temp # 최종 graph_data에 할당
-
-        except ImportError:
-            print("Warning: 'python-louvain' library not found. Community detection skipped. Micro-segments based on top keywords.")
-            # python-louvain이 없으면 중심성 높은 상위 N개 키워드로 구성
-            centrality = nx.degree_centrality(G)
-            sorted_nodes = sorted(centrality.items(), key=lambda x: x[1], reverse=True)
-            for node_name, score in sorted_nodes[:10]: # 노드 이름과 점수
-                micro_segments.append({
-                    "community_id": "N/A",
-                    "core_keyword": node_name, # 노드 이름 직접 사용
-                    "keywords": [node_name],
-                    "centrality_score": round(score, 4)
-                })
-            graph_data = nx.node_link_data(G) # G의 노드 ID는 이미 키워드 이름
-
-        except Exception as e:
-            print(f"Community detection or graph processing failed: {e}. Falling back to simple segments and basic graph data.")
-            import traceback; traceback.print_exc() # 오류 스택 트레이스 출력
-            micro_segments = [] # 오류 시 빈 리스트
-            
-            centrality = nx.degree_centrality(G)
-            sorted_nodes = sorted(centrality.items(), key=lambda x: x[1], reverse=True)
-            for node_name, score in sorted_nodes[:min(len(sorted_nodes), 10)]: # 최대 10개
-                micro_segments.append({
-                    "community_id": "Error",
-                    "core_keyword": node_name,
-                    "keywords": [node_name],
-                    "centrality_score": round(score, 4)
-                })
-            graph_data = nx.node_link_data(G)
-
 
+        # 군집화 직후 백그라운드에서 미리 계산해 둔 결과가 있으면 그대로 사용합니다.
+        precomputed = precompute_scheduler.get(temp_data.get("clustering_id"), "sna", cluster_id)
+        if precomputed:
+            print(f"⚡ Using precomputed SNA results for cluster {cluster_id}")
+            micro_segments, graph_data = precomputed["micro_segments"], precomputed["graph_data"]
+        else:
+            cluster_matrix = _load_tfidf_matrix(temp_data, docs_indices)
+            micro_segments, graph_data = _compute_sna(cluster_matrix, feature_names)
 
         # 수정: 워크스페이스에 결과 저장
         workspace["artifacts"]["cx_sna_results"] = {
@@ -339,9 +543,126 @@ def run_semantic_network_analysis(workspace: dict, cluster_id: int):
         return {"error": f"SNA 분석 중 오류가 발생했습니다: {e}"}
 
 
+def _fit_cluster_lda(doc_term_matrix, feature_names: list, docs_indices: list, cluster_id: int,
+                     num_topics: int, learning_method: str = "batch") -> dict:
+    """
+    클러스터 하나의 문서-단어 행렬(CSR)로 LDA를 학습하고 cx_lda_results 형식의 결과를 만듭니다.
+    워크스페이스를 건드리지 않는 순수 계산 함수이므로 프로세스 풀에서도 실행할 수 있습니다.
+    """
+    # 🚨 추가: LDA 모델 학습 전 데이터 유효성 검사
+    if doc_term_matrix.shape[0] < num_topics:
+        raise ValueError(f"문서 개수({doc_term_matrix.shape[0]}개)가 토픽 개수({num_topics})보다 적습니다. 더 작은 토픽 개수로 다시 시도해주세요.")
+    if doc_term_matrix.shape[1] == 0: # 유효한 단어가 없으면
+        raise ValueError("토픽 모델링을 수행할 단어가 부족합니다. CountVectorizer 설정을 조정하세요.")
+
+    # 4. LDA 모델 학습
+    lda = LatentDirichletAllocation(n_components=num_topics, learning_method=learning_method, random_state=42)
+    lda.fit(doc_term_matrix) # 문서-단어 행렬로 LDA 학습
+
+    # 각 문서의 토픽 분포를 계산 (calculate_opportunity_scores에서 사용될 데이터)
+    doc_topic_dist_for_cluster = lda.transform(doc_term_matrix) # 👈 클러스터에 해당하는 문서들의 토픽 분포
+    assignments = np.argmax(doc_topic_dist_for_cluster, axis=1)
+    # 5. 토픽별 상위 키워드 추출 및 요약 정보 구성 (기존 로직)
+    topics_list = []
+    top_keywords_per_topic = _get_top_keywords(feature_names, lda.components_, 7) # 상위 7개 키워드
+
+    # 🚨 LDA 그래프 시각화 데이터 생성 시작 🚨
+    topic_graph_data_points = [] # 각 토픽의 2D 위치 (그래프 점)
+    topic_keywords_with_weights = [] # 각 토픽의 키워드 및 가중치 (툴팁용)
+
+    # LDA 모델의 components_는 (num_topics, num_features) 형태의 토픽-단어 분포 행렬
+    topic_embeddings = lda.components_
+
+    # PCA를 사용하여 토픽 임베딩을 2D로 축소
+    # 토픽 개수가 2개 미만이거나, 피처 개수가 2개 미만이면 PCA 적용 불가
+    if topic_embeddings.shape[0] >= 2 and topic_embeddings.shape[1] >= 2:
+        pca = PCA(n_components=2, random_state=42)
+        # 각 토픽의 2D 위치
+        topic_positions_2d = pca.fit_transform(topic_embeddings).tolist()
+    else: # PCA 적용 불가 시 임시 위치 할당
+        topic_positions_2d = [[np.random.rand() * 10, np.random.rand() * 10] for _ in range(num_topics)]
+        print("Warning: Not enough data for meaningful PCA for LDA topics. Using random positions for graph.")
+
+
+    for i, keywords in enumerate(top_keywords_per_topic):
+        topic_docs = [
+            docs_indices[j]
+            for j, assigned in enumerate(assignments)
+            if assigned == i
+        ]
+        # 토픽별 상위 키워드의 가중치도 함께 추출 (확률로 정규화)
+        current_topic_comp = lda.components_[i]
+        keywords_and_weights = {
+            kw: float(current_topic_comp[feature_names.index(kw)]) / current_topic_comp.sum()
+            for kw in keywords if kw in feature_names
+        }
+        topic_keywords_with_weights.append({
+            "topic_id": i,
+            "keywords": keywords_and_weights
+        })
+
+        # LDA 그래프에 표시될 데이터 포인트
+        topic_graph_data_points.append({
+            "topic_id": i,
+            "x": topic_positions_2d[i][0],
+            "y": topic_positions_2d[i][1],
+            "keywords_data": keywords_and_weights # 해당 토픽의 키워드 데이터 (툴팁용)
+        })
+
+        # 기존 topics_list (요약 메시지용)
+        topics_list.append({
+            "topic_id": f"{cluster_id}-{i}", # 클러스터 ID와 토픽 인덱스를 조합
+            "action_keywords": keywords, # 상위 키워드
+            "description": f"주요 키워드: {', '.join(keywords[:5])}...", # 간단한 설명 추가
+            "document_indices": topic_docs
+        })
+
+    # 🚨 LDA 그래프 시각화 데이터 최종 구성
+    lda_graph_data = {
+        "topics": topic_graph_data_points,
+        "num_topics": num_topics
+
+    }
+    return {
+        "cluster_id": cluster_id,
+        "num_topics": num_topics,
+        "topics_summary_list": topics_list,
+        "graph_data": lda_graph_data,
+        # 기회 점수 계산(확률 가중)에 쓰는 문서-토픽 분포. 행 순서는 docs_indices 와 같습니다.
+        "doc_topic_ref": save_array(doc_topic_dist_for_cluster.astype(np.float32)),
+        "doc_indices_ref": save_array(np.asarray(docs_indices, dtype=np.int64)),
+    }
+
+
+def _fit_cluster_lda_from_ref(tfidf_matrix_ref: dict, feature_names: list, docs_indices: list,
+                              cluster_id: int, num_topics: int) -> dict:
+    """프로세스 풀 워커: 공유 TF-IDF 행렬(mmap)에서 클러스터 행만 CSR로 잘라 온라인 LDA를 학습합니다."""
+    doc_term_matrix = load_sparse_matrix(tfidf_matrix_ref)[docs_indices]
+    return _fit_cluster_lda(doc_term_matrix, feature_names, docs_indices, cluster_id, num_topics,
+                            learning_method="online")
+
+
+def _cached_lda_result(artifacts: dict, cluster_id: int, num_topics: int) -> dict | None:
+    """현재 클러스터링 결과로 미리 계산해 둔 LDA 결과가 있으면 반환합니다."""
+    clustering_id = (artifacts.get("_cx_temp_data") or {}).get("clustering_id")
+    cached = (artifacts.get("cx_lda_results_by_cluster") or {}).get(str(cluster_id))
+    if (clustering_id and cached and cached.get("clustering_id") == clustering_id
+            and cached.get("num_topics") == num_topics):
+        return cached
+    return None
+
+
+@memoize_cx_step(
+    inputs=_clustering_fingerprint,
+    outputs=("cx_lda_results", "analysis_results"),
+    merge_outputs=("cx_lda_results_by_cluster",),
+    depends=_MEMO_DEPENDS,
+    config=_memo_config,
+)
 def run_topic_modeling_lda(workspace: dict, cluster_id: int, num_topics: int = 3):
     """
     PDF 3단계: 특정 클러스터에 대해 LDA를 수행하여 구체적인 '고객 액션'을 식별합니다.
+    run_topic_modeling_lda_all 등으로 이미 계산된 결과가 있으면 다시 학습하지 않고 바로 반환합니다.
     """
     print(f"✅ [CX Agent] Step 3: Running LDA for Cluster ID: {cluster_id} (동기 모드)")
     artifacts = workspace.get("artifacts", {}) # artifacts를 먼저 가져옵니다.
@@ -350,115 +671,57 @@ def run_topic_modeling_lda(workspace: dict, cluster_id: int, num_topics: int = 3
     # 1. 필수 데이터 존재 여부 검사
     if not temp_data.get("cluster_labels"):
         return {"error": "토픽 모델링을 위해서는 군집화를 먼저 수행해야 합니다."}
-    if not temp_data.get("tfidf_matrix"):
+    if not _has_tfidf_matrix(temp_data):
         return {"error": "토픽 모델링을 위한 TF-IDF 행렬이 워크스페이스에 없습니다."}
     if not temp_data.get("feature_names"):
         return {"error": "토픽 모델링을 위한 피처 이름이 워크스페이스에 없습니다."}
 
     try:
-        # 2. 특정 클러스터에 해당하는 문서들의 TF-IDF 행렬 추출
-        docs_indices = [i for i, label in enumerate(temp_data["cluster_labels"]) if label == cluster_id]
-        if not docs_indices:
-            return {"error": f"ID가 {cluster_id}인 클러스터에 문서가 없습니다."}
-        
-        # _cx_temp_data에 저장된 tfidf_matrix는 list of lists (Python 객체)이므로
-        # 다시 희소 행렬로 변환해야 합니다.
-        doc_term_matrix = csr_matrix(np.array(temp_data["tfidf_matrix"])[docs_indices])
-        
-        # 3. 피처 이름(단어 목록) 가져오기
-        feature_names = temp_data["feature_names"] # TfidfVectorizer 객체 대신 저장된 리스트 사용
-
-        # 🚨 추가: LDA 모델 학습 전 데이터 유효성 검사
-        if doc_term_matrix.shape[0] < num_topics:
-            return {"error": f"문서 개수({doc_term_matrix.shape[0]}개)가 토픽 개수({num_topics})보다 적습니다. 더 작은 토픽 개수로 다시 시도해주세요."}
-        if doc_term_matrix.shape[1] == 0: # 유효한 단어가 없으면
-            return {"error": "토픽 모델링을 수행할 단어가 부족합니다. CountVectorizer 설정을 조정하세요."}
-
-        # 4. LDA 모델 학습
-        lda = LatentDirichletAllocation(n_components=num_topics, random_state=42)
-        lda.fit(doc_term_matrix) # 문서-단어 행렬로 LDA 학습
-
-        # 각 문서의 토픽 분포를 계산 (calculate_opportunity_scores에서 사용될 데이터)
-        doc_topic_dist_for_cluster = lda.transform(doc_term_matrix) # 👈 클러스터에 해당하는 문서들의 토픽 분포
-        assignments = np.argmax(doc_topic_dist_for_cluster, axis=1)
-        # 5. 토픽별 상위 키워드 추출 및 요약 정보 구성 (기존 로직)
-        topics_list = []
-        top_keywords_per_topic = _get_top_keywords(feature_names, lda.components_, 7) # 상위 7개 키워드
-
-        # 🚨 LDA 그래프 시각화 데이터 생성 시작 🚨
-        topic_graph_data_points = [] # 각 토픽의 2D 위치 (그래프 점)
-        topic_keywords_with_weights = [] # 각 토픽의 키워드 및 가중치 (툴팁용)
-
-        # LDA 모델의 components_는 (num_topics, num_features) 형태의 토픽-단어 분포 행렬
-        topic_embeddings = lda.components_
-
-        # PCA를 사용하여 토픽 임베딩을 2D로 축소
-        # 토픽 개수가 2개 미만이거나, 피처 개수가 2개 미만이면 PCA 적용 불가
-        if topic_embeddings.shape[0] >= 2 and topic_embeddings.shape[1] >= 2:
-            pca = PCA(n_components=2, random_state=42)
-            # 각 토픽의 2D 위치
-            topic_positions_2d = pca.fit_transform(topic_embeddings).tolist()
-        else: # PCA 적용 불가 시 임시 위치 할당
-            topic_positions_2d = [[np.random.rand() * 10, np.random.rand() * 10] for _ in range(num_topics)]
-            print("Warning: Not enough data for meaningful PCA for LDA topics. Using random positions for graph.")
-
-
-        for i, keywords in enumerate(top_keywords_per_topic):
-            topic_docs = [
-                docs_indices[j]
-                for j, assigned in enumerate(assignments)
-                if assigned == i
-            ]
-            # 토픽별 상위 키워드의 가중치도 함께 추출 (확률로 정규화)
-            current_topic_comp = lda.components_[i]
-            keywords_and_weights = {
-                kw: float(current_topic_comp[feature_names.index(kw)]) / current_topic_comp.sum()
-                for kw in keywords if kw in feature_names
-            }
-            topic_keywords_with_weights.append({
-                "topic_id": i,
-                "keywords": keywords_and_weights
-            })
-
-            # LDA 그래프에 표시될 데이터 포인트
-            topic_graph_data_points.append({
-                "topic_id": i,
-                "x": topic_positions_2d[i][0],
-                "y": topic_positions_2d[i][1],
-                "keywords_data": keywords_and_weights # 해당 토픽의 키워드 데이터 (툴팁용)
-            })
-
-            # 기존 topics_list (요약 메시지용)
-            topics_list.append({
-                "topic_id": f"{cluster_id}-{i}", # 클러스터 ID와 토픽 인덱스를 조합
-                "action_keywords": keywords, # 상위 키워드
-                "description": f"주요 키워드: {', '.join(keywords[:5])}...", # 간단한 설명 추가
-                "document_indices": topic_docs
-            })
-
-        # 🚨 LDA 그래프 시각화 데이터 최종 구성
-        lda_graph_data = {
-            "topics": topic_graph_data_points,
-            "num_topics": num_topics
-      
-        }
+        lda_results = _cached_lda_result(artifacts, cluster_id, num_topics)
+        if not lda_results:
+            # 군집화 직후 백그라운드에서 미리 계산해 둔 결과가 있는지 확인합니다.
+            lda_results = precompute_scheduler.get(temp_data.get("clustering_id"), "lda", cluster_id, num_topics)
+            if lda_results:
+                lda_results = {**lda_results, "clustering_id": temp_data.get("clustering_id")}
+                by_cluster = workspace["artifacts"].get("cx_lda_results_by_cluster") or {}
+                by_cluster[str(cluster_id)] = lda_results
+                workspace["artifacts"]["cx_lda_results_by_cluster"] = by_cluster
+        if lda_results:
+            print(f"⚡ Using precomputed LDA results for cluster {cluster_id}")
+        else:
+            # 2. 특정 클러스터에 해당하는 문서들의 TF-IDF 행렬 추출
+            docs_indices = [i for i, label in enumerate(temp_data["cluster_labels"]) if label == cluster_id]
+            if not docs_indices:
+                return {"error": f"ID가 {cluster_id}인 클러스터에 문서가 없습니다."}
+
+            # _cx_temp_data에는 아티팩트 참조만 있으므로 저장소에서 CSR 행렬을 바로 불러옵니다.
+            doc_term_matrix = _load_tfidf_matrix(temp_data, docs_indices)
+
+            # 3. 피처 이름(단어 목록) 가져오기
+            feature_names = temp_data["feature_names"] # TfidfVectorizer 객체 대신 저장된 리스트 사용
+
+            try:
+                lda_results = _fit_cluster_lda(doc_term_matrix, feature_names, docs_indices, cluster_id, num_topics)
+            except ValueError as e:
+                return {"error": str(e)}
+            lda_results["clustering_id"] = temp_data.get("clustering_id")
+            by_cluster = workspace["artifacts"].get("cx_lda_results_by_cluster") or {}
+            by_cluster[str(cluster_id)] = lda_results
+            workspace["artifacts"]["cx_lda_results_by_cluster"] = by_cluster
+
         # 수정: 워크스페이스에 결과 저장
-        workspace["artifacts"]["cx_lda_results"] = {
-            "cluster_id": cluster_id,
-            "num_topics": num_topics,
-            "topics_summary_list": topics_list,
-            "graph_data": lda_graph_data
-        }
+        workspace["artifacts"]["cx_lda_results"] = lda_results
         workspace["artifacts"]["analysis_results"] = (
             f"클러스터 {cluster_id}에 대해 {num_topics}개의 토픽을 성공적으로 식별했습니다."
         )     
+        topics_list = lda_results["topics_summary_list"]
         # 7. LLM에게 반환할 데이터 (간결하게)
         return {
             "cx_lda_results": { # ArtifactRenderer에서 이 키를 통해 접근
                 "cluster_id": cluster_id,
                 "num_topics": num_topics,
                 "topics_summary_list": topics_list, # 기존 토픽 요약 메시지용 리스트
-                "graph_data": lda_graph_data # 🚨 새롭게 추가된 그래프 데이터
+                "graph_data": lda_results["graph_data"] # 🚨 새롭게 추가된 그래프 데이터
             },
             "success": True, # 성공 여부
             "message": f"클러스터 {cluster_id}에 대해 {num_topics}개의 토픽을 성공적으로 식별했습니다.",
@@ -474,6 +737,110 @@ def run_topic_modeling_lda(workspace: dict, cluster_id: int, num_topics: int = 3
         traceback.print_exc()
         return {"error": f"토픽 모델링(LDA) 분석 중 오류가 발생했습니다: {e}"}
 
+
+def _fit_pending_lda(args: tuple, pending: dict, num_topics: int, workers: int):
+    """
+    클러스터별 LDA를 (cluster_id, 결과 또는 ValueError) 순서로 돌려줍니다.
+    작업(job) 워커 안에서는 이미 JOB_WORKERS 만큼 프로세스가 돌고 있으므로 프로세스를 더 띄우지 않고 차례로 학습합니다.
+    호출 측이 중간에 멈추면(작업 취소) 아직 시작하지 않은 학습은 취소하고 기다리지 않습니다.
+    """
+    if in_job() or workers <= 1 or len(pending) == 1:
+        for cluster_id, docs_indices in pending.items():
+            try:
+                yield cluster_id, _fit_cluster_lda_from_ref(*args, docs_indices, cluster_id, num_topics)
+            except ValueError as e:
+                yield cluster_id, e
+        return
+
+    executor = ProcessPoolExecutor(max_workers=min(workers, len(pending)))
+    try:
+        futures = {
+            cluster_id: executor.submit(_fit_cluster_lda_from_ref, *args, docs_indices, cluster_id, num_topics)
+            for cluster_id, docs_indices in pending.items()
+        }
+        for cluster_id, future in futures.items():
+            try:
+                yield cluster_id, future.result()
+            except ValueError as e:
+                yield cluster_id, e
+    except BaseException:
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown(wait=True)
+
+
+def run_topic_modeling_lda_all(workspace: dict, num_topics: int = 3, workers: int = LDA_WORKERS):
+    """
+    모든 클러스터의 LDA를 프로세스 풀에서 동시에 학습합니다. (online 학습, CSR 슬라이스)
+    결과는 cx_lda_results_by_cluster[클러스터 ID]에 저장되어, 이후 run_topic_modeling_lda가 즉시 반환합니다.
+    """
+    print(f"✅ [CX Agent] Step 3: Running LDA for all clusters with {workers} workers (배치 모드)")
+    artifacts = workspace.get("artifacts", {})
+    temp_data = artifacts.get("_cx_temp_data", {})
+
+    if not temp_data.get("cluster_labels"):
+        return {"error": "토픽 모델링을 위해서는 군집화를 먼저 수행해야 합니다."}
+    if not temp_data.get("tfidf_matrix_ref"):
+        return {"error": "배치 토픽 모델링을 위한 TF-IDF 행렬 참조가 없습니다. 군집화를 다시 수행해주세요."}
+    if not temp_data.get("feature_names"):
+        return {"error": "토픽 모델링을 위한 피처 이름이 워크스페이스에 없습니다."}
+
+    try:
+        clustering_id = temp_data.get("clustering_id")
+        by_cluster = artifacts.get("cx_lda_results_by_cluster") or {}
+        cluster_docs = defaultdict(list)
+        for doc_idx, label in enumerate(temp_data["cluster_labels"]):
+            cluster_docs[label].append(doc_idx)
+
+        skipped = {}
+        pending = {}
+        for cluster_id, docs_indices in sorted(cluster_docs.items()):
+            if _cached_lda_result(artifacts, cluster_id, num_topics):
+                continue
+            precomputed = precompute_scheduler.get(clustering_id, "lda", cluster_id, num_topics)
+            if precomputed:
+                by_cluster[str(cluster_id)] = {**precomputed, "clustering_id": clustering_id}
+                continue
+            if len(docs_indices) < num_topics:
+                skipped[str(cluster_id)] = f"문서 개수({len(docs_indices)}개)가 토픽 개수({num_topics})보다 적습니다."
+                continue
+            pending[cluster_id] = docs_indices
+
+        if pending:
+            args = (temp_data["tfidf_matrix_ref"], temp_data["feature_names"])
+            # 취소(JobCancelled)로 루프를 빠져나가면 closing()이 제너레이터를 닫아 남은 학습을 바로 취소합니다.
+            with closing(_fit_pending_lda(args, pending, num_topics, workers)) as fitted:
+                for done, (cluster_id, result) in enumerate(fitted, start=1):
+                    report_progress(done / len(pending), f"클러스터 {done}/{len(pending)} LDA 완료")
+                    if isinstance(result, ValueError):
+                        skipped[str(cluster_id)] = str(result)
+                        continue
+                    result["clustering_id"] = clustering_id
+                    by_cluster[str(cluster_id)] = result
+
+        workspace["artifacts"]["cx_lda_results_by_cluster"] = by_cluster
+        message = f"{len(by_cluster)}개 클러스터의 토픽을 식별했습니다. 클러스터 ID를 지정하면 해당 토픽을 바로 확인할 수 있습니다."
+        workspace["artifacts"]["analysis_results"] = message
+        print(f"💾 LDA results for {len(by_cluster)} clusters saved to workspace artifacts.")
+
+        return {
+            "cx_lda_results_by_cluster": by_cluster,
+            "success": True,
+            "message": message,
+            "skipped_clusters": skipped,
+            "topics_preview_by_cluster": {
+                cid: [{"topic_id": t["topic_id"], "action_keywords": t["action_keywords"]}
+                      for t in result["topics_summary_list"]]
+                for cid, result in by_cluster.items()
+            },
+        }
+
+    except Exception as e:
+        print(f"❌ 배치 토픽 모델링(LDA) 중 오류 발생: {e}")
+        import traceback
+        traceback.print_exc()
+        return {"error": f"배치 토픽 모델링(LDA) 분석 중 오류가 발생했습니다: {e}"}
+
 def create_customer_action_map(workspace: dict, topic_id: str):
     """
     [완성본] PDF 4단계: '분석된 결과'를 바탕으로 CAM(Pain Point 등)을 생성합니다.
@@ -557,41 +924,109 @@ def create_customer_action_map(workspace: dict, topic_id: str):
         return {"error": f"고객 액션맵 생성 중 오류: {e}"}
 
 
-def calculate_opportunity_scores(workspace: dict):
-    # 1) LDA 토픽 분석 결과 & 원문 꺼내오기
-    lda_results = workspace["artifacts"]["cx_lda_results"]["topics_summary_list"]
-    all_docs    = [d["original_text"] for d in workspace["artifacts"]["retrieved_data"]["web_results"]]
+def _topic_weight_matrix(lda_results_list: list, num_docs: int, weighting: str = "hard"):
+    """
+    여러 LDA 결과(클러스터별)를 하나의 (문서 수 x 전체 토픽 수) 희소 가중치 행렬로 합칩니다.
+    weighting="hard" 이면 문서가 배정된 토픽에 1, "soft" 이면 문서-토픽 확률을 가중치로 씁니다.
+    문서-토픽 분포가 없는 결과(이전 버전 캐시)는 document_indices 기반 hard 가중치로 대신합니다.
+    """
+    rows, cols, data, topics = [], [], [], []
+    for lda_result in lda_results_list:
+        offset = len(topics)
+        summaries = lda_result["topics_summary_list"]
+        topics.extend(summaries)
+        if weighting == "soft" and lda_result.get("doc_topic_ref") and lda_result.get("doc_indices_ref"):
+            doc_topic = np.asarray(load_array(lda_result["doc_topic_ref"]))
+            doc_indices = np.asarray(load_array(lda_result["doc_indices_ref"]))
+            r, c = np.nonzero(doc_topic)
+            rows.append(doc_indices[r])
+            cols.append(c + offset)
+            data.append(doc_topic[r, c])
+            continue
+        for j, topic in enumerate(summaries):
+            idxs = np.asarray(topic.get("document_indices", []), dtype=np.int64)
+            rows.append(idxs)
+            cols.append(np.full(len(idxs), offset + j, dtype=np.int64))
+            data.append(np.ones(len(idxs), dtype=np.float32))
+
+    if not topics:
+        return csr_matrix((num_docs, 0), dtype=np.float32), topics
+    rows, cols, data = np.concatenate(rows), np.concatenate(cols), np.concatenate(data)
+    in_range = rows < num_docs
+    W = csr_matrix((data[in_range], (rows[in_range], cols[in_range])), shape=(num_docs, len(topics)), dtype=np.float32)
+    return W, topics
+
+
+def _minmax10(values: np.ndarray) -> np.ndarray:
+    lo, hi = values.min(), values.max()
+    if hi == lo:
+        return np.zeros_like(values, dtype=np.float64)
+    return (values - lo) / (hi - lo) * 10
+
+
+def score_topic_opportunities(W, sentiments: np.ndarray, valid: np.ndarray) -> dict:
+    """
+    문서-토픽 가중치 행렬 W와 문서별 감성 벡터로 토픽별 중요도/만족도/기회 점수를 한 번에 계산합니다.
+    중요도 = 토픽 가중치 합(W.T @ 1), 만족도 = 텍스트가 있는 문서의 가중 평균 감성(W.T @ s / W.T @ valid).
+    두 값을 0~10으로 min-max 정규화한 뒤 기회 점수 = 중요도 + (10 - 만족도) 입니다.
+    """
+    Wt = W.T.tocsr()
+    importance = np.asarray(Wt @ np.ones(W.shape[0], dtype=np.float32)).ravel()
+    weight_valid = np.asarray(Wt @ valid).ravel()
+    sentiment_sum = np.asarray(Wt @ (sentiments * valid)).ravel()
+    satisfaction = np.divide(sentiment_sum, weight_valid, out=np.zeros_like(sentiment_sum), where=weight_valid > 0)
+
+    imp10 = _minmax10(importance)
+    sat10 = _minmax10(satisfaction)
+    return {"importance": imp10, "satisfaction": sat10, "opportunity": imp10 + (10 - sat10)}
 
-    # 2) 원시 중요도·감성 수집
+
+@memoize_cx_step(inputs=_opportunity_fingerprint, outputs=("cx_opportunity_scores", "analysis_results"),
+                 depends=_MEMO_DEPENDS, config=_memo_config)
+def calculate_opportunity_scores(workspace: dict, weighting: str = "hard", scope: str = "current"):
+    """
+    토픽별 기회 점수를 계산합니다.
+    weighting="soft" 이면 문서를 배정된 토픽 하나가 아니라 토픽 확률로 나눠 반영합니다.
+    scope="all" 이면 cx_lda_results_by_cluster 의 모든 클러스터 토픽을 함께 비교합니다.
+    """
+    # 1) LDA 토픽 분석 결과 & 원문 꺼내오기
+    artifacts = workspace["artifacts"]
+    if scope == "all" and artifacts.get("cx_lda_results_by_cluster"):
+        lda_results_list = [r for _, r in sorted(artifacts["cx_lda_results_by_cluster"].items())]
+    else:
+        lda_results_list = [artifacts["cx_lda_results"]]
+    all_docs    = web_column(artifacts["retrieved_data"], "original_text")
+
+    # 2) 문서-토픽 가중치 행렬과 같은 순서의 감성 벡터 준비
+    # 토픽에 속한 문서만 모아 한 번에 배치 감성 분석합니다.
     try:
-        raw_importances, raw_sentiments = [], []
-        for topic in lda_results:
-            idxs = topic.get("document_indices", [])
-            docs = [all_docs[i] for i in idxs if i < len(all_docs)]
-            raw_importances.append(len(docs))
-            scores = [_get_sentiment_score(doc) for doc in docs]
-            raw_sentiments.append(float(np.mean(scores)) if scores else 0.0)
-
-        # 3) 정규화
-        imp_min, imp_max = min(raw_importances), max(raw_importances)
-        sent_min, sent_max = min(raw_sentiments), max(raw_sentiments)
-        def norm(x, lo, hi): return 0.0 if hi==lo else (x-lo)/(hi-lo)*10
-        norm_imps = [norm(v, imp_min, imp_max) for v in raw_importances]
-        norm_sats = [norm(v, sent_min, sent_max) for v in raw_sentiments]
-
-        # 4) 기회 점수 계산
-        opportunity_scores = []
-        for i, topic in enumerate(lda_results):
-            imp10 = norm_imps[i]
-            sat10 = norm_sats[i]
-            opp   = imp10 + (10 - sat10)  # 덧셈 모델
-            opportunity_scores.append({
+        W, topics = _topic_weight_matrix(lda_results_list, len(all_docs), weighting)
+        if not topics:
+            return {"error": "기회 점수를 계산할 토픽이 없습니다. 토픽 모델링을 먼저 수행해주세요."}
+
+        used_docs = np.unique(W.nonzero()[0])
+        texts = [all_docs[i] for i in used_docs if all_docs[i]]
+        text_scores, sentiment_stats = score_texts(texts)
+        sentiments = np.zeros(len(all_docs), dtype=np.float32)
+        valid = np.zeros(len(all_docs), dtype=np.float32)
+        for i in used_docs:
+            if all_docs[i]:
+                sentiments[i] = text_scores.get(all_docs[i], 0.0)
+                valid[i] = 1.0
+        report_progress(0.8, "감성 분석 완료")
+
+        # 3) 정규화 & 4) 기회 점수 계산 (행렬-벡터 곱)
+        scores = score_topic_opportunities(W, sentiments, valid)
+        opportunity_scores = [
+            {
                 "topic_id":          topic["topic_id"],
                 "action_keywords":   topic["action_keywords"],
-                "importance":        round(imp10, 2),
-                "satisfaction":      round(sat10, 2),
-                "opportunity_score": round(opp, 2)
-            })
+                "importance":        round(float(scores["importance"][i]), 2),
+                "satisfaction":      round(float(scores["satisfaction"][i]), 2),
+                "opportunity_score": round(float(scores["opportunity"][i]), 2)
+            }
+            for i, topic in enumerate(topics)
+        ]
 
         # 5) 정렬 & 반환
         sorted_scores = sorted(opportunity_scores, key=lambda x: x["opportunity_score"], reverse=True)
@@ -603,7 +1038,7 @@ def calculate_opportunity_scores(workspace: dict):
         # 수정: save_workspace_to_redis 호출 제거 (main.py에서 처리)
         print("💾 Opportunity scores saved to workspace artifacts.")
 
-        return {"cx_opportunity_scores": sorted_scores}
+        return {"cx_opportunity_scores": sorted_scores, "sentiment_stats": sentiment_stats}
 
     except Exception as e:
         print(f"❌ 기회 점수 계산 중 오류 발생: {e}")
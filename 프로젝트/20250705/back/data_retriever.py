@@ -1,7 +1,13 @@
+import os
 from datetime import datetime
 from collections import defaultdict
 from qdrant_client.http.models import Filter, FieldCondition, MatchValue, Range, SearchRequest, NamedVector
 from .utils import get_embedding_models, get_qdrant_client, get_openai_client, parse_natural_date
+from .collection_setup import WEB_COLLECTION, list_web_partitions, partitions_for_range
+from .web_table import pack_web_results
+
+# 1로 설정하면 기간 검색을 web_data 대신 기간 파티션(collection_setup.partition_web_data)으로 보냅니다.
+WEB_DATA_PARTITIONED = os.getenv("WEB_DATA_PARTITIONED", "0") == "1"
 
 
 def expand_keywords(keyword: str, product_type: str = None):
@@ -77,6 +83,48 @@ def summarize_text(text_to_summarize: str):
         print(f"텍스트 요약 중 오류 발생: {e}")
         return text_to_summarize
 
+def resolve_web_collections(date_range_ts: tuple | None) -> list:
+    """
+    검색할 웹 데이터 컬렉션 목록을 결정합니다.
+    파티션 모드에서 기간이 지정되면 그 기간과 겹치는 파티션만, 아니면 web_data 하나를 반환합니다.
+    기간과 겹치는 파티션이 없으면 검색을 건너뛰지 않도록 web_data로 돌아갑니다. (기간 필터는 그대로 적용됩니다)
+    """
+    if not WEB_DATA_PARTITIONED or not date_range_ts:
+        return [WEB_COLLECTION]
+    partitions = list_web_partitions()
+    if not partitions:
+        return [WEB_COLLECTION]
+    return partitions_for_range(*date_range_ts, partitions=partitions) or [WEB_COLLECTION]
+
+
+def _to_point_id(point_id):
+    """web_results에는 id가 문자열로 저장되므로, 정수 ID는 다시 int로 되돌립니다."""
+    return int(point_id) if isinstance(point_id, str) and point_id.isdigit() else point_id
+
+
+def fetch_stored_vectors(point_ids: list, vector_names=("meaning", "topic"), collection_name: str = WEB_COLLECTION) -> dict:
+    """
+    검색 결과 ID들의 저장된 임베딩 벡터를 한 번의 retrieve 호출로 가져옵니다.
+    (파티션 모드여도 원본 web_data가 유지되므로 web_data에서 조회합니다.)
+    Returns:
+        {str(id): {vector_name: list[float]}}  - 벡터가 없는 ID는 빠집니다.
+    """
+    if not point_ids:
+        return {}
+    qdrant = get_qdrant_client()
+    records = qdrant.retrieve(
+        collection_name=collection_name,
+        ids=[_to_point_id(pid) for pid in point_ids],
+        with_payload=False,
+        with_vectors=list(vector_names),
+    )
+    vectors = {}
+    for record in records:
+        if isinstance(record.vector, dict) and all(name in record.vector for name in vector_names):
+            vectors[str(record.id)] = {name: record.vector[name] for name in vector_names}
+    return vectors
+
+
 def run_rrf_search(keywords: list, date_range: tuple | None = None, top_k=2000, score_threshold=0.5):
     """RRF 기반 하이브리드 검색"""
     meaning_model, topic_model =get_embedding_models()
@@ -87,29 +135,42 @@ def run_rrf_search(keywords: list, date_range: tuple | None = None, top_k=2000,
 
     # --- [신규] 날짜 필터 생성 로직 ---
     must_conditions = []
+    date_range_ts = None
     if date_range and len(date_range) == 2:
         start_date, end_date = date_range
         print(f"🌀 Applying date filter: {start_date} ~ {end_date}")
+        date_range_ts = (
+            int(datetime.combine(start_date, datetime.min.time()).timestamp()),
+            int(datetime.combine(end_date, datetime.max.time()).timestamp()),
+        )
         must_conditions.append(FieldCondition(
             key="date_timestamp", 
-            range=Range(
-                gte=int(datetime.combine(start_date, datetime.min.time()).timestamp()),
-                lte=int(datetime.combine(end_date, datetime.max.time()).timestamp())
-            )
+            range=Range(gte=date_range_ts[0], lte=date_range_ts[1])
         ))
     query_filter = Filter(must=must_conditions) if must_conditions else None
 
+    # 파티션 모드면 기간과 겹치는 파티션에만 검색을 보냅니다. (경계 파티션은 Range 필터로 한 번 더 거름)
+    collections = resolve_web_collections(date_range_ts)
+    if collections != [WEB_COLLECTION]:
+        print(f"🌀 Routing search to partitions: {collections}")
 
     for kw in keywords:
         meaning_vec = meaning_model.encode("query: " + kw)
         topic_vec = topic_model.encode(kw)
-        search_results = qdrant.search_batch(
-            collection_name="web_data",
-            requests=[
-                SearchRequest(vector=NamedVector(name="meaning", vector=meaning_vec.tolist()), limit=top_k, with_payload=True, filter=query_filter, score_threshold=score_threshold),
-                SearchRequest(vector=NamedVector(name="topic", vector=topic_vec.tolist()), limit=top_k, with_payload=True, filter=query_filter, score_threshold=score_threshold)
-            ]
-        )
+        requests = [
+            SearchRequest(vector=NamedVector(name="meaning", vector=meaning_vec.tolist()), limit=top_k, with_payload=True, filter=query_filter, score_threshold=score_threshold),
+            SearchRequest(vector=NamedVector(name="topic", vector=topic_vec.tolist()), limit=top_k, with_payload=True, filter=query_filter, score_threshold=score_threshold)
+        ]
+        # 벡터 종류별로 모든 컬렉션 결과를 점수순으로 합친 뒤 순위를 매깁니다.
+        merged = [[] for _ in requests]
+        for collection_name in collections:
+            search_results = qdrant.search_batch(collection_name=collection_name, requests=requests)
+            for i, hits in enumerate(search_results):
+                merged[i].extend(hits)
+        search_results = merged if len(collections) == 1 else [
+            sorted(hits, key=lambda h: h.score, reverse=True)[:top_k] for hits in merged
+        ]
+
         for hits in search_results:
             for rank, hit in enumerate(hits):
                 rrf_scores[hit.id] += 1 / (rank + K_RRF)
@@ -283,10 +344,11 @@ def run_data_retriever(workspace: dict, keyword: str, date_range_str: str | None
     #컬럼 정보 검색
     columns_product = get_columns_for_product(product_type)
 
+    # 검색 결과 본문은 열 단위 표로 아티팩트 저장소에 두고, 워크스페이스에는 참조/건수/미리보기만 저장합니다.
     retrieved_data = {
         "query": keyword, # 사용자 입력 원본 키워드를 query로 저장
         "expanded_keywords": all_expanded_keywords, # 확장된 키워드도 저장
-        "web_results": web_results,
+        **pack_web_results(web_results),
     }
 
 
@@ -301,11 +363,7 @@ def run_data_retriever(workspace: dict, keyword: str, date_range_str: str | None
     )
     # 6. 워크스페이스에 저장할 형식으로 결과 가공
     return {
-        "retrieved_data": {
-            "query": keyword, # 사용자 입력 원본 키워드를 query로 저장
-            "expanded_keywords": all_expanded_keywords, # 확장된 키워드도 저장
-            "web_results": web_results,
-        },
+        "retrieved_data": retrieved_data,
         "columns_product": columns_product,
         "sensor_data": sensor_data_results,
         "product_data": product_results,
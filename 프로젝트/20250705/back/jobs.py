@@ -0,0 +1,320 @@
+# agents/jobs.py
+"""
+오래 걸리는 CX 분석 도구를 HTTP 요청 밖에서 실행하는 작업(job) 실행기입니다.
+- JOB_TOOLS 에 등록된 CPU 집약 도구는 프로세스 풀에서 실행되어 이벤트 루프와 GIL을 다투지 않고,
+  클라이언트 연결이 끊겨도 계속 진행됩니다.
+- 작업 상태/진행률은 Redis 해시 job:{id} 에 저장되므로 /jobs/{id}, /jobs/{id}/events 로 조회할 수 있습니다.
+- 작업이 끝나면 결과 artifacts를 세션 워크스페이스에 바로 반영하고, session:{id}:finished_jobs 목록에도 남겨
+  그 사이 진행 중이던 /chat 요청이 워크스페이스를 덮어써도 apply_finished_jobs()로 다시 반영할 수 있게 합니다.
+- 작업 상태는 제출한 세션에서만 조회/취소할 수 있습니다. (get_job/cancel_job의 session_id)
+- 대기 중인 작업은 바로 취소되고, 실행 중인 작업은 다음 report_progress() 호출 시점에 중단됩니다.
+- 제출 시점의 입력 지문(검색 결과 ID, 클러스터링 ID)을 작업에 기록해 둡니다. 작업을 제출한 /chat 요청은 끝날 때 한 번만
+  저장하므로, 작업이 끝난 시점의 Redis 워크스페이스는 아직 제출 전 상태일 수 있습니다. 그래서 Redis 쪽 지문이 같을 때만
+  바로 반영하고, stale 판정은 세션 요청 안에서(apply_finished_jobs, 요청의 메모리 워크스페이스 기준) 합니다.
+"""
+
+import os
+import json
+import uuid
+import threading
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from .utils import get_redis_client, get_redis_binary_client, load_workspace_from_redis, save_workspace_to_redis
+from .workspace_codec import encode, decode
+from .web_table import web_results_id, count_web_results
+
+JOBS_ENABLED = os.getenv("JOBS_ENABLED", "1") == "1"
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+JOB_TTL = int(os.getenv("JOB_TTL", 86400))
+
+# 작업으로 실행할 도구 -> (덮어쓰는 artifacts 키, 항목을 병합하는 dict artifacts 키)
+JOB_TOOLS = {
+    "run_ward_clustering": (
+        ("_cx_temp_data", "cx_ward_clustering_results", "cx_lda_results_by_cluster", "analysis_results"), ()),
+    "run_topic_modeling_lda_all": (("analysis_results",), ("cx_lda_results_by_cluster",)),
+    "calculate_opportunity_scores": (("cx_opportunity_scores", "analysis_results"), ()),
+}
+
+TERMINAL_STATUSES = ("succeeded", "failed", "cancelled", "stale")
+
+job_executor = None
+_futures = {}  # job_id -> Future (이 프로세스에서 제출한 작업만)
+_futures_lock = threading.Lock()
+_current_job_id = None  # 워커 프로세스에서 실행 중인 작업 ID
+
+
+class JobCancelled(BaseException):
+    """실행 중인 작업이 취소되었음을 알립니다. 도구 함수의 `except Exception` 에 잡히지 않도록 BaseException 을 상속합니다."""
+
+
+def _job_key(job_id: str) -> str:
+    return f"job:{job_id}"
+
+
+def _finished_key(session_id: str) -> str:
+    return f"session:{session_id}:finished_jobs"
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+
+def _update_job(job_id: str, **fields):
+    r = get_redis_client()
+    if r is None:
+        return
+    mapping = {k: v if isinstance(v, str) else json.dumps(v, ensure_ascii=False) for k, v in fields.items()}
+    mapping["updated_at"] = _now()
+    pipe = r.pipeline()
+    pipe.hset(_job_key(job_id), mapping=mapping)
+    pipe.hincrby(_job_key(job_id), "seq", 1)  # SSE 스트림이 변경 여부를 판단하는 버전 번호
+    pipe.expire(_job_key(job_id), JOB_TTL)
+    pipe.execute()
+
+
+def get_job(job_id: str, session_id: str | None = None) -> dict | None:
+    """작업 상태를 반환합니다. 없는 작업이거나 session_id가 주어졌는데 다른 세션의 작업이면 None."""
+    r = get_redis_client()
+    if r is None:
+        return None
+    raw = r.hgetall(_job_key(job_id))
+    if not raw:
+        return None
+    if session_id is not None and raw.get("session_id") != session_id:
+        return None
+    job = dict(raw)
+    for field in ("progress", "seq", "args", "cancel_requested", "inputs"):
+        if field in job:
+            job[field] = json.loads(job[field])
+    return job
+
+
+def job_inputs(tool_name: str, artifacts) -> dict:
+    """작업 결과가 유효하려면 워크스페이스에서 그대로여야 하는 입력의 지문."""
+    retrieved_data = artifacts.get("retrieved_data")
+    # 이전 형식(web_results 리스트)은 표 ID가 없으므로 검색어와 건수로 대신합니다.
+    corpus = web_results_id(retrieved_data) or (
+        f"legacy:{(retrieved_data or {}).get('query')}:{count_web_results(retrieved_data)}" if retrieved_data else None)
+    inputs = {"web_results_id": corpus}
+    if tool_name != "run_ward_clustering":
+        inputs["clustering_id"] = (artifacts.get("_cx_temp_data") or {}).get("clustering_id")
+    return inputs
+
+
+def _is_stale(job: dict, workspace: dict) -> bool:
+    inputs = job.get("inputs")
+    if not inputs:
+        return False
+    return job_inputs(job.get("tool"), workspace.get("artifacts") or {}) != inputs
+
+
+def get_job_executor():
+    global job_executor
+    if job_executor is None:
+        print(f"🌀 Initializing job executor ({JOB_WORKERS} workers)...")
+        job_executor = ProcessPoolExecutor(max_workers=JOB_WORKERS, initializer=_init_job_worker)
+    return job_executor
+
+
+def _init_job_worker():
+    """워커 프로세스 초기화: SNA/LDA 미리 계산은 작업 완료 후 서버 프로세스에서 예약하므로 워커에서는 끕니다."""
+    from . import cx_analysis
+    cx_analysis.PRECOMPUTE_ENABLED = False
+
+
+def in_job() -> bool:
+    """작업(job) 워커 프로세스에서 도구를 실행 중인지. 이때는 도구 안에서 프로세스 풀을 더 띄우지 않습니다."""
+    return _current_job_id is not None
+
+
+def report_progress(progress: float, message: str = ""):
+    """
+    도구 함수가 진행률(0~1)을 알립니다. 작업으로 실행 중이 아니면 아무 일도 하지 않습니다.
+    작업 취소가 요청되었으면 JobCancelled 를 발생시켜 실행을 중단합니다.
+    """
+    if _current_job_id is None:
+        return
+    job = get_job(_current_job_id)
+    if job and job.get("cancel_requested"):
+        raise JobCancelled(_current_job_id)
+    _update_job(_current_job_id, progress=round(float(progress), 3), message=message)
+
+
+def _run_job(job_id: str, tool_name: str, workspace: dict, args: dict) -> dict:
+    """워커 프로세스에서 도구를 실행하고, 반환값과 도구가 바꾼 artifacts만 돌려줍니다."""
+    global _current_job_id
+    from .tools import available_functions
+
+    _current_job_id = job_id
+    try:
+        report_progress(0.0, "시작")
+        _update_job(job_id, status="running", started_at=_now())
+        result = available_functions[tool_name](workspace=workspace, **args)
+        outputs, merge_outputs = JOB_TOOLS[tool_name]
+        artifacts = workspace["artifacts"]
+        return {
+            "result": result,
+            "outputs": {name: artifacts.get(name) for name in outputs},
+            "merge": {name: artifacts.get(name) or {} for name in merge_outputs},
+        }
+    finally:
+        _current_job_id = None
+
+
+def submit_job(session_id: str, tool_name: str, workspace: dict, args: dict) -> dict | None:
+    """
+    도구 실행을 작업으로 제출하고 작업 상태를 반환합니다.
+    Redis를 쓸 수 없으면 진행률/결과를 보관할 곳이 없으므로 None을 반환합니다. (호출 측에서 동기 실행)
+    """
+    if not JOBS_ENABLED or tool_name not in JOB_TOOLS or get_redis_client() is None:
+        return None
+
+    job_id = uuid.uuid4().hex
+    _update_job(job_id, job_id=job_id, session_id=session_id, tool=tool_name, args=args,
+                inputs=job_inputs(tool_name, workspace["artifacts"]),
+                status="queued", progress=0.0, message="", cancel_requested=False, created_at=_now())
+
+    # 워커에는 artifacts만 보냅니다. (대화 기록은 도구 실행에 필요 없음)
+    previous_generation = (workspace["artifacts"].get("_cx_temp_data") or {}).get("clustering_id")
+    job_workspace = {"artifacts": dict(workspace["artifacts"].items())}
+    future = get_job_executor().submit(_run_job, job_id, tool_name, job_workspace, args)
+    with _futures_lock:
+        _futures[job_id] = future
+    future.add_done_callback(
+        lambda f: _on_job_done(job_id, session_id, tool_name, previous_generation, f))
+    print(f"📨 Job {job_id} submitted: {tool_name}({args})")
+    return get_job(job_id)
+
+
+def _on_job_done(job_id: str, session_id: str, tool_name: str, previous_generation, future):
+    with _futures_lock:
+        _futures.pop(job_id, None)
+
+    job = get_job(job_id) or {}
+    try:
+        payload = future.result()
+    except (JobCancelled, Exception) as e:
+        # 취소된 작업: future.cancel() 이면 CancelledError, 워커에서 중단되면 JobCancelled
+        if job.get("cancel_requested"):
+            _finish_job(job_id, session_id, status="cancelled", message="작업이 취소되었습니다.")
+        else:
+            print(f"❌ Job {job_id} ({tool_name}) failed: {e}")
+            _finish_job(job_id, session_id, status="failed", error=str(e))
+        return
+
+    if job.get("cancel_requested"):
+        _finish_job(job_id, session_id, status="cancelled", message="작업이 취소되었습니다.")
+        return
+
+    result = payload["result"]
+    if isinstance(result, dict) and "error" in result:
+        _finish_job(job_id, session_id, status="failed", error=result["error"])
+        return
+
+    # 결과는 워크스페이스와 같은 형식(타입 태그 msgpack + 압축)으로 저장해, 읽을 때 전체를 훑지 않습니다.
+    get_redis_binary_client().setex(f"{_job_key(job_id)}:result", JOB_TTL, encode(payload))
+
+    merged = False
+    try:
+        workspace = load_workspace_from_redis(session_id)
+        # 지문이 다르면 작업을 제출한 요청이 아직 저장 전일 수 있으므로 stale로 끝내지 않고,
+        # finished_jobs 목록을 통해 그 요청(또는 다음 요청)의 apply_finished_jobs가 판정하게 둡니다.
+        if workspace and not _is_stale(job, workspace):
+            _merge_outputs(workspace, payload)
+            _drop_pending(workspace, job_id)
+            save_workspace_to_redis(session_id, workspace)
+            merged = True
+    except Exception as e:
+        # 워크스페이스 반영에 실패해도 결과는 finished_jobs 목록으로 다음 /chat 요청에서 반영됩니다.
+        print(f"⚠️ Job {job_id}: failed to write results to workspace: {e}")
+
+    if tool_name == "run_ward_clustering":
+        _after_clustering(previous_generation, payload)
+
+    _finish_job(job_id, session_id, status="succeeded", progress=1.0,
+                message="완료" if merged else "완료 (다음 요청에서 반영)")
+    print(f"✅ Job {job_id} ({tool_name}) finished")
+
+
+def _finish_job(job_id: str, session_id: str, **fields):
+    _update_job(job_id, finished_at=_now(), **fields)
+    r = get_redis_client()
+    if r is not None:
+        pipe = r.pipeline()
+        pipe.rpush(_finished_key(session_id), job_id)
+        pipe.expire(_finished_key(session_id), JOB_TTL)
+        pipe.execute()
+
+
+def _after_clustering(previous_generation, payload: dict):
+    """워커에서는 꺼 둔 SNA/LDA 미리 계산을 서버 프로세스에서 예약합니다."""
+    from .cx_analysis import _reschedule_precompute
+    from .precompute import precompute_scheduler
+
+    temp_data = payload["outputs"].get("_cx_temp_data") or {}
+    if previous_generation and previous_generation != temp_data.get("clustering_id"):
+        precompute_scheduler.cancel_generation(previous_generation)
+    _reschedule_precompute({"artifacts": payload["outputs"]})
+
+
+def _merge_outputs(workspace: dict, payload: dict):
+    artifacts = workspace.setdefault("artifacts", {})
+    artifacts.update(payload["outputs"])
+    for name, value in payload["merge"].items():
+        artifacts[name] = {**(artifacts.get(name) or {}), **value}
+
+
+def _drop_pending(workspace: dict, job_id: str):
+    workspace["pending_jobs"] = [j for j in workspace.get("pending_jobs", []) if j.get("job_id") != job_id]
+
+
+def apply_finished_jobs(session_id: str, workspace: dict) -> list:
+    """
+    마지막 호출 이후 끝난 작업의 결과를 workspace에 반영하고, 끝난 작업들의 상태 목록을 반환합니다.
+    /chat 요청 시작 시점과 저장 직전에 호출하여, 요청 도중 끝난 작업 결과가 덮어써지지 않게 합니다.
+    stale 판정은 여기서만 합니다. workspace는 요청의 메모리 워크스페이스이므로 아직 저장하지 않은 새 검색 결과도 반영됩니다.
+    """
+    r = get_redis_client()
+    if r is None:
+        return []
+    pipe = r.pipeline()
+    pipe.lrange(_finished_key(session_id), 0, -1)
+    pipe.delete(_finished_key(session_id))
+    job_ids, _ = pipe.execute()
+
+    finished = []
+    for job_id in job_ids:
+        job = get_job(job_id)
+        if job is None:
+            continue
+        if job.get("status") == "succeeded":
+            if _is_stale(job, workspace):
+                # 작업 제출 뒤 새로 검색/클러스터링한 경우
+                print(f"⚠️ Job {job_id}: inputs changed since submission, results discarded")
+                _update_job(job_id, status="stale",
+                            message="작업 제출 후 검색 결과나 클러스터링이 바뀌어 결과를 반영하지 않았습니다.")
+                job = get_job(job_id) or job
+            else:
+                payload = get_redis_binary_client().get(f"{_job_key(job_id)}:result")
+                if payload:
+                    _merge_outputs(workspace, decode(payload))
+        _drop_pending(workspace, job_id)
+        finished.append(job)
+    return finished
+
+
+def cancel_job(job_id: str, session_id: str | None = None) -> dict | None:
+    """작업 취소를 요청합니다. 대기 중이면 바로 취소되고, 실행 중이면 다음 진행률 보고 시 중단됩니다."""
+    job = get_job(job_id, session_id)
+    if job is None:
+        return None
+    if job.get("status") in TERMINAL_STATUSES:
+        return job
+
+    _update_job(job_id, cancel_requested=True, message="취소 요청됨")
+    with _futures_lock:
+        future = _futures.get(job_id)
+    if future is not None and future.cancel():
+        print(f"🛑 Job {job_id} cancelled before start")
+    return get_job(job_id)
@@ -8,6 +8,7 @@ import gzip
 
 #--웹 서버와 api 요청/응답 처리 지원--
 from fastapi import FastAPI, Request, Response, HTTPException
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware # 1. 이 줄을 추가합니다.
 
 #--데이터 모델 정의
@@ -21,12 +22,17 @@ from openai.types.chat import ChatCompletionMessage
 from dotenv import load_dotenv
 import uuid
 from agents.tools import tools, available_functions,suggest_next_step,create_new_workspace
+from agents.jobs import JOB_TOOLS, TERMINAL_STATUSES, submit_job, get_job, cancel_job, apply_finished_jobs
+from agents.artifact_summary import artifact_summaries
+from agents.workspace_store import workspace_response, load_artifact
+from agents.web_table import get_web_results, count_web_results
+from agents.sentiment import get_cache_stats
 from pydantic import BaseModel
 
 #--내부 모듈 함수
-from agents.utils import ( get_openai_client,
-    save_workspace_to_redis, load_workspace_from_redis,MODEL_NAME, setup_logging
+from agents.utils import ( get_openai_client, MODEL_NAME, setup_logging
 )
+from agents.workspace_session import WorkspaceUnitOfWork, WorkspaceUnavailable
 
 
 
@@ -79,8 +85,10 @@ SYSTEM_PROMPT = """
              - `run_ward_clustering(workspace)`: 데이터 검색 후 첫 분석.
              - `run_semantic_network_analysis(workspace, cluster_id)`: `cluster_id` 지정 시.
              - `run_topic_modeling_lda(workspace, cluster_id)`: `cluster_id` 지정 시.
+             - `run_topic_modeling_lda_all(workspace)`: 모든 클러스터의 토픽을 한 번에 분석할 때.
              - `calculate_opportunity_scores(workspace)`: 토픽 모델링 완료 후.
              - `create_customer_action_map(workspace, topic_id)`: `topic_id` 지정 시.
+           - `run_ward_clustering`, `run_topic_modeling_lda_all`, `calculate_opportunity_scores`는 백그라운드 작업으로 실행되며 도구 결과에 `job`(작업 ID)이 포함됩니다. 이 경우 작업이 진행 중임을 알리고, 완료 후 결과를 확인하도록 안내하세요. 작업이 끝나기 전에는 그 결과에 의존하는 다음 도구를 호출하지 마세요.
            - 자연어 요청 예: "클러스터링 해줘" → `run_ward_clustering`.
            - JSON 요청 예: `{{ "type": "chat_message", "content": "0번 클러스터에 대해 SNA 분석해줘" }}` → `run_semantic_network_analysis`.
 
@@ -151,12 +159,16 @@ app.add_middleware(
 class UserRequest(BaseModel):
     session_id: str | None = None
     message: str
+    include_artifacts: bool = False  # True면 이전 응답 형식: workspace.artifacts와 artifacts에 모든 아티팩트
 #서버 응답 데이터 모델
 class ChatResponse(BaseModel):
     response_message: str
     workspace: dict
     user_history: list
+    # 기본은 이 요청에서 바뀐 아티팩트만 담습니다. 나머지는 GET /sessions/{id}/artifacts/{name}으로 받고,
+    # 모든 아티팩트가 필요한 클라이언트는 요청에 include_artifacts=true를 보냅니다. (이때 workspace.artifacts도 채워짐)
     artifacts: dict
+    artifact_summaries: dict = {}
     error: str | None = None
 
 #internal_history의 메시지를 검증하여 tooll 메시지가 유효한 tool_call_id를 가지는지 확인합니다.---
@@ -219,52 +231,8 @@ def trim_history(history: List[Union[Dict, ChatCompletionMessage]]):
 #----워크스페이스의 내용들 요약생성 system_prompt에 전달된다 ------
 def summarize_artifact(artifacts: dict) -> str:
     """워크스페이스의 아티팩트를 요약하여 LLM 프롬프트에 포함할 문자열을 생성합니다."""
-    summary_parts = []
-
-    if not artifacts:
-        return "현재 워크스페이스에 저장된 아티팩트가 없습니다."
-
-    for key, value in artifacts.items():
-        if key == "retrieved_data" and value and value.get("web_results"):
-            summary_parts.append(f"- 검색된 VOC 데이터: {len(value['web_results'])}건")
-        elif key == "cx_ward_clustering_results" and value and value.get("cluster_summaries"):
-            summary_parts.append(f"- 워드 클러스터링: {len(value['cluster_summaries'])}개 클러스터")
-        elif key == "cx_lda_results" and value and value.get("topics"):
-            summary_parts.append(f"- 토픽 모델링: {len(value['topics'])}개 토픽")
-        elif key == "cx_cam_results" and value:
-            summary_parts.append(f"- 고객 행동 맵: {len(value)}개 생성됨")
-        elif key == "cx_opportunity_scores" and value:
-            summary_parts.append(f"- 기회 점수 분석: {len(value)}개 완료됨")
-        elif key == "cx_sna_results" and value:
-            summary_parts.append(f"- 의미 네트워크 분석: {len(value)}개 완료됨")
-        elif key == "personas" and value and isinstance(value, list):
-            names = ", ".join([p.get("name", "이름 없음") for p in value])
-            summary_parts.append(f"- 페르소나: {len(value)}개 ({names})")
-        elif key == "selected_persona" and value and value.get("name"):
-            summary_parts.append(f"- 현재 선택된 페르소나: {value['name']}")
-        elif key == "service_ideas" and value and isinstance(value, list):
-            names = ", ".join([s.get("service_name", "이름 없음") for s in value])
-            summary_parts.append(f"- 서비스 아이디어: {len(value)}개 ({names})")
-        elif key == "selected_service_idea" and value and value.get("service_name"):
-            summary_parts.append(f"- 현재 선택된 서비스 아이디어: {value['service_name']}")
-        elif key == "data_plan_for_service" and value and isinstance(value, list):
-            names = ", ".join([p.get("service_name", "이름 없음") for p in value])
-            summary_parts.append(f"- 데이터 기획안: {len(value)}개 ({names})")
-        elif key == "selected_data_plan_for_service" and value and value.get("service_name"):
-            summary_parts.append(f"- 현재 선택된 데이터 기획안: {value['service_name']}")
-        elif key == "cdp_definition" and value:
-            summary_parts.append(f"- C-D-P 정의서: {len(value)}개 생성됨")
-        elif key == "sensor_data" and value:
-            summary_parts.append(f"- 센서 데이터: {len(value)}건")
-        elif key == "product_data" and value:
-            summary_parts.append(f"- 제품 데이터: {len(value)}건")
-        elif key == "columns_product" and value:
-            summary_parts.append(f"- 제품 메타데이터: {len(value)}개 필드")
-        elif key == "data_plan_recommendation_message" and value:
-            summary_parts.append(f"- 데이터 기획 추천 메시지: 저장됨")
-        elif key == "selected_cdp_definition" and value:
-            summary_parts.append(f"- 현재 선택된 C-D-P 정의서: 저장됨")
-        # conversation_state는 artifacts 외부에서 관리하므로 여기서 제외
+    # 요약은 저장 시 meta에 함께 저장되므로, 지연 로딩 아티팩트를 Redis에서 읽지 않습니다. (agents/artifact_summary.py)
+    summary_parts = list(artifact_summaries(artifacts).values())
 
     if not summary_parts:
         return "현재 워크스페이스에 저장된 아티팩트가 없습니다."
@@ -340,7 +308,6 @@ async def handle_json_request(message_dict: dict, workspace: dict, session_id: s
             response_to_user = f"⚠️ {function_name} 실행 실패: {result_artifact['error']}"
         #함수가 잘 호출이 된 경우,값 저장 후 반환
         else:
-            save_workspace_to_redis(session_id, workspace)
             # 다음 단계 제안
             next_step = suggest_next_step(workspace)
             response_to_user = f"{function_name} 작업이 완료되었습니다. 다음 단계를 진행하시겠습니까?\n\n📌 다음 단계 제안: {next_step}"
@@ -404,7 +371,6 @@ async def run_agent_and_get_response(user_message: str, workspace: dict, session
         append_to_history(workspace, {"role": "assistant", "content": response_to_user})
         workspace["internal_history"] = trim_history(workspace["internal_history"])
         workspace["user_history"] = trim_history(workspace["user_history"])
-        save_workspace_to_redis(session_id, workspace)
         return response_to_user, workspace
 
 
@@ -412,7 +378,7 @@ async def run_agent_and_get_response(user_message: str, workspace: dict, session
     current_artifacts_summary = summarize_artifact(workspace.get("artifacts", {}))
 
     #검색 결과값 있는지 확인
-    has_retrieved_data = bool(workspace.get("artifacts", {}).get("retrieved_data"))
+    has_retrieved_data = "retrieved_data" in artifact_summaries(workspace.get("artifacts", {}))
 
     if not workspace["last_request_type"]:
         workspace["last_request_type"] = "없음"
@@ -467,7 +433,15 @@ async def run_agent_and_get_response(user_message: str, workspace: dict, session
 
                     #------------호출된 함수의 종류에 따른 분기점----------------
                     try:
-                        result_artifact = await asyncio.to_thread(function_to_call, workspace=workspace, **function_args)
+                        # CPU 집약 도구는 작업(job)으로 제출하고 바로 작업 ID를 돌려줍니다. (Redis가 없으면 동기 실행)
+                        job = None
+                        if function_name in JOB_TOOLS:
+                            job = await asyncio.to_thread(submit_job, session_id, function_name, workspace, function_args)
+                        if job:
+                            workspace.setdefault("pending_jobs", []).append({"job_id": job["job_id"], "tool": function_name})
+                            result_artifact = {"job_id": job["job_id"], "status": job["status"]}
+                        else:
+                            result_artifact = await asyncio.to_thread(function_to_call, workspace=workspace, **function_args)
 
                        
                         #결과값에 에러가 가 있는 경우
@@ -487,6 +461,11 @@ async def run_agent_and_get_response(user_message: str, workspace: dict, session
                             "success": "error" not in result_artifact,
                             "details": artifact_summary
                             }
+                        if job:
+                            tool_summary_content["job"] = result_artifact
+                            tool_summary_content["details"] = (
+                                f"작업 {job['job_id']}으로 백그라운드에서 실행 중입니다. 완료되면 결과가 워크스페이스에 반영됩니다."
+                            )
                         #최종 결과 정리해서 tool role로 openai용 생성
                         tool_outputs_to_append.append({
                             "role": "tool",
@@ -521,9 +500,6 @@ async def run_agent_and_get_response(user_message: str, workspace: dict, session
             append_to_history(workspace, tool_outputs_to_append if len(tool_outputs_to_append) > 1 else tool_outputs_to_append[0])
             workspace["internal_history"] = trim_history(workspace["internal_history"])
             workspace["user_history"] = trim_history(workspace["user_history"])
-           
-            #모든 답변과 함께 업데이트된 workspace 저장하기 
-            save_workspace_to_redis(session_id, workspace)
 
             #에러가 있는 경우, 답변 생성 에러관련
             if collected_error_messages:
@@ -533,7 +509,7 @@ async def run_agent_and_get_response(user_message: str, workspace: dict, session
 
             #두 번째 LLM 호출 전 artifacts 상태 재확인 및 system prompt 생성하기
             current_artifacts_summary = summarize_artifact(workspace.get("artifacts", {}))
-            has_retrieved_data = bool(workspace.get("artifacts", {}).get("retrieved_data"))
+            has_retrieved_data = "retrieved_data" in artifact_summaries(workspace.get("artifacts", {}))
             system_message_content = SYSTEM_PROMPT.format(
                 artifacts_summary=current_artifacts_summary,
                 has_retrieved_data=str(has_retrieved_data),
@@ -558,7 +534,6 @@ async def run_agent_and_get_response(user_message: str, workspace: dict, session
 
             workspace["internal_history"] = trim_history(workspace["internal_history"])
             workspace["user_history"] = trim_history(workspace["user_history"])
-            save_workspace_to_redis(session_id, workspace)
 
             response_to_user = final_llm_content
             return response_to_user, workspace
@@ -572,21 +547,29 @@ async def run_agent_and_get_response(user_message: str, workspace: dict, session
             else:
                 response_to_user = "어떤 도움을 드릴까요?"
                 append_to_history(workspace, {"role": "assistant", "content": response_to_user})
-            ###저장 최종으로 
-                workspace["internal_history"] = trim_history(workspace["internal_history"])
-                workspace["user_history"] = trim_history(workspace["user_history"])
-                save_workspace_to_redis(session_id, workspace)
-                return response_to_user, workspace
+            workspace["internal_history"] = trim_history(workspace["internal_history"])
+            workspace["user_history"] = trim_history(workspace["user_history"])
+            return response_to_user, workspace
         
     ## 이 모든 과정에서 생성되는 오류 
     except Exception as e:
         logger.error(f"Agent execution error: {e}", exc_info=True)
         error_message = f"🚨 에이전트 실행 중 오류 발생: {str(e)}"
         append_to_history(workspace, {"role": "assistant", "content": error_message})
-        save_workspace_to_redis(session_id, workspace)
         return error_message, workspace
     
 
+def _apply_finished_jobs(session_id: str, workspace: dict):
+    """끝난 작업 결과를 워크스페이스에 반영하고, 실패/취소된 작업은 대화 기록에 남깁니다."""
+    for job in apply_finished_jobs(session_id, workspace):
+        if job.get("status") == "failed":
+            append_to_history(workspace, {"role": "assistant", "content": f"⚠️ 작업 '{job.get('tool')}' 실행 실패: {job.get('error')}"})
+        elif job.get("status") == "cancelled":
+            append_to_history(workspace, {"role": "assistant", "content": f"🛑 작업 '{job.get('tool')}'이(가) 취소되었습니다."})
+        elif job.get("status") == "stale":
+            append_to_history(workspace, {"role": "assistant", "content": f"⚠️ 작업 '{job.get('tool')}' 결과를 반영하지 않았습니다: {job.get('message')}"})
+
+
 @app.get("/")
 def read_root():
     return {"message": "MCP 서버가 성공적으로 실행되었습니다."}
@@ -598,36 +581,120 @@ async def chat_endpoint(user_request: UserRequest, response: Response):
     logger.info(f"Session ID: {session_id}")
 
 
-    ##session_id에 따른 wroksapce 가져오기
-    workspace = load_workspace_from_redis(session_id)
-    if not workspace or not isinstance(workspace, dict):
-        workspace = create_new_workspace()
-        logger.info(f"New workspace initialized for session: {session_id}")
+    # 워크스페이스는 요청 시작 시 한 번 불러오고, 요청이 끝날 때 한 번만 저장합니다. (agents/workspace_session.py)
+    # 끝난 작업(job) 결과는 불러온 직후와 저장 직전에 반영되어 이 저장으로 덮어써지지 않습니다.
+    try:
+        async with WorkspaceUnitOfWork(session_id, new_workspace=create_new_workspace,
+                                       merge_external=_apply_finished_jobs) as uow:
+            error = None
+            try:
+                assistant_response_content, uow.workspace = await run_agent_and_get_response(
+                    user_message=user_request.message,
+                    workspace=uow.workspace,
+                    session_id=session_id
+                )
+            except Exception as e:
+                logger.error(f"Chat endpoint error: {e}", exc_info=True)
+                assistant_response_content = f"🚨 서버 오류: {str(e)}"
+                append_to_history(uow.workspace, {"role": "assistant", "content": assistant_response_content})
+                error = str(e)
+            await uow.commit()
+    except WorkspaceUnavailable as e:
+        # 빈 워크스페이스로 진행하면 저장 시 기존 세션을 덮어쓰므로 요청을 거절합니다.
+        logger.error(f"Chat endpoint error: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+
+    response.headers["X-Session-ID"] = session_id
+    response.headers.update(uow.response_headers())
+    response_workspace, changed_artifacts = workspace_response(
+        uow.workspace, uow.stats["changed_artifacts"], include_artifacts=user_request.include_artifacts)
+    return {
+        "response_message": assistant_response_content,
+        "workspace": response_workspace,
+        "user_history": response_workspace.get("user_history", []),
+        "artifacts": changed_artifacts,
+        "artifact_summaries": response_workspace["artifact_summaries"],
+        "error": error
+    }
+
+
+@app.get("/sessions/{session_id}/artifacts/{name}")
+def get_artifact(session_id: str, name: str):
+    try:
+        return {"name": name, "value": load_artifact(session_id, name)}
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"아티팩트를 찾을 수 없습니다: {name}")
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
 
+@app.get("/sessions/{session_id}/web_results")
+def get_session_web_results(session_id: str, offset: int = 0, limit: int = 100):
+    """
+    검색 결과 전체 행을 나눠서 반환합니다. retrieved_data 아티팩트에는 표 참조와 web_results_preview(앞 10건)만 들어 있어,
+    예전처럼 retrieved_data.web_results를 읽던 클라이언트는 이 엔드포인트로 행을 받습니다.
+    """
+    offset, limit = max(offset, 0), min(max(limit, 1), 1000)
     try:
-        assistant_response_content, updated_workspace = await run_agent_and_get_response(
-            user_message=user_request.message,
-            workspace=workspace,
-            session_id=session_id
-        )
-        response.headers["X-Session-ID"] = session_id
-        save_workspace_to_redis(session_id, updated_workspace)
-        return {
-            "response_message": assistant_response_content,
-            "workspace": updated_workspace,
-            "user_history": updated_workspace.get("user_history", []),
-            "artifacts": updated_workspace.get("artifacts", {}),
-            "error": None
-        }
+        retrieved_data = load_artifact(session_id, "retrieved_data")
+        web_results = get_web_results(retrieved_data)
+        rows = [dict(row) for row in web_results[offset:offset + limit]]
+    except (KeyError, FileNotFoundError):
+        raise HTTPException(status_code=404, detail="검색 결과를 찾을 수 없습니다. 데이터를 다시 검색해 주세요.")
     except Exception as e:
-        logger.error(f"Chat endpoint error: {e}", exc_info=True)
-        error_message = f"🚨 서버 오류: {str(e)}"
-        append_to_history(workspace, {"role": "assistant", "content": error_message})
-        save_workspace_to_redis(session_id, workspace)
-        return {
-            "response_message": error_message,
-            "workspace": workspace,
-            "user_history": workspace.get("user_history", []),
-            "artifacts": workspace.get("artifacts", {}),
-            "error": str(e)
-        }
\ No newline at end of file
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"total": count_web_results(retrieved_data), "offset": offset, "limit": limit, "web_results": rows}
+
+
+@app.get("/stats/sentiment-cache")
+def sentiment_cache_stats(include_size: bool = False):
+    """이 서버 프로세스의 감성 캐시 적중률/절약 시간. include_size=true면 저장된 항목 수도 셉니다. (Redis SCAN)"""
+    return get_cache_stats(include_size=include_size)
+
+
+#-----작업(job) 상태 조회/취소------------------------------
+# 작업은 제출한 세션에서만 볼 수 있습니다. EventSource는 헤더를 붙일 수 없으므로 세션 ID는 쿼리로 받습니다. (?session_id=)
+@app.get("/jobs/{job_id}")
+def get_job_status(job_id: str, session_id: str):
+    job = get_job(job_id, session_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"작업을 찾을 수 없습니다: {job_id}")
+    return job
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, session_id: str, request: Request):
+    """작업 상태가 바뀔 때마다 Server-Sent Events로 전송하고, 작업이 끝나면 스트림을 닫습니다."""
+    if await asyncio.to_thread(get_job, job_id, session_id) is None:
+        raise HTTPException(status_code=404, detail=f"작업을 찾을 수 없습니다: {job_id}")
+
+    async def event_stream():
+        last_seq = None
+        idle_ticks = 0
+        while not await request.is_disconnected():
+            job = await asyncio.to_thread(get_job, job_id, session_id)
+            if job is None:
+                yield f"event: error\ndata: {json.dumps({'error': '작업 정보가 만료되었습니다.'}, ensure_ascii=False)}\n\n"
+                return
+            if job.get("seq") != last_seq:
+                last_seq = job.get("seq")
+                idle_ticks = 0
+                yield f"data: {json.dumps(job, ensure_ascii=False)}\n\n"
+                if job.get("status") in TERMINAL_STATUSES:
+                    return
+            else:
+                idle_ticks += 1
+                if idle_ticks % 30 == 0:  # 프록시가 연결을 끊지 않도록 약 15초마다 주석 한 줄
+                    yield ": keep-alive\n\n"
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.delete("/jobs/{job_id}")
+def cancel_job_endpoint(job_id: str, session_id: str):
+    job = cancel_job(job_id, session_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"작업을 찾을 수 없습니다: {job_id}")
+    return job
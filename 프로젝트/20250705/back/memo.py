@@ -0,0 +1,196 @@
+# agents/memo.py
+"""
+CX 분석 단계의 내용 기반(content-addressed) 메모이제이션입니다.
+(입력 데이터 지문, 함수 이름, 파라미터, 코드 버전)의 해시를 키로 결과를 디스크에 저장하므로,
+LLM이 같은 도구를 같은 인자로 다시 호출하거나 다른 세션이 같은 검색 결과를 분석할 때 다시 계산하지 않습니다.
+캐시는 MEMO_MAX_BYTES 를 넘으면 가장 오래 사용하지 않은 항목부터 지웁니다. (LRU, 파일 mtime 기준)
+항목은 워크스페이스와 같은 코덱(workspace_codec)으로 저장하므로 캐시 적중 결과가 직접 계산한 결과와 같은 값으로 돌아옵니다.
+(int 키, datetime 유지, NumPy 값은 숫자/리스트로) 코덱이 모르는 타입은 문자열로 바꾸지 않고 저장을 건너뜁니다.
+키에는 함수 모듈뿐 아니라 depends로 넘긴 모듈(그래프/감성/TF-IDF 구현 등)의 소스 해시와 config()가 돌려주는 설정값도
+들어가므로, 그 코드나 설정(SNA_GRAPH_MODE 등)이 바뀌면 이전 결과를 쓰지 않습니다.
+"""
+
+import os
+import json
+import time
+import inspect
+import hashlib
+import functools
+import threading
+
+from .artifact_store import artifact_exists, is_artifact_ref
+from .workspace_codec import serialize, frame, decode, default_format
+
+MEMO_DIR = os.getenv("MEMO_DIR", "./memo_cache")
+MEMO_MAX_BYTES = int(os.getenv("MEMO_MAX_BYTES", 512 * 1024 * 1024))
+MEMO_ENABLED = os.getenv("MEMO_ENABLED", "1") == "1"
+
+_evict_lock = threading.Lock()
+
+
+def _hash_json(obj) -> str:
+    return hashlib.sha1(json.dumps(obj, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+
+def _code_version(func, depends: tuple = ()) -> str:
+    """
+    함수가 정의된 모듈과 depends(모듈 또는 그 모듈의 함수) 소스의 해시.
+    코드가 바뀌면 이전 캐시는 자동으로 무효가 됩니다.
+    """
+    h = hashlib.sha1()
+    paths = []
+    for obj in (func, *depends):
+        try:
+            path = inspect.getsourcefile(obj)
+        except TypeError:
+            path = None
+        if path and path not in paths:
+            paths.append(path)
+    if not paths:
+        return "unknown"
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                h.update(f.read())
+        except OSError:
+            return "unknown"
+    return h.hexdigest()[:16]
+
+
+def _entry_path(key: str) -> str:
+    return os.path.join(MEMO_DIR, key[:2], f"{key}.memo")
+
+
+def _refs_available(obj) -> bool:
+    """캐시된 결과가 가리키는 아티팩트 파일이 아직 남아 있는지 확인합니다."""
+    if is_artifact_ref(obj):
+        return artifact_exists(obj)
+    if isinstance(obj, dict):
+        return all(_refs_available(v) for v in obj.values())
+    if isinstance(obj, list):
+        return all(_refs_available(v) for v in obj)
+    return True
+
+
+def _read_entry(key: str) -> dict | None:
+    path = _entry_path(key)
+    try:
+        with open(path, "rb") as f:
+            entry = decode(f.read())
+    except OSError:
+        return None
+    except Exception as e:
+        print(f"⚠️ Memo entry {key} is unreadable, ignoring: {e}")
+        return None
+    if not _refs_available(entry.get("artifacts")):
+        return None
+    os.utime(path)  # LRU: 최근 사용 시각 갱신
+    return entry
+
+
+def _write_entry(key: str, entry: dict):
+    fmt = default_format()
+    payload = frame(serialize(entry, fmt), fmt)  # 모르는 타입이면 TypeError
+    path = _entry_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+    _evict_if_needed()
+
+
+def _evict_if_needed():
+    """캐시 디렉터리 크기가 MEMO_MAX_BYTES를 넘으면 오래 사용하지 않은 파일부터 삭제합니다."""
+    with _evict_lock:
+        files = []
+        for root, _, names in os.walk(MEMO_DIR):
+            for name in names:
+                # 이전 형식(.json) 항목은 더 이상 읽지 않으므로 오래된 순서대로 함께 지워집니다.
+                if name.endswith((".memo", ".json")):
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    files.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= MEMO_MAX_BYTES:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+def memoize_cx_step(inputs, outputs: tuple = (), merge_outputs: tuple = (), on_hit=None,
+                    depends: tuple = (), config=None):
+    """
+    워크스페이스를 받는 CX 분석 도구 함수를 메모이제이션합니다.
+    Args:
+        inputs: artifacts -> 입력 데이터 지문(JSON 직렬화 가능 값)을 만드는 함수. None을 반환하면 캐시하지 않습니다.
+        outputs: 함수가 덮어쓰는 artifacts 키. 캐시 적중 시 저장된 값으로 그대로 복원합니다.
+        merge_outputs: 함수가 항목을 추가하는 dict 형태의 artifacts 키. 캐시 적중 시 기존 값에 병합합니다.
+        on_hit: 캐시 적중 후 호출할 함수 (workspace, previous) -> None. previous는 복원 전 outputs 값. (예: 백그라운드 작업 재예약)
+        depends: 결과에 영향을 주는 다른 모듈(또는 그 모듈의 함수). 소스가 바뀌면 캐시가 무효가 됩니다.
+        config: 결과에 영향을 주는 설정값 dict를 반환하는 함수. 호출할 때마다 키에 들어갑니다.
+    오류 결과({"error": ...})는 저장하지 않습니다.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        code_version = _code_version(func, depends)
+
+        @functools.wraps(func)
+        def wrapper(workspace, *args, **kwargs):
+            if not MEMO_ENABLED:
+                return func(workspace, *args, **kwargs)
+            artifacts = workspace.get("artifacts", {})
+            try:
+                fingerprint = inputs(artifacts)
+            except Exception:
+                fingerprint = None
+            if fingerprint is None:
+                return func(workspace, *args, **kwargs)
+
+            bound = signature.bind(workspace, *args, **kwargs)
+            bound.apply_defaults()
+            params = {k: v for k, v in bound.arguments.items() if k != "workspace"}
+            key = _hash_json({
+                "func": func.__name__,
+                "params": params,
+                "inputs": _hash_json(fingerprint),
+                "code": code_version,
+                "config": config() if config else None,
+            })
+
+            entry = _read_entry(key)
+            if entry is not None:
+                print(f"⚡ Memo hit: {func.__name__}({params})")
+                previous = {name: artifacts.get(name) for name in outputs}
+                artifacts.update(entry["artifacts"])
+                for name, value in entry["merge"].items():
+                    artifacts[name] = {**(artifacts.get(name) or {}), **value}
+                if on_hit:
+                    on_hit(workspace, previous)
+                return entry["result"]
+
+            started = time.perf_counter()
+            result = func(workspace, *args, **kwargs)
+            if isinstance(result, dict) and "error" not in result:
+                try:
+                    _write_entry(key, {
+                        "func": func.__name__,
+                        "params": params,
+                        "seconds": round(time.perf_counter() - started, 3),
+                        "result": result,
+                        "artifacts": {name: artifacts.get(name) for name in outputs},
+                        "merge": {name: artifacts.get(name) or {} for name in merge_outputs},
+                    })
+                except (OSError, TypeError, ValueError, OverflowError) as e:
+                    print(f"⚠️ Memo write failed for {func.__name__}: {e}")
+            return result
+
+        return wrapper
+    return decorator
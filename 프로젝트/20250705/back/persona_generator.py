@@ -2,6 +2,7 @@
 
 import json
 from .utils import get_openai_client
+from .web_table import web_column
 
 
 def _call_persona_llm(prompt: str):
@@ -28,8 +29,7 @@ def create_personas(workspace: dict, num_personas: int = 3, focus_topic_ids: lis
         return {"error": "페르소나를 생성하려면 먼저 '데이터 검색'을 통해 고객의 목소리를 수집해야 합니다."}
 
     # 2. 데이터 추출 및 샘플링
-    web_results = retrieved_data.get("web_results", [])
-    raw_texts_sample = "\n- ".join([d.get('original_text', '') for d in web_results if d.get('original_text')][:30])
+    raw_texts_sample = "\n- ".join([text for text in web_column(retrieved_data, "original_text") if text][:30])
 
     # 3. 선택적 데이터 (제품군, 분석 결과) 처리
     product_type = artifacts.get("product_type")
@@ -0,0 +1,104 @@
+# agents/precompute.py
+"""
+군집화 직후 다음 단계(SNA/LDA)를 미리 계산해 두는 백그라운드 스케줄러입니다.
+- 작업은 우선순위 큐에 쌓이고, 전용 스레드가 낮은 우선순위(nice)의 단일 워커 프로세스에서 하나씩 실행합니다.
+  사용자 요청으로 실행되는 도구 호출과 CPU를 다투지 않도록 워커는 하나만 둡니다.
+- 모든 작업은 세대(generation, 군집화 결과 ID)에 묶여 있어, 다시 군집화하면 이전 세대 작업은 취소되고 결과도 버립니다.
+- 도구 함수는 get()으로 미리 계산된 결과가 있는지 확인하고, 있으면 바로 반환합니다.
+"""
+
+import os
+import queue
+import itertools
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+PRECOMPUTE_ENABLED = os.getenv("PRECOMPUTE_ENABLED", "1") == "1"
+PRECOMPUTE_MAX_RESULTS = int(os.getenv("PRECOMPUTE_MAX_RESULTS", 64))
+
+
+def _lower_priority():
+    """워커 프로세스 초기화: OS 스케줄링 우선순위를 낮춥니다. (nice를 지원하지 않는 OS는 그대로 실행)"""
+    try:
+        os.nice(10)
+    except (AttributeError, OSError):
+        pass
+
+
+class PrecomputeScheduler:
+    def __init__(self, max_results: int = PRECOMPUTE_MAX_RESULTS):
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()  # 같은 우선순위는 들어온 순서대로
+        self._lock = threading.Lock()
+        self._results = OrderedDict()  # (generation, kind, cluster_id, params) -> result (LRU)
+        self._pending = set()
+        self._cancelled = set()
+        self._max_results = max_results
+        self._executor = None
+        self._thread = None
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._executor = ProcessPoolExecutor(max_workers=1, initializer=_lower_priority)
+            self._thread = threading.Thread(target=self._run, name="precompute-scheduler", daemon=True)
+            self._thread.start()
+
+    def submit(self, generation: str, kind: str, cluster_id, params, func, args: tuple, priority: int = 10) -> bool:
+        """작업을 큐에 넣습니다. 이미 결과가 있거나 대기 중인 작업이면 무시하고 False를 반환합니다."""
+        key = (generation, kind, str(cluster_id), params)
+        with self._lock:
+            if key in self._results or key in self._pending:
+                return False
+            self._cancelled.discard(generation)
+            self._pending.add(key)
+            self._ensure_worker()
+        self._queue.put((priority, next(self._seq), key, func, args))
+        return True
+
+    def cancel_generation(self, generation: str):
+        """해당 세대의 대기 작업을 취소하고, 실행 중인 작업의 결과와 이미 저장된 결과를 버립니다."""
+        if not generation:
+            return
+        with self._lock:
+            self._cancelled.add(generation)
+            self._pending = {k for k in self._pending if k[0] != generation}
+            for key in [k for k in self._results if k[0] == generation]:
+                del self._results[key]
+        print(f"🧹 Precompute: cancelled stale jobs for clustering {generation}")
+
+    def get(self, generation: str, kind: str, cluster_id, params=None):
+        """미리 계산된 결과를 반환합니다. 없으면 None."""
+        if not generation:
+            return None
+        key = (generation, kind, str(cluster_id), params)
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+            return result
+
+    def _run(self):
+        while True:
+            _, _, key, func, args = self._queue.get()
+            generation = key[0]
+            with self._lock:
+                if generation in self._cancelled or key not in self._pending:
+                    continue
+            try:
+                result = self._executor.submit(func, *args).result()
+            except Exception as e:
+                print(f"⚠️ Precompute job {key[1]} for cluster {key[2]} failed: {e}")
+                result = None
+
+            with self._lock:
+                self._pending.discard(key)
+                if result is None or generation in self._cancelled:
+                    continue
+                self._results[key] = result
+                while len(self._results) > self._max_results:
+                    self._results.popitem(last=False)
+            print(f"✅ Precompute: {key[1]} for cluster {key[2]} ready")
+
+
+precompute_scheduler = PrecomputeScheduler()
@@ -0,0 +1,327 @@
+# agents/qdrant_snapshot.py
+"""
+Qdrant 컬렉션을 Parquet(Arrow) 파일로 내보내고 다시 적재하는 스냅샷 도구입니다.
+새 노드에서 web_data / product_data / sensor_data / product_metadata 를 다시 만들 때
+원본 CSV 임베딩을 다시 돌리지 않고 벡터와 페이로드를 그대로 옮길 수 있습니다.
+
+사용 예:
+    python -m agents.qdrant_snapshot export web_data --out ./snapshots
+    python -m agents.qdrant_snapshot import web_data --src ./snapshots --workers 4
+"""
+
+import os
+import json
+import glob
+import argparse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from qdrant_client.http.models import PointStruct, VectorParams, Distance
+from .utils import get_qdrant_client
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow가 없으면 스냅샷 기능만 비활성화
+    pa = None
+    pq = None
+
+
+SNAPSHOT_COLLECTIONS = ["web_data", "product_data", "sensor_data", "product_metadata"]
+SNAPSHOT_FORMAT_VERSION = 1
+
+# 벡터 컬럼 이름 접두어. 이름 없는(단일) 벡터는 "vector" 컬럼 하나로 저장합니다.
+VECTOR_COLUMN_PREFIX = "vector__"
+UNNAMED_VECTOR_COLUMN = "vector"
+# 스키마에 없는 키나 타입이 맞지 않는 값은 이 컬럼에 JSON으로 모아 둡니다.
+EXTRA_PAYLOAD_COLUMN = "_extra_payload"
+METADATA_KEY = b"qdrant_snapshot"
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("스냅샷 기능을 사용하려면 pyarrow가 필요합니다. 'pip install pyarrow'로 설치해주세요.")
+
+
+def _get_vector_config(client, collection_name: str) -> dict:
+    """컬렉션의 벡터 설정을 {벡터이름: {"size", "distance"}} 형태로 반환합니다. (단일 벡터는 이름이 "")"""
+    vectors = client.get_collection(collection_name).config.params.vectors
+    if isinstance(vectors, dict):
+        return {name: {"size": params.size, "distance": str(params.distance.value)} for name, params in vectors.items()}
+    return {"": {"size": vectors.size, "distance": str(vectors.distance.value)}}
+
+
+def _vector_column(name: str) -> str:
+    return UNNAMED_VECTOR_COLUMN if name == "" else f"{VECTOR_COLUMN_PREFIX}{name}"
+
+
+def _infer_payload_schema(records) -> tuple[list, list]:
+    """
+    첫 페이지의 페이로드로 컬럼 타입을 추론합니다.
+    스칼라 값은 Arrow 타입 그대로, dict/list 같은 중첩 값은 JSON 문자열 컬럼으로 저장합니다.
+    Returns:
+        (pa.field 리스트, JSON 컬럼 이름 리스트)
+    """
+    keys = []
+    for record in records:
+        for key in (record.payload or {}):
+            if key not in keys:
+                keys.append(key)
+
+    fields, json_columns = [], []
+    for key in keys:
+        values = [record.payload.get(key) for record in records if record.payload and record.payload.get(key) is not None]
+        if any(isinstance(v, (dict, list)) for v in values):
+            fields.append(pa.field(key, pa.string()))
+            json_columns.append(key)
+            continue
+        try:
+            inferred = pa.array(values).type if values else pa.string()
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            inferred = None
+        if inferred is None or pa.types.is_null(inferred):
+            fields.append(pa.field(key, pa.string()))
+            json_columns.append(key)
+        else:
+            fields.append(pa.field(key, inferred))
+    return fields, json_columns
+
+
+def _build_schema(vector_config: dict, payload_fields: list, json_columns: list, collection_name: str):
+    fields = [pa.field("id", pa.string())]
+    for name, params in vector_config.items():
+        fields.append(pa.field(_vector_column(name), pa.list_(pa.float32(), params["size"])))
+    fields.extend(payload_fields)
+    fields.append(pa.field(EXTRA_PAYLOAD_COLUMN, pa.string()))
+
+    metadata = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "collection": collection_name,
+        "vectors": vector_config,
+        "json_columns": json_columns,
+    }
+    return pa.schema(fields, metadata={METADATA_KEY: json.dumps(metadata, ensure_ascii=False).encode("utf-8")})
+
+
+def _records_to_batch(records, schema, vector_config: dict, json_columns: list):
+    """scroll로 받은 한 페이지를 RecordBatch로 변환합니다. 페이지 단위로만 메모리에 올립니다."""
+    payload_fields = [f for f in schema if f.name != "id" and f.name != EXTRA_PAYLOAD_COLUMN
+                      and not f.name.startswith(VECTOR_COLUMN_PREFIX) and f.name != UNNAMED_VECTOR_COLUMN]
+    known_keys = {f.name for f in payload_fields}
+    extras = [dict() for _ in records]
+    arrays = [pa.array([str(record.id) for record in records], type=pa.string())]
+
+    for name, params in vector_config.items():
+        flat = []
+        for record in records:
+            vec = record.vector.get(name) if isinstance(record.vector, dict) else record.vector
+            if vec is None or len(vec) != params["size"]:
+                raise ValueError(f"포인트 {record.id}의 '{name or '(기본)'}' 벡터가 없거나 차원이 맞지 않습니다.")
+            flat.extend(vec)
+        values = pa.array(flat, type=pa.float32())
+        arrays.append(pa.FixedSizeListArray.from_arrays(values, params["size"]))
+
+    for field in payload_fields:
+        column = [(record.payload or {}).get(field.name) for record in records]
+        if field.name in json_columns:
+            column = [json.dumps(v, ensure_ascii=False) if v is not None else None for v in column]
+        try:
+            arrays.append(pa.array(column, type=field.type))
+        except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+            # 첫 페이지와 타입이 다른 값이 섞여 있으면 해당 페이지 값은 추가 페이로드로 보냅니다.
+            for i, v in enumerate(column):
+                if v is not None:
+                    extras[i][field.name] = v
+            arrays.append(pa.nulls(len(records), type=field.type))
+
+    for i, record in enumerate(records):
+        for key, v in (record.payload or {}).items():
+            if key not in known_keys:
+                extras[i][key] = v
+    arrays.append(pa.array([json.dumps(e, ensure_ascii=False) if e else None for e in extras], type=pa.string()))
+
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def export_collection(collection_name: str, out_dir: str, page_size: int = 1000, rows_per_file: int = 1_000_000) -> dict:
+    """
+    컬렉션 전체를 scroll로 순회하며 Parquet 파일로 스트리밍 저장합니다.
+    한 번에 한 페이지(page_size)만 메모리에 올리고, rows_per_file 마다 새 파일로 나눕니다.
+    """
+    _require_pyarrow()
+    client = get_qdrant_client()
+    vector_config = _get_vector_config(client, collection_name)
+    target_dir = os.path.join(out_dir, collection_name)
+    os.makedirs(target_dir, exist_ok=True)
+
+    print(f"📦 Exporting '{collection_name}' → {target_dir}")
+    schema, json_columns = None, []
+    writer, file_index, rows_in_file, total = None, 0, 0, 0
+    files = []
+    offset = None
+
+    try:
+        while True:
+            records, offset = client.scroll(
+                collection_name=collection_name,
+                limit=page_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True,
+            )
+            if not records:
+                break
+
+            if schema is None:
+                payload_fields, json_columns = _infer_payload_schema(records)
+                schema = _build_schema(vector_config, payload_fields, json_columns, collection_name)
+
+            if writer is None or rows_in_file >= rows_per_file:
+                if writer is not None:
+                    writer.close()
+                path = os.path.join(target_dir, f"part-{file_index:05d}.parquet")
+                writer = pq.ParquetWriter(path, schema, compression="zstd")
+                files.append(path)
+                file_index += 1
+                rows_in_file = 0
+
+            batch = _records_to_batch(records, schema, vector_config, json_columns)
+            writer.write_batch(batch)
+            rows_in_file += batch.num_rows
+            total += batch.num_rows
+            print(f"  ↳ {total} points exported")
+
+            if offset is None:
+                break
+    finally:
+        if writer is not None:
+            writer.close()
+
+    print(f"✅ Export complete: {collection_name} ({total} points, {len(files)} files)")
+    return {"collection": collection_name, "points": total, "files": files}
+
+
+def _read_snapshot_metadata(parquet_file) -> dict:
+    raw = parquet_file.schema_arrow.metadata or {}
+    if METADATA_KEY not in raw:
+        raise ValueError("스냅샷 메타데이터가 없는 Parquet 파일입니다.")
+    return json.loads(raw[METADATA_KEY].decode("utf-8"))
+
+
+def _ensure_collection(client, collection_name: str, vector_config: dict):
+    if client.collection_exists(collection_name):
+        return
+    if list(vector_config.keys()) == [""]:
+        params = vector_config[""]
+        vectors = VectorParams(size=params["size"], distance=Distance(params["distance"]))
+    else:
+        vectors = {
+            name: VectorParams(size=params["size"], distance=Distance(params["distance"]))
+            for name, params in vector_config.items()
+        }
+    client.create_collection(collection_name=collection_name, vectors_config=vectors)
+    print(f"✅ 컬렉션 생성됨: {collection_name}")
+
+
+def _parse_point_id(raw_id: str):
+    return int(raw_id) if raw_id.isdigit() else raw_id
+
+
+def _batch_to_points(batch, metadata: dict) -> list:
+    vector_config = metadata["vectors"]
+    json_columns = set(metadata.get("json_columns", []))
+    columns = {name: batch.column(i) for i, name in enumerate(batch.schema.names)}
+    n = batch.num_rows
+
+    vectors = {}
+    for name, params in vector_config.items():
+        column = columns[_vector_column(name)]
+        vectors[name] = column.flatten().to_numpy(zero_copy_only=False).reshape(n, params["size"])
+
+    payload_names = [name for name in batch.schema.names if name != "id" and name != EXTRA_PAYLOAD_COLUMN
+                     and not name.startswith(VECTOR_COLUMN_PREFIX) and name != UNNAMED_VECTOR_COLUMN]
+    payload_columns = {name: columns[name].to_pylist() for name in payload_names}
+    ids = columns["id"].to_pylist()
+    extras = columns[EXTRA_PAYLOAD_COLUMN].to_pylist()
+
+    points = []
+    for i in range(n):
+        payload = {}
+        for name in payload_names:
+            v = payload_columns[name][i]
+            if v is None:
+                continue
+            payload[name] = json.loads(v) if name in json_columns else v
+        if extras[i]:
+            payload.update(json.loads(extras[i]))
+
+        if "" in vectors:
+            vector = vectors[""][i].tolist()
+        else:
+            vector = {name: vectors[name][i].tolist() for name in vectors}
+        points.append(PointStruct(id=_parse_point_id(ids[i]), vector=vector, payload=payload))
+    return points
+
+
+def import_collection(collection_name: str, src_dir: str, batch_size: int = 512, workers: int = 4) -> dict:
+    """
+    export_collection으로 만든 Parquet 파일들을 배치 단위로 읽어 병렬 upsert 합니다.
+    동시에 처리 중인 배치 수를 workers*2 개로 제한해 메모리 사용량을 일정하게 유지합니다.
+    """
+    _require_pyarrow()
+    client = get_qdrant_client()
+    files = sorted(glob.glob(os.path.join(src_dir, collection_name, "*.parquet")))
+    if not files:
+        raise FileNotFoundError(f"❌ '{collection_name}' 스냅샷 파일이 없습니다: {src_dir}")
+
+    print(f"📥 Importing '{collection_name}' from {len(files)} files (workers={workers})")
+    total = 0
+    max_in_flight = max(1, workers * 2)
+
+    def _upsert(points):
+        client.upsert(collection_name=collection_name, points=points, wait=True)
+        return len(points)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = set()
+        for path in files:
+            parquet_file = pq.ParquetFile(path)
+            metadata = _read_snapshot_metadata(parquet_file)
+            _ensure_collection(client, collection_name, metadata["vectors"])
+
+            for batch in parquet_file.iter_batches(batch_size=batch_size):
+                if len(in_flight) >= max_in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        total += future.result()
+                in_flight.add(executor.submit(_upsert, _batch_to_points(batch, metadata)))
+            print(f"  ↳ {os.path.basename(path)} queued ({total} points upserted so far)")
+
+        for future in in_flight:
+            total += future.result()
+
+    print(f"✅ Import complete: {collection_name} ({total} points)")
+    return {"collection": collection_name, "points": total}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Qdrant 컬렉션 Parquet 스냅샷 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = sub.add_parser("export", help="컬렉션을 Parquet 파일로 내보냅니다.")
+    export_parser.add_argument("collections", nargs="*", default=SNAPSHOT_COLLECTIONS)
+    export_parser.add_argument("--out", default="./snapshots")
+    export_parser.add_argument("--page-size", type=int, default=1000)
+    export_parser.add_argument("--rows-per-file", type=int, default=1_000_000)
+
+    import_parser = sub.add_parser("import", help="Parquet 스냅샷을 컬렉션으로 적재합니다.")
+    import_parser.add_argument("collections", nargs="*", default=SNAPSHOT_COLLECTIONS)
+    import_parser.add_argument("--src", default="./snapshots")
+    import_parser.add_argument("--batch-size", type=int, default=512)
+    import_parser.add_argument("--workers", type=int, default=4)
+
+    args = parser.parse_args()
+    for name in args.collections:
+        if args.command == "export":
+            export_collection(name, args.out, page_size=args.page_size, rows_per_file=args.rows_per_file)
+        else:
+            import_collection(name, args.src, batch_size=args.batch_size, workers=args.workers)
@@ -0,0 +1,282 @@
+# agents/sentiment.py
+"""
+배치 감성 분석 엔진입니다.
+문서를 하나씩 pipeline에 넣는 대신, 전체 문서를 중복 제거 → 토큰 길이순 정렬 → 동적 패딩 배치로
+한 번에 추론합니다. 입력 길이 제한은 글자 수가 아니라 토큰 수(max_length)로 자릅니다.
+이미 점수를 매긴 문장은 (모델 ID, sha1(text)) 캐시(TTL과 크기 상한이 있는 Redis 버킷)에서 꺼내 쓰고, 캐시에 없는 문장만 추론합니다.
+"""
+
+import hashlib
+import os
+import time
+
+import numpy as np
+import torch
+
+from .utils import get_sentiment_analyzer, get_redis_client
+
+SENTIMENT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", 32))
+SENTIMENT_MAX_LENGTH = 512
+SENTIMENT_CACHE_TTL = int(os.getenv("SENTIMENT_CACHE_TTL", 30 * 86400))
+SENTIMENT_CACHE_BUCKET_MAX = int(os.getenv("SENTIMENT_CACHE_BUCKET_MAX", 4096))
+SENTIMENT_CACHE_LOCAL_MAX = 100_000
+SENTIMENT_CACHE_PREFIX_LEN = 2  # 버킷 수 = 16^2 = 256
+
+# bert-nsmc 는 설정에 따라 positive/negative 또는 LABEL_1/LABEL_0 라벨을 반환합니다.
+POSITIVE_LABELS = {"positive", "label_1", "1"}
+NEGATIVE_LABELS = {"negative", "label_0", "0"}
+
+
+def _label_signs(model) -> np.ndarray:
+    """각 클래스 인덱스를 감성 부호(+1 긍정, -1 부정, 0 중립/알 수 없음)로 매핑합니다."""
+    id2label = getattr(model.config, "id2label", {}) or {}
+    signs = np.zeros(model.config.num_labels)
+    for idx, label in id2label.items():
+        name = str(label).lower()
+        if name in POSITIVE_LABELS:
+            signs[int(idx)] = 1.0
+        elif name in NEGATIVE_LABELS:
+            signs[int(idx)] = -1.0
+    return signs
+
+
+def _model_id(model) -> str:
+    """캐시 키에 쓰일 모델 식별자. 모델 경로가 바뀌면 이전 점수를 재사용하지 않습니다."""
+    return os.getenv("SENTIMENT_MODEL_ID") or getattr(model.config, "_name_or_path", "") or "sentiment"
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class SentimentCache:
+    """
+    (모델 ID, sha1(text)) -> 감성 점수 캐시입니다.
+    해시 앞 두 글자로 나눈 Redis 해시(sentiment_cache:{model_id}:{ab}, 256개)에 저장하고 파이프라인으로 한 번에 읽고 씁니다.
+    - 버킷마다 TTL(SENTIMENT_CACHE_TTL)을 두고 쓰거나 읽을 때 갱신하므로, 쓰지 않는 점수는 만료되고
+      volatile-* maxmemory 정책에서도 축출될 수 있습니다.
+    - 버킷 항목 수가 SENTIMENT_CACHE_BUCKET_MAX 를 넘으면 그 버킷을 비웁니다. (전체 크기 상한 ≈ 256 × 상한)
+    Redis를 사용할 수 없으면 크기 제한이 있는 프로세스 메모리 딕셔너리로 대체합니다.
+    """
+
+    def __init__(self):
+        self._local = {}
+        self.stats = {"hits": 0, "misses": 0, "inference_seconds": 0.0, "saved_seconds": 0.0, "evicted_buckets": 0}
+
+    def _key(self, model_id: str, text_hash: str) -> str:
+        return f"sentiment_cache:{model_id}:{text_hash[:SENTIMENT_CACHE_PREFIX_LEN]}"
+
+    def _group(self, model_id: str, hashes) -> dict:
+        buckets = {}
+        for h in hashes:
+            buckets.setdefault(self._key(model_id, h), []).append(h)
+        return buckets
+
+    def get_many(self, model_id: str, hashes: list) -> dict:
+        if not hashes:
+            return {}
+        r = get_redis_client()
+        if r:
+            try:
+                buckets = self._group(model_id, hashes)
+                pipe = r.pipeline()
+                for key, bucket_hashes in buckets.items():
+                    pipe.hmget(key, bucket_hashes)
+                    pipe.expire(key, SENTIMENT_CACHE_TTL)
+                replies = pipe.execute()
+                found = {}
+                for bucket_hashes, values in zip(buckets.values(), replies[::2]):
+                    found.update({h: float(v) for h, v in zip(bucket_hashes, values) if v is not None})
+                return found
+            except Exception as e:
+                print(f"⚠️ Sentiment cache read failed, falling back to memory: {e}")
+        local = self._local.get(model_id, {})
+        return {h: local[h] for h in hashes if h in local}
+
+    def set_many(self, model_id: str, mapping: dict):
+        if not mapping:
+            return
+        r = get_redis_client()
+        if r:
+            try:
+                buckets = self._group(model_id, mapping)
+                pipe = r.pipeline()
+                for key, bucket_hashes in buckets.items():
+                    pipe.hset(key, mapping={h: repr(mapping[h]) for h in bucket_hashes})
+                    pipe.expire(key, SENTIMENT_CACHE_TTL)
+                    pipe.hlen(key)
+                replies = pipe.execute()
+                full = [key for key, size in zip(buckets, replies[2::3]) if size > SENTIMENT_CACHE_BUCKET_MAX]
+                if full:
+                    r.delete(*full)
+                    self.stats["evicted_buckets"] += len(full)
+                return
+            except Exception as e:
+                print(f"⚠️ Sentiment cache write failed, falling back to memory: {e}")
+        local = self._local.setdefault(model_id, {})
+        if len(local) + len(mapping) > SENTIMENT_CACHE_LOCAL_MAX:
+            local.clear()
+        local.update(mapping)
+
+    def size(self) -> dict:
+        """캐시에 저장된 항목 수와 버킷 수."""
+        local_entries = sum(len(v) for v in self._local.values())
+        r = get_redis_client()
+        if not r:
+            return {"backend": "memory", "entries": local_entries, "buckets": len(self._local)}
+        try:
+            keys = list(r.scan_iter(match="sentiment_cache:*", count=1000))
+            pipe = r.pipeline()
+            for key in keys:
+                pipe.hlen(key)
+            entries = sum(pipe.execute()) if keys else 0
+            return {"backend": "redis", "entries": entries, "buckets": len(keys), "local_entries": local_entries}
+        except Exception as e:
+            return {"backend": "redis", "error": str(e), "local_entries": local_entries}
+
+    def record(self, hits: int, misses: int, inference_seconds: float):
+        self.stats["hits"] += hits
+        self.stats["misses"] += misses
+        self.stats["inference_seconds"] += inference_seconds
+        # 절약 시간은 지금까지 측정된 문서당 평균 추론 시간으로 추정합니다.
+        if self.stats["misses"]:
+            per_doc = self.stats["inference_seconds"] / self.stats["misses"]
+            self.stats["saved_seconds"] += hits * per_doc
+
+
+_cache = SentimentCache()
+
+
+def get_cache_stats(include_size: bool = False) -> dict:
+    """
+    프로세스 시작 이후 누적된 감성 캐시 통계 (hits, misses, hit_rate, inference_seconds, saved_seconds, evicted_buckets).
+    GET /stats/sentiment-cache 로 조회합니다. include_size=True 이면 저장된 항목/버킷 수(size)도 함께 반환합니다. (Redis SCAN을 하므로 필요할 때만)
+    """
+    stats = dict(_cache.stats)
+    total = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / total, 3) if total else 0.0
+    stats["inference_seconds"] = round(stats["inference_seconds"], 3)
+    stats["saved_seconds"] = round(stats["saved_seconds"], 3)
+    if include_size:
+        stats["size"] = _cache.size()
+    return stats
+
+
+def _tokenize(tokenizer, texts: list, max_length: int) -> tuple[list, list]:
+    """(토큰화된 feature 목록, 토큰화에 실패한 문서 인덱스). 한 번에 실패하면 문서별로 다시 시도합니다."""
+    try:
+        encoded = tokenizer(texts, truncation=True, max_length=max_length)
+        return [{k: encoded[k][i] for k in encoded.keys()} for i in range(len(texts))], []
+    except Exception as e:
+        print(f"⚠️ Sentiment tokenizer failed on the batch, retrying per document: {e}")
+    features, failed = [], []
+    for i, text in enumerate(texts):
+        try:
+            encoded = tokenizer(text, truncation=True, max_length=max_length)
+            features.append(dict(encoded))
+        except Exception:
+            features.append(None)
+            failed.append(i)
+    return features, failed
+
+
+def _infer(model, tokenizer, texts: list, batch_size: int, max_length: int) -> tuple[dict, int, dict]:
+    """
+    길이순 정렬 + 동적 패딩 배치로 추론합니다.
+    배치가 실패하면(토크나이저 오류, CUDA OOM 등) 반으로 나눠 다시 시도하고, 한 문서만으로도 실패하면 0.0으로 둡니다.
+    Returns: ({text: score}, 배치 수, {"failed_batches": int, "failed_docs": [text, ...]})
+    """
+    signs = _label_signs(model)
+    failures = {"failed_batches": 0, "failed_docs": []}
+
+    # 1) 토큰 단위로 자르고 길이를 구한 뒤, 길이순으로 정렬해 배치 내 패딩을 최소화합니다.
+    features, failed = _tokenize(tokenizer, texts, max_length)
+    failures["failed_docs"].extend(texts[i] for i in failed)
+    scores = {texts[i]: 0.0 for i in failed}
+    valid = [i for i in range(len(texts)) if features[i] is not None]
+    order = [valid[j] for j in np.argsort([len(features[i]["input_ids"]) for i in valid], kind="stable")]
+
+    def run(batch_idx: list):
+        try:
+            # 2) 배치 안에서 가장 긴 문서 길이까지만 패딩합니다. (동적 패딩)
+            batch = tokenizer.pad([features[i] for i in batch_idx], padding="longest", return_tensors="pt").to(model.device)
+            probs = torch.softmax(model(**batch).logits, dim=-1).cpu().numpy()
+        except Exception as e:
+            failures["failed_batches"] += 1
+            print(f"⚠️ Sentiment batch of {len(batch_idx)} failed: {e}")
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+            if len(batch_idx) == 1:
+                scores[texts[batch_idx[0]]] = 0.0
+                failures["failed_docs"].append(texts[batch_idx[0]])
+                return
+            half = len(batch_idx) // 2
+            run(batch_idx[:half])
+            run(batch_idx[half:])
+            return
+        predicted = probs.argmax(axis=1)
+        batch_scores = probs[np.arange(len(predicted)), predicted] * signs[predicted]
+        for i, score in zip(batch_idx, batch_scores):
+            scores[texts[i]] = float(score)
+
+    batches = 0
+    model.eval()
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            run(order[start:start + batch_size])
+            batches += 1
+    return scores, batches, failures
+
+
+def score_texts(texts: list, batch_size: int = SENTIMENT_BATCH_SIZE, max_length: int = SENTIMENT_MAX_LENGTH,
+                use_cache: bool = True) -> tuple[dict, dict]:
+    """
+    텍스트 목록의 감성 점수를 계산합니다.
+    점수는 기존과 같이 예측 라벨이 긍정이면 +확률, 부정이면 -확률입니다.
+    캐시에 없는 문서(miss)만 배치 추론하고, 결과를 캐시에 저장합니다.
+    Returns:
+        ({text: score}, stats) - stats에는 문서 수, 캐시 hit/miss, 배치 수, 실패한 배치/문서 수, 처리 속도(docs/sec)가 들어 있습니다.
+        추론에 실패한 문서는 기존처럼 0.0점입니다.
+    """
+    unique_texts = list(dict.fromkeys(t for t in texts if t))
+    stats = {"requested": len(texts), "unique": len(unique_texts), "cache_hits": 0, "cache_misses": 0,
+             "batches": 0, "failed_batches": 0, "failed_docs": 0, "seconds": 0.0, "docs_per_sec": 0.0}
+    if not unique_texts:
+        return {}, stats
+
+    analyzer = get_sentiment_analyzer()
+    if analyzer is None:
+        print("❌ 감성 분석 모델이 로드되지 않았습니다. 감성 점수 계산 불가.")
+        return {t: 0.0 for t in unique_texts}, stats
+
+    model, tokenizer = analyzer.model, analyzer.tokenizer
+    model_id = _model_id(model)
+    hashes = {t: _text_hash(t) for t in unique_texts}
+
+    scores = {}
+    if use_cache:
+        cached = _cache.get_many(model_id, list(hashes.values()))
+        scores = {t: cached[h] for t, h in hashes.items() if h in cached}
+    misses = [t for t in unique_texts if t not in scores]
+
+    started = time.perf_counter()
+    if misses:
+        inferred, stats["batches"], failures = _infer(model, tokenizer, misses, batch_size, max_length)
+        scores.update(inferred)
+        stats["failed_batches"] = failures["failed_batches"]
+        stats["failed_docs"] = len(failures["failed_docs"])
+        if use_cache:
+            # 실패해 0.0으로 둔 문서는 캐시하지 않아 다음에 다시 추론합니다.
+            failed = set(failures["failed_docs"])
+            _cache.set_many(model_id, {hashes[t]: v for t, v in inferred.items() if t not in failed})
+    elapsed = time.perf_counter() - started
+
+    stats["cache_hits"] = len(unique_texts) - len(misses)
+    stats["cache_misses"] = len(misses)
+    stats["seconds"] = round(elapsed, 3)
+    stats["docs_per_sec"] = round(len(misses) / elapsed, 1) if misses and elapsed > 0 else 0.0
+    _cache.record(stats["cache_hits"], stats["cache_misses"], elapsed)
+    print(f"🧠 Sentiment: {stats['unique']} docs ({stats['cache_hits']} cached, {stats['cache_misses']} inferred "
+          f"in {stats['batches']} batches, {stats['docs_per_sec']} docs/sec), "
+          f"saved ~{get_cache_stats()['saved_seconds']}s so far")
+    return scores, stats
@@ -0,0 +1,263 @@
+# agents/sna_graph.py
+"""
+의미 연결망 분석(SNA)용 키워드 동시 출현 그래프 생성기입니다.
+(i, j) 피처 쌍을 파이썬 루프로 하나씩 조회하는 대신, 희소 행렬 곱의 상삼각 부분을
+한 번에 임계값 처리하여 엣지 리스트를 만들고 add_weighted_edges_from 으로 일괄 추가합니다.
+
+큰 클러스터용 확장 (analyze_cooccurrence_network):
+- 그래프 가지치기: 노드별 상위 k개 이웃(top_k) 또는 엣지 예산(budget)에 맞춘 적응형 임계값
+- 커뮤니티 탐지: Leiden(igraph/leidenalg 설치 시) 또는 희소 행렬 기반 라벨 전파, 작은 그래프는 기존 Louvain
+- 중심성: networkx 서브그래프를 만들지 않고 희소 인접 행렬에서 한 번에 벡터 연산으로 계산
+"""
+
+import numpy as np
+import networkx as nx
+from scipy import sparse
+
+DEFAULT_EDGE_THRESHOLD = 0.1
+DEFAULT_TOP_K = 10
+DEFAULT_EDGE_BUDGET = 3000
+# 이 엣지 수 이하의 그래프는 기존처럼 Louvain(python-louvain)으로 커뮤니티를 찾습니다.
+LOUVAIN_MAX_EDGES = 5000
+
+
+def cooccurrence_matrix(doc_term_matrix) -> sparse.csr_matrix:
+    """문서-단어 행렬로 단어-단어 동시 출현(가중치) 행렬 X^T X 를 계산합니다."""
+    doc_term_matrix = sparse.csr_matrix(doc_term_matrix)
+    return (doc_term_matrix.T @ doc_term_matrix).tocsr()
+
+
+def threshold_edges(co_occurrence, threshold: float = DEFAULT_EDGE_THRESHOLD):
+    """
+    대칭 동시 출현 행렬의 상삼각(대각 제외)에서 weight > threshold 인 엣지만 벡터 연산으로 추출합니다.
+    Returns:
+        (rows, cols, weights) NumPy 배열
+    """
+    upper = sparse.triu(co_occurrence, k=1).tocoo()
+    mask = upper.data > threshold
+    return upper.row[mask], upper.col[mask], upper.data[mask]
+
+
+def build_cooccurrence_graph(doc_term_matrix, feature_names, threshold: float = DEFAULT_EDGE_THRESHOLD,
+                             drop_isolates: bool = True) -> nx.Graph:
+    """
+    키워드 동시 출현 그래프를 생성합니다. 노드 ID는 키워드 이름이며 id/name 속성을 가집니다.
+    drop_isolates=True 이면 엣지가 하나도 없는 키워드는 커뮤니티 탐지 전에 제외합니다.
+    """
+    rows, cols, weights = threshold_edges(cooccurrence_matrix(doc_term_matrix), threshold)
+    names = np.asarray(feature_names, dtype=object)
+
+    if drop_isolates:
+        node_indices = np.unique(np.concatenate([rows, cols]))
+    else:
+        node_indices = np.arange(len(names))
+
+    G = nx.Graph()
+    G.add_nodes_from((name, {"id": name, "name": name}) for name in names[node_indices])
+    G.add_weighted_edges_from(zip(names[rows], names[cols], weights.astype(float).tolist()))
+    return G
+
+
+# --- 대규모 그래프용 희소 행렬 파이프라인 ---
+def _filter_weights(adjacency, threshold: float) -> sparse.csr_matrix:
+    adjacency = adjacency.copy()
+    adjacency.data[adjacency.data <= threshold] = 0
+    adjacency.eliminate_zeros()
+    return adjacency
+
+
+def budget_threshold(adjacency, edge_budget: int) -> float:
+    """엣지 수가 edge_budget 이하가 되도록 하는 최소 가중치 임계값 ((budget+1)번째로 큰 가중치)."""
+    weights = sparse.triu(adjacency, k=1).data
+    if len(weights) <= edge_budget:
+        return 0.0
+    cut = len(weights) - edge_budget - 1
+    return float(np.partition(weights, cut)[cut])
+
+
+def prune_top_k(adjacency, k: int) -> sparse.csr_matrix:
+    """각 노드에서 가중치 상위 k개 이웃만 남깁니다. 한쪽에서라도 선택된 엣지는 유지합니다. (대칭)"""
+    adjacency = sparse.csr_matrix(adjacency)
+    degrees = np.diff(adjacency.indptr)
+    keep = np.ones(adjacency.nnz, dtype=bool)
+    for row in np.flatnonzero(degrees > k):
+        start, end = adjacency.indptr[row], adjacency.indptr[row + 1]
+        row_keep = np.zeros(end - start, dtype=bool)
+        row_keep[np.argpartition(adjacency.data[start:end], -k)[-k:]] = True
+        keep[start:end] = row_keep
+    row_ids = np.repeat(np.arange(adjacency.shape[0]), degrees)
+    pruned = sparse.csr_matrix(
+        (adjacency.data[keep], (row_ids[keep], adjacency.indices[keep])), shape=adjacency.shape
+    )
+    return pruned.maximum(pruned.T).tocsr()
+
+
+def build_adjacency(doc_term_matrix, mode: str = "auto", threshold: float = DEFAULT_EDGE_THRESHOLD,
+                    top_k: int = DEFAULT_TOP_K, edge_budget: int = DEFAULT_EDGE_BUDGET) -> sparse.csr_matrix:
+    """
+    대각이 0인 대칭 가중 인접 행렬을 만듭니다.
+    mode:
+        "threshold" - weight > threshold (기존 방식)
+        "top_k"     - threshold를 넘는 엣지 중 노드별 상위 top_k개 이웃
+        "budget"    - 엣지 수가 edge_budget 이하가 되도록 임계값을 자동 조정
+        "auto"      - threshold를 적용하되, 엣지가 edge_budget을 넘으면 budget 방식으로 임계값을 올림
+    """
+    co = cooccurrence_matrix(doc_term_matrix)
+    co.setdiag(0)
+    co.eliminate_zeros()
+
+    if mode == "top_k":
+        return prune_top_k(_filter_weights(co, threshold), top_k)
+    if mode == "budget":
+        return _filter_weights(co, budget_threshold(co, edge_budget))
+    if mode == "auto":
+        return _filter_weights(co, max(threshold, budget_threshold(co, edge_budget)))
+    return _filter_weights(co, threshold)
+
+
+def drop_isolated(adjacency) -> tuple[sparse.csr_matrix, np.ndarray]:
+    """엣지가 없는 노드를 제거합니다. Returns: (부분 인접 행렬, 남은 노드의 원래 인덱스)"""
+    keep = np.flatnonzero(np.diff(adjacency.indptr))
+    return adjacency[keep][:, keep].tocsr(), keep
+
+
+def degree_centrality(adjacency) -> np.ndarray:
+    """nx.degree_centrality 와 같은 값(연결 수 / (n-1))을 인접 행렬에서 바로 계산합니다."""
+    n = adjacency.shape[0]
+    degrees = np.diff(sparse.csr_matrix(adjacency).indptr).astype(float)
+    return degrees / (n - 1) if n > 1 else np.ones(n)
+
+
+def community_degree_centrality(adjacency, labels: np.ndarray) -> np.ndarray:
+    """
+    각 노드의 '자기 커뮤니티 서브그래프 안에서의' degree centrality를 한 번에 계산합니다.
+    (커뮤니티마다 subgraph를 만들어 nx.degree_centrality를 부르던 것과 같은 값)
+    """
+    n = adjacency.shape[0]
+    if n == 0:
+        return np.zeros(0)
+    binary = sparse.csr_matrix(adjacency, copy=True)
+    binary.data[:] = 1.0
+    onehot = sparse.csr_matrix((np.ones(n), (np.arange(n), labels)), shape=(n, int(labels.max()) + 1))
+    intra = np.asarray((binary @ onehot)[np.arange(n), labels]).ravel()
+    sizes = np.bincount(labels)[labels]
+    return np.where(sizes > 1, intra / np.maximum(sizes - 1, 1), 1.0)
+
+
+def label_propagation(adjacency, max_iter: int = 50) -> np.ndarray:
+    """
+    희소 행렬 곱으로 구현한 가중 라벨 전파입니다. 각 반복에서 모든 노드가 동시에
+    '이웃 가중치 합이 가장 큰 라벨'을 택합니다. 자기 라벨에 약간의 가중치를 줘 진동을 막습니다.
+    """
+    n = adjacency.shape[0]
+    labels = np.arange(n)
+    if n == 0:
+        return labels
+    self_weight = sparse.diags(np.full(n, max(float(adjacency.data.min()), 1e-6) * 0.5 if adjacency.nnz else 1.0))
+    propagate = (adjacency + self_weight).tocsr()
+    for _ in range(max_iter):
+        onehot = sparse.csr_matrix((np.ones(n), (np.arange(n), labels)), shape=(n, n))
+        new_labels = np.asarray((propagate @ onehot).argmax(axis=1)).ravel()
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+    return np.unique(labels, return_inverse=True)[1]
+
+
+def leiden_communities(adjacency, seed: int = 42) -> np.ndarray:
+    """Leiden 커뮤니티 탐지 (igraph, leidenalg 필요). 설치되어 있지 않으면 ImportError."""
+    import igraph as ig
+    import leidenalg
+
+    upper = sparse.triu(adjacency, k=1).tocoo()
+    graph = ig.Graph(n=adjacency.shape[0], edges=list(zip(upper.row.tolist(), upper.col.tolist())))
+    partition = leidenalg.find_partition(
+        graph, leidenalg.ModularityVertexPartition, weights=upper.data.tolist(), seed=seed
+    )
+    return np.asarray(partition.membership)
+
+
+def louvain_communities(adjacency, seed: int = 42) -> np.ndarray:
+    import community as co
+
+    G = nx.from_scipy_sparse_array(adjacency)
+    partition = co.best_partition(G, weight="weight", random_state=seed)
+    return np.asarray([partition[i] for i in range(adjacency.shape[0])])
+
+
+def detect_communities(adjacency, method: str = "auto") -> tuple[np.ndarray, str]:
+    """
+    커뮤니티 라벨(0..c-1)과 실제 사용한 방법을 반환합니다.
+    auto: 엣지가 LOUVAIN_MAX_EDGES 이하이면 Louvain, 아니면 Leiden, Leiden을 쓸 수 없으면 라벨 전파.
+    """
+    if adjacency.shape[0] == 0:
+        return np.zeros(0, dtype=int), method
+    if method == "auto":
+        method = "louvain" if adjacency.nnz // 2 <= LOUVAIN_MAX_EDGES else "leiden"
+    if method == "louvain":
+        try:
+            return louvain_communities(adjacency), "louvain"
+        except ImportError:
+            method = "leiden"
+    if method == "leiden":
+        try:
+            return leiden_communities(adjacency), "leiden"
+        except ImportError:
+            print("ℹ️ igraph/leidenalg가 없어 라벨 전파로 커뮤니티를 찾습니다.")
+    return label_propagation(adjacency), "label_propagation"
+
+
+def analyze_cooccurrence_network(doc_term_matrix, feature_names, mode: str = "auto",
+                                 threshold: float = DEFAULT_EDGE_THRESHOLD, top_k: int = DEFAULT_TOP_K,
+                                 edge_budget: int = DEFAULT_EDGE_BUDGET, community_method: str = "auto") -> dict:
+    """
+    동시 출현 네트워크를 만들고 커뮤니티와 중심성을 계산합니다. (networkx 그래프를 만들지 않음)
+    Returns:
+        {"names", "adjacency", "labels", "centrality", "community_centrality", "community_method"}
+    """
+    adjacency, node_indices = drop_isolated(
+        build_adjacency(doc_term_matrix, mode=mode, threshold=threshold, top_k=top_k, edge_budget=edge_budget)
+    )
+    labels, used_method = detect_communities(adjacency, community_method)
+    return {
+        "names": np.asarray(feature_names, dtype=object)[node_indices],
+        "adjacency": adjacency,
+        "labels": labels,
+        "centrality": degree_centrality(adjacency),
+        "community_centrality": community_degree_centrality(adjacency, labels),
+        "community_method": used_method,
+    }
+
+
+def network_micro_segments(network: dict) -> list:
+    """커뮤니티별 키워드 목록과, 커뮤니티 안에서 중심성이 가장 높은 핵심 키워드를 만듭니다."""
+    names, labels = network["names"], network["labels"]
+    segments = []
+    for community_id in np.unique(labels):
+        members = np.flatnonzero(labels == community_id)
+        core = members[np.argmax(network["community_centrality"][members])]
+        segments.append({
+            "community_id": int(community_id),
+            "core_keyword": names[core],
+            "keywords": names[members].tolist(),
+        })
+    return sorted(segments, key=lambda x: (x["community_id"], x["core_keyword"]))
+
+
+def network_graph_data(network: dict) -> dict:
+    """프론트엔드가 쓰는 nx.node_link_data 형식(nodes/links)으로 변환합니다."""
+    names = network["names"]
+    upper = sparse.triu(network["adjacency"], k=1).tocoo()
+    return {
+        "directed": False,
+        "multigraph": False,
+        "graph": {},
+        "nodes": [
+            {"id": name, "name": name, "community": int(label), "centrality": float(centrality)}
+            for name, label, centrality in zip(names, network["labels"], network["centrality"])
+        ],
+        "links": [
+            {"source": names[i], "target": names[j], "weight": float(w)}
+            for i, j, w in zip(upper.row, upper.col, upper.data)
+        ],
+    }
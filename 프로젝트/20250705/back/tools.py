@@ -9,6 +9,7 @@ from .cx_analysis import (
     run_ward_clustering,
     run_semantic_network_analysis,
     run_topic_modeling_lda,
+    run_topic_modeling_lda_all,
     create_customer_action_map,
     calculate_opportunity_scores
 )
@@ -16,6 +17,7 @@ from .persona_generator import create_personas, modify_personas, create_persona_
 from .service_creator import create_service_ideas, modify_service_ideas, create_service_ideas_from_manual_input
 from .data_planner import create_data_plan_for_service, modify_data_plan
 from .cdp_creator import create_cdp_definition, modify_cdp_definition
+from .voc_monitor import run_voc_monitor
 
 
 def create_new_workspace():
@@ -24,11 +26,13 @@ def create_new_workspace():
         "internal_history": [],
         "user_history": [],
         "last_request_type": None,
+        "pending_jobs": [],
         "artifacts": {
             "product_type": None,
             "retrieved_data": None,
             "analysis_results": None,
             "cx_lda_results": None,
+            "cx_lda_results_by_cluster": {},
             "cx_opportunity_scores": [],
             "cx_cam_results": [],
             "cx_ward_clustering_results": None,
@@ -120,9 +124,14 @@ tools = [
             "parameters": {
                 "type": "object",
                 "properties": {
-                    "num_clusters": {"type": "integer", "description": "나눌 그룹 수 (기본값: 5)", "default": 5}
+                    "num_clusters": {"type": "integer", "description": "나눌 그룹 수 (기본값: 5). auto_k가 true이면 무시됩니다.", "default": 5},
+                    "auto_k": {"type": "boolean", "description": "사용자가 그룹 수를 정하지 않았거나 '적절한 개수로' 나눠달라고 하면 true. 여러 그룹 수를 비교 평가해 추천 개수로 나눕니다.", "default": False},
+                    "k_min": {"type": "integer", "description": "auto_k 평가 범위의 최소 그룹 수 (기본값: 2)", "default": 2},
+                    "k_max": {"type": "integer", "description": "auto_k 평가 범위의 최대 그룹 수 (기본값: 10)", "default": 10},
+                    "feature_source": {"type": "string", "enum": ["tfidf", "vectors"], "description": "군집화 기준. 'vectors'는 검색 시 저장된 의미 임베딩으로 문맥이 비슷한 문장끼리 묶습니다. (기본값: tfidf)", "default": "tfidf"},
+                    "method": {"type": "string", "enum": ["kmeans", "ward"], "description": "군집 알고리즘. 'ward'는 vectors 모드에서만 사용됩니다. (기본값: kmeans)", "default": "kmeans"}
                 },
-                "required": ["num_clusters"],
+                "required": [],
             },
         },
     },
@@ -160,13 +169,35 @@ tools = [
         },
     },
 
+    # 4-1. Topic Modeling for all clusters (Segmentation - 전체 그룹 행동 식별)
+    {
+        "type": "function",
+        "function": {
+            "name": "run_topic_modeling_lda_all",
+            "description": "🎯 [STP Segmentation - 전체 그룹 행동 식별] 모든 고객 그룹의 행동 주제를 한 번에 식별합니다. 여러 그룹을 비교하거나 '전체 클러스터 토픽 모델링'을 요청할 때 사용합니다. 이후 특정 그룹의 토픽은 run_topic_modeling_lda로 바로 확인할 수 있습니다.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "num_topics": {"type": "integer", "description": "그룹마다 추출할 행동 주제 수 (기본값: 3)", "default": 3}
+                },
+                "required": [],
+            },
+        },
+    },
+
     # 5. Calculate Opportunity Scores (Targeting & Positioning - 기회 우선순위)
     {
         "type": "function",
         "function": {
             "name": "calculate_opportunity_scores",
             "description": "📈 [STP Targeting & Positioning - 기회 우선순위] 고객 행동과 불편사항(Pain Points)을 분석하여 사업 기회 점수를 계산합니다. 어떤 문제에 집중할지 우선순위를 정합니다.",
-            "parameters": {"type": "object", "properties": {}},
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "weighting": {"type": "string", "enum": ["hard", "soft"], "description": "hard: 문서를 가장 가까운 토픽 하나에만 반영(기본값), soft: 문서-토픽 확률로 나눠 반영"},
+                    "scope": {"type": "string", "enum": ["current", "all"], "description": "current: 마지막으로 분석한 클러스터의 토픽(기본값), all: 토픽 모델링된 모든 클러스터의 토픽을 함께 비교"},
+                },
+            },
         },
     },
 
@@ -354,6 +385,24 @@ tools = [
             },
         },
     },
+
+    # 17. VOC 모니터링 (상시 쿼리)
+    {
+        "type": "function",
+        "function": {
+            "name": "run_voc_monitor",
+            "description": "📈 [VOC 모니터링] 키워드에 대해 새로 수집된 VOC만 반영해 고객 니즈 그룹의 일자별 크기와 감성 변화를 추적합니다. '추이', '변화', '모니터링' 요청 시 사용합니다.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "keyword": {"type": "string", "description": "모니터링할 키워드 (예: '살균')"},
+                    "product_type": {"type": "string", "description": "제품군 (선택)"},
+                    "num_clusters": {"type": "integer", "description": "처음 등록 시 나눌 그룹 수 (기본값: 5)", "default": 5}
+                },
+                "required": ["keyword"],
+            },
+        },
+    },
 ]
 
 available_functions = {
@@ -361,6 +410,7 @@ available_functions = {
     "run_ward_clustering": run_ward_clustering,
     "run_semantic_network_analysis": run_semantic_network_analysis,
     "run_topic_modeling_lda": run_topic_modeling_lda,
+    "run_topic_modeling_lda_all": run_topic_modeling_lda_all,
     "create_customer_action_map": create_customer_action_map,
     "calculate_opportunity_scores": calculate_opportunity_scores,
     "create_personas": create_personas,
@@ -376,5 +426,6 @@ available_functions = {
     "fetch_product_context": fetch_product_context,
     "fetch_sensor_context": fetch_sensor_context,
     "get_columns_for_product": get_columns_for_product,
-    "conext_change": conext_change
+    "conext_change": conext_change,
+    "run_voc_monitor": run_voc_monitor
 }
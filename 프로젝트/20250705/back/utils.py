@@ -14,7 +14,6 @@ import json
 import logging
 from redis.lock import Lock
 from retry import retry
-from typing import Any
 sentiment_analyzer = None 
 
 # 모델과 클라이언트를 저장할 전역 변수
@@ -24,6 +23,7 @@ qdrant_client = None
 sync_openai_client = None
 async_openai_client = None
 redis_client = None
+redis_binary_client = None
 
 
 MODEL_NAME = "gpt-4o-mini"
@@ -64,90 +64,47 @@ def get_redis_client():
             redis_client = None
     return redis_client
 
-@retry(tries=3, delay=1, backoff=2)
-def save_workspace_to_redis(session_id: str, workspace: dict):
-    r = get_redis_client()
-    if r:
+def get_redis_binary_client():
+    """워크스페이스 저장용 클라이언트. 값을 압축된 바이너리로 주고받으므로 응답을 디코딩하지 않습니다."""
+    global redis_binary_client
+    if redis_binary_client is None:
         try:
-            with Lock(r, f"lock:session:{session_id}", timeout=10):
-                serializable_workspace = _convert_datetime_to_str(workspace)
-                # TTL을 사용자 활동에 따라 동적으로 설정 (예: 24시간)
-                r.setex(f"session:{session_id}:workspace", 86400, json.dumps(serializable_workspace, ensure_ascii=False))
-                r.expire(f"session:{session_id}:workspace", 86400)  # 요청 시 TTL 갱신
-                print(f"💾 Workspace saved for session: {session_id}")
+            redis_binary_client = redis.StrictRedis(
+                host=os.getenv("REDIS_HOST", "localhost"),
+                port=int(os.getenv("REDIS_PORT", 6379)),
+                db=int(os.getenv("REDIS_DB", 0)),
+                decode_responses=False,
+                socket_timeout=5,
+                socket_connect_timeout=5
+            )
+            redis_binary_client.ping()
         except Exception as e:
-            print(f"❌ Failed to save workspace to Redis for session {session_id}: {e}")
-            logging.error(f"Redis save error: {e}")
-            raise
-    else:
-        logging.error("Redis client not available")
-        raise Exception("Redis connection unavailable")
+            print(f"❌ Failed to initialize Redis binary client: {e}")
+            redis_binary_client = None
+    return redis_binary_client
 
 @retry(tries=3, delay=1, backoff=2)
-def load_workspace_from_redis(session_id: str) -> dict | None:
-    r = get_redis_client()
-    if r:
-        try:
-            with Lock(r, f"lock:session:{session_id}", timeout=10):
-                workspace_json = r.get(f"session:{session_id}:workspace")
-                if workspace_json:
-                    loaded_workspace = json.loads(workspace_json)
-                    deserialized_workspace = _convert_str_to_datetime(loaded_workspace)
-                    r.expire(f"session:{session_id}:workspace", 86400)  # 로드 시 TTL 갱신
-                    print(f"✅ Workspace loaded for session: {session_id}")
-                    return deserialized_workspace
-                print(f"ℹ️ No workspace found for session: {session_id}")
-                return None
-        except Exception as e:
-            print(f"❌ Failed to load workspace from Redis for session {session_id}: {e}")
-            logging.error(f"Redis load error: {e}")
-            return None
-    return None
-
-# ✨ 새로 추가할 함수 시작
-def _convert_datetime_to_str(obj: Any) -> Any:
-    """Recursively converts datetime and tool_calls objects to serializable format."""
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-    if isinstance(obj, date):
-        return obj.isoformat()
-    if hasattr(obj, '__dict__') and hasattr(obj, 'id') and hasattr(obj, 'function'):  # tool_calls 처리
-        return {
-            'id': obj.id,
-            'type': getattr(obj, 'type', 'function'),
-            'function': {
-                'name': obj.function.name,
-                'arguments': obj.function.arguments
-            }
-        }
-    if isinstance(obj, list):
-        return [_convert_datetime_to_str(elem) for elem in obj]
-    if isinstance(obj, dict):
-        return {k: _convert_datetime_to_str(v) for k, v in obj.items()}
-    return obj
+def save_workspace_to_redis(session_id: str, workspace: dict):
+    # 아티팩트별 키 + 히스토리 리스트 형식으로 저장합니다. (agents/workspace_store.py)
+    from .workspace_store import save_workspace
+    try:
+        return save_workspace(session_id, workspace)
+    except Exception as e:
+        print(f"❌ Failed to save workspace to Redis for session {session_id}: {e}")
+        logging.error(f"Redis save error: {e}")
+        raise
 
-def _convert_str_to_datetime(obj: Any) -> Any:
-    """Recursively converts ISO strings and tool_calls back to original format."""
-    if isinstance(obj, str):
-        try:
-            return datetime.fromisoformat(obj)
-        except ValueError:
-            try:
-                return date.fromisoformat(obj)
-            except ValueError:
-                pass
-    if isinstance(obj, dict) and 'id' in obj and 'function' in obj:
-        from openai.types.chat import ChatCompletionMessageToolCall
-        return ChatCompletionMessageToolCall(
-            id=obj['id'],
-            type=obj.get('type', 'function'),
-            function=obj['function']
-        )
-    if isinstance(obj, list):
-        return [_convert_str_to_datetime(elem) for elem in obj]
-    if isinstance(obj, dict):
-        return {k: _convert_str_to_datetime(v) for k, v in obj.items()}
-    return obj
+@retry(tries=3, delay=1, backoff=2)
+def load_workspace_from_redis(session_id: str) -> dict | None:
+    # 아티팩트는 접근할 때 읽어 오는 지연 로딩 워크스페이스를 반환합니다. (agents/workspace_store.py)
+    # None은 "저장된 워크스페이스 없음"만 뜻합니다. 읽기 실패는 예외로 올려 새 세션으로 착각하지 않게 합니다.
+    from .workspace_store import load_workspace
+    try:
+        return load_workspace(session_id)
+    except Exception as e:
+        print(f"❌ Failed to load workspace from Redis for session {session_id}: {e}")
+        logging.error(f"Redis load error: {e}")
+        raise
 
 
 def get_sentiment_analyzer():
@@ -0,0 +1,301 @@
+# agents/voc_monitor.py
+"""
+VOC 모니터링(상시 쿼리) 모드입니다.
+저장된 키워드/제품군에 대해 date_timestamp 워터마크 이후에 새로 들어온 문장만 가져와,
+- HashingVectorizer + 누적 문서 빈도(IDF)로 벡터화하고 (어휘를 다시 학습할 필요 없음)
+- 저장된 MiniBatchKMeans 모델을 partial_fit 으로 갱신한 뒤
+- 일자별 클러스터 크기와 평균 감성, 그리고 전일 대비 변화량(delta)을 기록합니다.
+과거 데이터는 다시 처리하지 않습니다. 검색은 MONITOR_TOP_K 단위로 끝까지 페이지를 넘겨 읽으므로,
+워터마크를 옮길 때 그 구간의 새 문장을 빠뜨리지 않습니다.
+모니터 상태와 모델은 MONITOR_DIR에 둡니다. (아티팩트 저장소와 달리 용량 기준으로 지워지지 않습니다)
+
+사용 예:
+    python -m agents.voc_monitor create --keyword 살균 --product-type 스타일러
+    python -m agents.voc_monitor update-all      # 매일 크롤링 후 실행
+"""
+
+import os
+import json
+import time
+import argparse
+import hashlib
+import threading
+from datetime import datetime
+from collections import Counter, defaultdict
+
+import joblib
+import numpy as np
+from scipy import sparse
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.feature_extraction.text import HashingVectorizer
+from qdrant_client.http.models import Filter, FieldCondition, Range, SearchRequest, NamedVector
+
+from .corpus_tfidf import NOUN_STOPWORDS
+from .collection_setup import partitions_for_range, list_web_partitions, WEB_COLLECTION
+from .data_retriever import expand_keywords, WEB_DATA_PARTITIONED
+from .sentiment import score_texts
+from .utils import get_embedding_models, get_qdrant_client
+
+MONITOR_DIR = os.getenv("MONITOR_DIR", "./voc_monitors")
+HASH_FEATURES = 2 ** 16
+MONITOR_TOP_K = 2000  # 검색 요청 한 번(페이지)의 최대 결과 수
+MONITOR_SCORE_THRESHOLD = 0.5
+TOP_TERMS_PER_CLUSTER = 200  # 클러스터별로 보관하는 단어 빈도 수 (해시는 역변환이 안 되므로 라벨용으로 따로 셉니다)
+
+_vectorizer = HashingVectorizer(
+    n_features=HASH_FEATURES, alternate_sign=False, norm=None, stop_words=NOUN_STOPWORDS
+)
+_locks = defaultdict(threading.Lock)
+
+
+def monitor_id_for(keyword: str, product_type: str | None = None) -> str:
+    return hashlib.sha1(f"{keyword}|{product_type or ''}".encode("utf-8")).hexdigest()[:16]
+
+
+def _monitor_path(monitor_id: str, name: str) -> str:
+    return os.path.join(MONITOR_DIR, monitor_id, name)
+
+
+def _atomic_write_json(path: str, obj: dict):
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_monitor(monitor_id: str) -> dict | None:
+    try:
+        with open(_monitor_path(monitor_id, "state.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def list_monitors() -> list:
+    if not os.path.isdir(MONITOR_DIR):
+        return []
+    return [state for state in (load_monitor(m) for m in sorted(os.listdir(MONITOR_DIR))) if state]
+
+
+def create_monitor(keyword: str, product_type: str | None = None, num_clusters: int = 5,
+                   start_timestamp: int | None = None) -> dict:
+    """
+    모니터를 등록합니다. 키워드 확장은 등록 시 한 번만 수행해 저장합니다.
+    start_timestamp를 주지 않으면 등록 시점 이후 들어온 문장부터 추적합니다.
+    """
+    monitor_id = monitor_id_for(keyword, product_type)
+    existing = load_monitor(monitor_id)
+    if existing:
+        print(f"ℹ️ Monitor already exists: {monitor_id}")
+        return existing
+
+    state = {
+        "monitor_id": monitor_id,
+        "keyword": keyword,
+        "product_type": product_type,
+        "expanded_keywords": expand_keywords(keyword, product_type),
+        "num_clusters": num_clusters,
+        "watermark": int(start_timestamp if start_timestamp is not None else time.time()),
+        "n_docs": 0,
+        "daily": {},        # {"YYYY-MM-DD": {cluster_id: {"count", "sentiment"}}}
+        "top_terms": {},    # {cluster_id: {term: count}}
+        "created_at": datetime.now().isoformat(),
+        "updated_at": None,
+    }
+    os.makedirs(os.path.join(MONITOR_DIR, monitor_id), exist_ok=True)
+    _atomic_write_json(_monitor_path(monitor_id, "state.json"), state)
+    print(f"✅ Monitor created: {monitor_id} ('{keyword}', {product_type})")
+    return state
+
+
+def _search_new_points(keywords: list, since_ts: int, until_ts: int) -> list:
+    """워터마크 이후(since_ts < date_timestamp <= until_ts) 문장만 검색합니다."""
+    meaning_model, topic_model = get_embedding_models()
+    qdrant = get_qdrant_client()
+    query_filter = Filter(must=[FieldCondition(key="date_timestamp", range=Range(gt=since_ts, lte=until_ts))])
+
+    collections = [WEB_COLLECTION]
+    if WEB_DATA_PARTITIONED:
+        collections = partitions_for_range(since_ts, until_ts, partitions=list_web_partitions()) or [WEB_COLLECTION]
+
+    meaning_vecs = meaning_model.encode(["query: " + kw for kw in keywords])
+    topic_vecs = topic_model.encode(keywords)
+    vectors = []
+    for meaning_vec, topic_vec in zip(meaning_vecs, topic_vecs):
+        vectors.append(NamedVector(name="meaning", vector=meaning_vec.tolist()))
+        vectors.append(NamedVector(name="topic", vector=topic_vec.tolist()))
+
+    points = {}
+    for collection_name in collections:
+        # 결과가 MONITOR_TOP_K건으로 꽉 찬 검색만 다음 페이지(offset)를 이어서 요청합니다.
+        pending, offset = vectors, 0
+        while pending:
+            requests = [SearchRequest(vector=vector, limit=MONITOR_TOP_K, offset=offset, with_payload=True,
+                                      filter=query_filter, score_threshold=MONITOR_SCORE_THRESHOLD)
+                        for vector in pending]
+            results = qdrant.search_batch(collection_name=collection_name, requests=requests)
+            for hits in results:
+                for hit in hits:
+                    payload = hit.payload or {}
+                    if payload.get("sentence") and payload.get("date_timestamp") is not None:
+                        points.setdefault(str(hit.id), payload)
+            pending = [vector for vector, hits in zip(pending, results) if len(hits) >= MONITOR_TOP_K]
+            offset += MONITOR_TOP_K
+    return list(points.values())
+
+
+class _RunningTfidf:
+    """해시 공간에서 문서 빈도를 누적해 IDF를 계산합니다. (sklearn smooth_idf 와 같은 식)"""
+
+    def __init__(self, n_docs: int = 0, doc_freq: np.ndarray | None = None):
+        self.n_docs = n_docs
+        self.doc_freq = doc_freq if doc_freq is not None else np.zeros(HASH_FEATURES, dtype=np.int64)
+
+    def update_and_transform(self, documents: list) -> sparse.csr_matrix:
+        counts = _vectorizer.transform(documents).tocsr()
+        self.n_docs += counts.shape[0]
+        self.doc_freq += np.bincount(counts.indices, minlength=HASH_FEATURES)
+        idf = np.log((1 + self.n_docs) / (1 + self.doc_freq)) + 1.0
+        X = counts.multiply(idf.reshape(1, -1)).tocsr()
+        norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+        return sparse.diags(1.0 / np.maximum(norms, 1e-12)) @ X
+
+
+def _update_top_terms(top_terms: dict, documents: list, labels: np.ndarray):
+    analyzer = _vectorizer.build_analyzer()
+    for doc, label in zip(documents, labels):
+        counter = Counter(top_terms.get(str(label), {}))
+        counter.update(analyzer(doc))
+        top_terms[str(label)] = dict(counter.most_common(TOP_TERMS_PER_CLUSTER))
+
+
+def _daily_deltas(daily: dict, days: list) -> dict:
+    """새로 갱신된 일자마다 직전 기록 일자 대비 클러스터 크기/감성 변화량을 계산합니다."""
+    all_days = sorted(daily)
+    deltas = {}
+    for day in days:
+        idx = all_days.index(day)
+        prev = daily[all_days[idx - 1]] if idx > 0 else {}
+        current = daily[day]
+        deltas[day] = {}
+        for cluster_id in sorted(set(current) | set(prev), key=int):
+            cur = current.get(cluster_id, {"count": 0, "sentiment": 0.0})
+            before = prev.get(cluster_id, {"count": 0, "sentiment": 0.0})
+            deltas[day][cluster_id] = {
+                "count": cur["count"],
+                "count_delta": cur["count"] - before["count"],
+                "sentiment": cur["sentiment"],
+                "sentiment_delta": round(cur["sentiment"] - before["sentiment"], 4),
+            }
+    return deltas
+
+
+def update_monitor(monitor_id: str, until_timestamp: int | None = None) -> dict:
+    """
+    워터마크 이후 새 문장으로 모델을 갱신하고 일자별 변화량을 반환합니다.
+    첫 실행에서 새 문장이 클러스터 수보다 적으면 워터마크를 옮기지 않고 다음 실행을 기다립니다.
+    """
+    with _locks[monitor_id]:
+        state = load_monitor(monitor_id)
+        if state is None:
+            return {"error": f"모니터를 찾을 수 없습니다: {monitor_id}"}
+
+        until_ts = int(until_timestamp if until_timestamp is not None else time.time())
+        points = _search_new_points(state["expanded_keywords"], state["watermark"], until_ts)
+        points = [p for p in points if p.get("sentence_nouns")]
+        print(f"🌀 Monitor {monitor_id}: {len(points)} new sentences since {datetime.fromtimestamp(state['watermark'])}")
+
+        model_path = _monitor_path(monitor_id, "model.joblib")
+        if os.path.exists(model_path):
+            saved = joblib.load(model_path)
+            model, tfidf = saved["model"], _RunningTfidf(saved["n_docs"], saved["doc_freq"])
+        else:
+            model = MiniBatchKMeans(n_clusters=state["num_clusters"], random_state=42, n_init=3)
+            tfidf = _RunningTfidf()
+            if len(points) < state["num_clusters"]:
+                return {"monitor_id": monitor_id, "new_documents": len(points), "daily_deltas": {},
+                        "message": "초기 모델을 학습하기에 새 문장이 부족합니다. 다음 갱신 때 다시 시도합니다."}
+
+        if not points:
+            state["watermark"] = until_ts
+            state["updated_at"] = datetime.now().isoformat()
+            _atomic_write_json(_monitor_path(monitor_id, "state.json"), state)
+            return {"monitor_id": monitor_id, "new_documents": 0, "daily_deltas": {}}
+
+        documents = [p["sentence_nouns"] for p in points]
+        X = tfidf.update_and_transform(documents)
+        model.partial_fit(X)
+        labels = model.predict(X)
+        sentiment, _ = score_texts([p["sentence"] for p in points])
+
+        # 일자별 집계 (같은 날짜가 이전 실행에 이미 있으면 누적 평균으로 합칩니다)
+        per_day = defaultdict(lambda: defaultdict(list))
+        for point, label in zip(points, labels):
+            day = datetime.fromtimestamp(point["date_timestamp"]).strftime("%Y-%m-%d")
+            per_day[day][str(label)].append(sentiment.get(point["sentence"], 0.0))
+        for day, clusters in per_day.items():
+            day_stats = state["daily"].setdefault(day, {})
+            for cluster_id, scores in clusters.items():
+                prev = day_stats.get(cluster_id, {"count": 0, "sentiment": 0.0})
+                count = prev["count"] + len(scores)
+                mean = (prev["sentiment"] * prev["count"] + float(np.sum(scores))) / count
+                day_stats[cluster_id] = {"count": count, "sentiment": round(mean, 4)}
+
+        _update_top_terms(state["top_terms"], documents, labels)
+        state["watermark"] = until_ts
+        state["n_docs"] += len(points)
+        state["updated_at"] = datetime.now().isoformat()
+
+        joblib.dump({"model": model, "n_docs": tfidf.n_docs, "doc_freq": tfidf.doc_freq}, model_path)
+        _atomic_write_json(_monitor_path(monitor_id, "state.json"), state)
+
+        report = {
+            "monitor_id": monitor_id,
+            "keyword": state["keyword"],
+            "new_documents": len(points),
+            "watermark": state["watermark"],
+            "daily_deltas": _daily_deltas(state["daily"], sorted(per_day)),
+            "cluster_keywords": {cid: list(terms)[:10] for cid, terms in state["top_terms"].items()},
+        }
+        print(f"💾 Monitor {monitor_id} updated: {len(points)} docs, days={sorted(per_day)}")
+        return report
+
+
+def run_voc_monitor(workspace: dict, keyword: str, product_type: str | None = None, num_clusters: int = 5):
+    """
+    [도구] 키워드 모니터를 (없으면 등록 후) 갱신하고 일자별 클러스터 변화를 워크스페이스에 저장합니다.
+    """
+    product_type = product_type or workspace.get("artifacts", {}).get("product_type")
+    state = create_monitor(keyword, product_type, num_clusters)
+    report = update_monitor(state["monitor_id"])
+    if "error" not in report:
+        workspace["artifacts"]["voc_monitor_report"] = report
+    return {"voc_monitor_report": report}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="VOC 모니터링")
+    sub = parser.add_subparsers(dest="command", required=True)
+    create_parser = sub.add_parser("create", help="모니터를 등록합니다.")
+    create_parser.add_argument("--keyword", required=True)
+    create_parser.add_argument("--product-type", default=None)
+    create_parser.add_argument("--num-clusters", type=int, default=5)
+    create_parser.add_argument("--since", default=None, help="추적 시작일 (YYYY-MM-DD). 기본값은 지금")
+    update_parser = sub.add_parser("update", help="모니터 하나를 갱신합니다.")
+    update_parser.add_argument("monitor_id")
+    sub.add_parser("update-all", help="등록된 모든 모니터를 갱신합니다.")
+    sub.add_parser("list", help="등록된 모니터 목록")
+
+    args = parser.parse_args()
+    if args.command == "create":
+        since = int(datetime.strptime(args.since, "%Y-%m-%d").timestamp()) if args.since else None
+        create_monitor(args.keyword, args.product_type, args.num_clusters, since)
+    elif args.command == "update":
+        print(json.dumps(update_monitor(args.monitor_id), ensure_ascii=False, indent=2))
+    elif args.command == "update-all":
+        for monitor in list_monitors():
+            print(json.dumps(update_monitor(monitor["monitor_id"]), ensure_ascii=False, indent=2))
+    else:
+        for monitor in list_monitors():
+            print(f"{monitor['monitor_id']}  {monitor['keyword']}  {monitor['product_type']}  "
+                  f"docs={monitor['n_docs']}  watermark={datetime.fromtimestamp(monitor['watermark'])}")
@@ -0,0 +1,307 @@
+# agents/web_table.py
+"""
+검색 결과(web_results)를 열 단위(columnar) 표로 사이드 아티팩트 저장소에 보관합니다.
+- 문자열 필드(id, original_text, text, sentence_nouns ...)는 표 전체가 공유하는 문자열 사전의 코드(int32)로,
+  숫자 필드(score, date_timestamp ...)는 int64/float64 배열로 저장합니다. 그 밖의 값(list, dict 등)은 워크스페이스와 같은
+  코덱(workspace_codec)으로 직렬화해 별도의 바이트 사전에 넣습니다. (kind "packed", 이전 표의 "json" 열도 그대로 읽습니다)
+  sentence/original_text/text 처럼 같은 문장이 여러 필드에 들어가도 사전에는 한 번만 저장됩니다.
+- 워크스페이스의 retrieved_data에는 표 참조(web_results_ref)와 건수, 앞부분 미리보기만 남습니다.
+  표는 세션의 원본 데이터이므로 durable 아티팩트로 저장해 용량 기준 LRU 정리 대상에서 빠집니다. (artifact_store)
+  API에서는 retrieved_data.web_results 대신 web_results_preview를 주고, 전체 행은 GET /sessions/{id}/web_results로 나눠 받습니다.
+- 기존 코드는 get_web_results()가 돌려주는 행 뷰(WebRow, dict처럼 .get/[] 사용 가능)를 그대로 쓰면 되고,
+  "모든 sentence_nouns" 같은 열 단위 접근은 web_column()/WebTable.column()으로 한 번에 읽습니다.
+- 이전 형식(web_results 리스트)이 들어 있는 워크스페이스도 같은 함수로 읽을 수 있습니다.
+"""
+
+import json
+from collections import OrderedDict
+from collections.abc import Mapping
+
+import numpy as np
+
+from .artifact_store import save_table, load_table
+from .workspace_codec import serialize, deserialize, default_format
+
+MISSING = -2  # 행에 해당 키가 없음
+NULL = -1     # 값이 None
+WEB_RESULTS_PREVIEW = 10
+MAX_OPEN_TABLES = 8
+
+_ABSENT = object()
+_open_tables = OrderedDict()  # artifact_id -> WebTable
+
+
+class _StringDictionary:
+    """값(str 또는 bytes) -> 코드. bytes 사전은 코덱으로 직렬화한 값(packed 열)에 씁니다."""
+
+    def __init__(self):
+        self.index = {}
+        self.strings = []
+
+    def code(self, value: str) -> int:
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+    def arrays(self) -> tuple:
+        # Arrow 문자열 열과 같은 구성: UTF-8 바이트를 이어 붙인 blob + 각 문자열의 시작 offset
+        encoded = [s.encode("utf-8") if isinstance(s, str) else s for s in self.strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(b) for b in encoded])
+        blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return blob, offsets
+
+
+def _field_kind(values: list) -> str:
+    present = [v for v in values if v is not _ABSENT]
+    if present and len(present) == len(values):
+        if all(isinstance(v, int) and not isinstance(v, bool) for v in present):
+            return "int"
+        if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+            return "float"
+    if all(v is None or isinstance(v, str) for v in present):
+        return "str"
+    return "packed"
+
+
+def _encode_codes(values: list, strings: _StringDictionary, fmt: bytes | None = None) -> np.ndarray:
+    """fmt가 있으면 값을 코덱으로 직렬화한 바이트로 사전에 넣습니다. (모르는 타입이면 TypeError)"""
+    codes = np.empty(len(values), dtype=np.int32)
+    for i, v in enumerate(values):
+        if v is _ABSENT:
+            codes[i] = MISSING
+        elif v is None:
+            codes[i] = NULL
+        else:
+            codes[i] = strings.code(serialize(v, fmt) if fmt else v)
+    return codes
+
+
+def save_web_results(web_results: list) -> dict:
+    """web_results(dict 리스트)를 열 단위 표로 저장하고 참조 dict를 반환합니다."""
+    field_names = list(dict.fromkeys(key for row in web_results for key in row))
+    strings, packed = _StringDictionary(), _StringDictionary()
+    fmt = default_format()
+    columns, fields = {}, {}
+    for name in field_names:
+        values = [row.get(name, _ABSENT) for row in web_results]
+        kind = _field_kind(values)
+        if kind in ("int", "float"):
+            try:
+                columns[name] = np.asarray(values, dtype=np.int64 if kind == "int" else np.float64)
+            except OverflowError:
+                kind = "packed"
+        if kind == "str":
+            columns[name] = _encode_codes(values, strings)
+        elif kind == "packed":
+            columns[name] = _encode_codes(values, packed, fmt)
+        fields[name] = kind
+
+    blob, offsets = strings.arrays()
+    columns["__strings_blob"] = blob
+    columns["__strings_offsets"] = offsets
+    meta = {"fields": fields, "num_rows": len(web_results)}
+    if packed.strings:
+        columns["__packed_blob"], columns["__packed_offsets"] = packed.arrays()
+        meta["packed_format"] = fmt.decode("ascii")
+    return save_table(columns, meta, durable=True)
+
+
+class WebTable:
+    """열 단위 검색 결과 표. 열은 mmap으로 읽고, 문자열 사전과 디코딩한 열은 처음 사용할 때 한 번만 만듭니다."""
+
+    def __init__(self, ref: dict):
+        self.ref = ref
+        self.fields = ref["fields"]
+        self._arrays = load_table(ref)
+        self._num_rows = int(ref["num_rows"])
+        self._strings = None
+        self._packed = None
+        self._columns = {}
+
+    def __len__(self) -> int:
+        return self._num_rows
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [WebRow(self, i) for i in range(*index.indices(self._num_rows))]
+        if index < 0:
+            index += self._num_rows
+        if not 0 <= index < self._num_rows:
+            raise IndexError(index)
+        return WebRow(self, index)
+
+    def __iter__(self):
+        for i in range(self._num_rows):
+            yield WebRow(self, i)
+
+    def strings(self) -> list:
+        if self._strings is None:
+            blob = bytes(self._arrays["__strings_blob"])
+            offsets = self._arrays["__strings_offsets"].tolist()
+            self._strings = [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+        return self._strings
+
+    def _decode_packed(self, code: int):
+        if self._packed is None:
+            blob = bytes(self._arrays["__packed_blob"])
+            offsets = self._arrays["__packed_offsets"].tolist()
+            self._packed = [blob[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+        return deserialize(self._packed[code], self.ref["packed_format"].encode("ascii"))
+
+    def _decode_code(self, kind: str, code: int):
+        if kind == "packed":
+            return self._decode_packed(code)
+        text = self.strings()[code]
+        return json.loads(text) if kind == "json" else text  # "json": 이전 형식 표
+
+    def codes(self, name: str) -> np.ndarray:
+        """문자열/JSON 필드의 사전 코드 배열 (MISSING=-2, NULL=-1)."""
+        if self.fields.get(name) not in ("str", "json", "packed"):
+            raise KeyError(f"사전 인코딩된 필드가 아닙니다: {name}")
+        return self._arrays[name]
+
+    def nonempty(self, name: str) -> np.ndarray:
+        """값이 있고 빈 문자열이 아닌 행의 bool 마스크 (문자열 필드)."""
+        if name not in self.fields:
+            return np.zeros(self._num_rows, dtype=bool)
+        if self.fields[name] in ("int", "float"):
+            return np.ones(self._num_rows, dtype=bool)
+        codes = np.asarray(self.codes(name))
+        if self.fields[name] == "packed":
+            return codes >= 0
+        lengths = np.diff(self._arrays["__strings_offsets"])
+        mask = codes >= 0
+        mask[mask] = lengths[codes[mask]] > 0
+        return mask
+
+    def column(self, name: str) -> list:
+        """필드 하나를 파이썬 리스트로 반환합니다. (값이 없는 행은 None)"""
+        if name in self._columns:
+            return self._columns[name]
+        kind = self.fields.get(name)
+        if kind is None:
+            values = [None] * self._num_rows
+        elif kind in ("int", "float"):
+            values = self._arrays[name].tolist()
+        else:
+            values = [self._decode_code(kind, c) if c >= 0 else None for c in self._arrays[name].tolist()]
+        self._columns[name] = values
+        return values
+
+    def value(self, index: int, name: str, default=_ABSENT):
+        kind = self.fields.get(name)
+        if kind is None:
+            if default is _ABSENT:
+                raise KeyError(name)
+            return default
+        if name in self._columns:
+            if kind in ("str", "json", "packed") and self._arrays[name][index] == MISSING:
+                if default is _ABSENT:
+                    raise KeyError(name)
+                return default
+            return self._columns[name][index]
+        if kind == "int":
+            return int(self._arrays[name][index])
+        if kind == "float":
+            return float(self._arrays[name][index])
+        code = int(self._arrays[name][index])
+        if code == MISSING:
+            if default is _ABSENT:
+                raise KeyError(name)
+            return default
+        if code == NULL:
+            return None
+        return self._decode_code(kind, code)
+
+    def present_fields(self, index: int) -> list:
+        return [
+            name for name, kind in self.fields.items()
+            if kind in ("int", "float") or self._arrays[name][index] != MISSING
+        ]
+
+    def row(self, index: int) -> dict:
+        return {name: self.value(index, name) for name in self.present_fields(index)}
+
+    def to_records(self) -> list:
+        return [self.row(i) for i in range(self._num_rows)]
+
+
+class WebRow(Mapping):
+    """표의 한 행을 dict처럼 읽는 가벼운 뷰입니다. 값은 접근할 때 디코딩합니다."""
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: WebTable, index: int):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, key):
+        return self._table.value(self._index, key)
+
+    def __iter__(self):
+        return iter(self._table.present_fields(self._index))
+
+    def __len__(self) -> int:
+        return len(self._table.present_fields(self._index))
+
+    def copy(self) -> dict:
+        return self._table.row(self._index)
+
+    def __repr__(self) -> str:
+        return f"WebRow({self.copy()!r})"
+
+
+def open_web_table(ref: dict) -> WebTable:
+    """같은 표를 여러 번 열지 않도록 최근에 연 표를 재사용합니다."""
+    table = _open_tables.get(ref["artifact_id"])
+    if table is None:
+        table = WebTable(ref)
+        _open_tables[ref["artifact_id"]] = table
+        while len(_open_tables) > MAX_OPEN_TABLES:
+            _open_tables.popitem(last=False)
+    else:
+        _open_tables.move_to_end(ref["artifact_id"])
+    return table
+
+
+def pack_web_results(web_results: list) -> dict:
+    """retrieved_data에 넣을 필드를 만듭니다: 표 참조, 건수, 미리보기(앞 WEB_RESULTS_PREVIEW건)."""
+    return {
+        "web_results_ref": save_web_results(web_results),
+        "num_web_results": len(web_results),
+        "web_results_preview": web_results[:WEB_RESULTS_PREVIEW],
+    }
+
+
+def get_web_results(retrieved_data: dict | None):
+    """retrieved_data의 검색 결과를 반환합니다. 열 단위 형식이면 WebTable, 이전 형식이면 dict 리스트."""
+    if not retrieved_data:
+        return []
+    ref = retrieved_data.get("web_results_ref")
+    if ref:
+        return open_web_table(ref)
+    return retrieved_data.get("web_results") or []
+
+
+def web_column(retrieved_data: dict | None, name: str) -> list:
+    """모든 검색 결과의 필드 하나를 리스트로 반환합니다. (예: 모든 sentence_nouns)"""
+    web_results = get_web_results(retrieved_data)
+    if isinstance(web_results, WebTable):
+        return web_results.column(name)
+    return [d.get(name) for d in web_results]
+
+
+def count_web_results(retrieved_data: dict | None) -> int:
+    if not retrieved_data:
+        return 0
+    if retrieved_data.get("web_results_ref"):
+        return int(retrieved_data.get("num_web_results", retrieved_data["web_results_ref"]["num_rows"]))
+    return len(retrieved_data.get("web_results") or [])
+
+
+def web_results_id(retrieved_data: dict | None) -> str | None:
+    """열 단위 표의 내용 기반 ID. (같은 검색 결과면 같은 값, 이전 형식이면 None)"""
+    ref = (retrieved_data or {}).get("web_results_ref")
+    return ref["artifact_id"] if ref else None
@@ -0,0 +1,185 @@
+# agents/workspace_codec.py
+"""
+워크스페이스 값(아티팩트, 히스토리 메시지, meta)을 Redis에 저장할 바이트로 변환합니다.
+- 기본 인코더는 msgpack, 설치되어 있지 않으면 JSON(orjson이 있으면 orjson)을 씁니다.
+- datetime/date 객체는 문자열로 바꿔 두었다가 추측해서 되돌리지 않고, 타입 태그를 붙여 저장합니다.
+  (msgpack ExtType, JSON은 {"$dt": ...} 형태) 그래서 불러올 때 전체 트리를 훑으며 문자열을 파싱할 필요가 없습니다.
+- JSON은 dict 키를 문자열로만 저장하므로, 문자열이 아닌 키(int 클러스터 ID 등)가 있는 dict는 {"$map": [[키, 값], ...]}로
+  저장해 msgpack과 같은 값으로 돌아오게 합니다.
+  메시지의 tool_calls와 meta의 날짜 필드는 저장 전에 workspace_model.py 스키마가 변환합니다.
+- 인코딩 결과가 WORKSPACE_COMPRESS_THRESHOLD 바이트 이상이면 zstd(없으면 gzip)로 압축합니다.
+- 저장 형식: MAGIC(1바이트) + 인코더(1바이트) + 압축(1바이트) + 본문. MAGIC이 없는 값은 이전 형식(JSON 문자열)으로 읽습니다.
+"""
+
+import os
+import gzip
+import json
+from datetime import datetime, date
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC = b"\x01"
+FORMAT_MSGPACK = b"M"
+FORMAT_JSON = b"J"
+COMPRESS_NONE = b"-"
+COMPRESS_ZSTD = b"z"
+COMPRESS_GZIP = b"g"
+
+WORKSPACE_CODEC = os.getenv("WORKSPACE_CODEC", "msgpack")
+WORKSPACE_COMPRESSION = os.getenv("WORKSPACE_COMPRESSION", "zstd")
+WORKSPACE_COMPRESS_THRESHOLD = int(os.getenv("WORKSPACE_COMPRESS_THRESHOLD", 4096))
+ZSTD_LEVEL = 3
+GZIP_LEVEL = 6
+
+# msgpack ExtType 코드
+EXT_DATETIME = 1
+EXT_DATE = 2
+EXT_TOOL_CALL = 3  # 읽기 전용: 스키마 도입 전에 저장된 값
+
+
+def default_format() -> bytes:
+    return FORMAT_MSGPACK if WORKSPACE_CODEC == "msgpack" and msgpack is not None else FORMAT_JSON
+
+
+def default_compression() -> bytes:
+    if WORKSPACE_COMPRESSION == "none":
+        return COMPRESS_NONE
+    if WORKSPACE_COMPRESSION == "zstd" and zstandard is not None:
+        return COMPRESS_ZSTD
+    return COMPRESS_GZIP
+
+
+def _plain(obj):
+    """인코더가 모르는 그 밖의 객체: numpy 스칼라/배열, pydantic 모델 등."""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(exclude_none=True)
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Cannot serialize object of type {type(obj).__name__}")
+
+
+# --- msgpack ---
+def _msgpack_default(obj):
+    if isinstance(obj, datetime):
+        return msgpack.ExtType(EXT_DATETIME, obj.isoformat().encode("utf-8"))
+    if isinstance(obj, date):
+        return msgpack.ExtType(EXT_DATE, obj.isoformat().encode("utf-8"))
+    return _plain(obj)
+
+
+def _msgpack_ext_hook(code: int, data: bytes):
+    if code == EXT_DATETIME:
+        return datetime.fromisoformat(data.decode("utf-8"))
+    if code == EXT_DATE:
+        return date.fromisoformat(data.decode("utf-8"))
+    if code == EXT_TOOL_CALL:
+        return msgpack.unpackb(data, raw=False)
+    return msgpack.ExtType(code, data)
+
+
+# --- JSON ---
+def _json_default(obj):
+    if isinstance(obj, datetime):
+        return {"$dt": obj.isoformat()}
+    if isinstance(obj, date):
+        return {"$date": obj.isoformat()}
+    return _plain(obj)
+
+
+def _json_keys(obj):
+    """문자열이 아닌 키가 있는 dict를 {"$map": [[키, 값], ...]}로 바꿉니다. (키는 int/float/bool/None만)"""
+    if isinstance(obj, dict):
+        if all(isinstance(k, str) for k in obj):
+            return {k: _json_keys(v) for k, v in obj.items()}
+        items = []
+        for k, v in obj.items():
+            if hasattr(k, "item") and not isinstance(k, (str, int, float)):
+                k = k.item()  # numpy 스칼라 키
+            if not (k is None or isinstance(k, (str, int, float))):
+                raise TypeError(f"Cannot serialize dict key of type {type(k).__name__}")
+            items.append([k, _json_keys(v)])
+        return {"$map": items}
+    if isinstance(obj, (list, tuple)):
+        return [_json_keys(v) for v in obj]
+    return obj
+
+
+def _json_object_hook(obj: dict):
+    if len(obj) == 1:
+        if "$map" in obj:
+            return {k: v for k, v in obj["$map"]}
+        if "$dt" in obj:
+            return datetime.fromisoformat(obj["$dt"])
+        if "$date" in obj:
+            return date.fromisoformat(obj["$date"])
+        if "$tool_call" in obj:
+            return obj["$tool_call"]
+    return obj
+
+
+def serialize(value, fmt: bytes | None = None) -> bytes:
+    """압축 전 본문 바이트. (같은 값이면 같은 바이트이므로 변경 감지용 해시에도 씁니다)"""
+    fmt = fmt or default_format()
+    if fmt == FORMAT_MSGPACK:
+        return msgpack.packb(value, default=_msgpack_default, use_bin_type=True, datetime=False)
+    value = _json_keys(value)
+    if orjson is not None:
+        return orjson.dumps(value, default=_json_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    return json.dumps(value, default=_json_default, ensure_ascii=False).encode("utf-8")
+
+
+def deserialize(raw: bytes, fmt: bytes):
+    if fmt == FORMAT_MSGPACK:
+        return msgpack.unpackb(raw, ext_hook=_msgpack_ext_hook, raw=False, strict_map_key=False)
+    return json.loads(raw, object_hook=_json_object_hook)
+
+
+def frame(raw: bytes, fmt: bytes | None = None, compression: bytes | None = None) -> bytes:
+    """헤더를 붙이고, 임계값 이상이면 압축합니다."""
+    fmt = fmt or default_format()
+    compression = compression or default_compression()
+    if len(raw) < WORKSPACE_COMPRESS_THRESHOLD or compression == COMPRESS_NONE:
+        return MAGIC + fmt + COMPRESS_NONE + raw
+    if compression == COMPRESS_ZSTD:
+        body = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    else:
+        body = gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)
+    return MAGIC + fmt + compression + body
+
+
+def unframe(payload: bytes) -> tuple:
+    """(인코더, 압축 해제된 본문). 이전 형식(헤더 없는 JSON 문자열)이면 인코더는 None."""
+    if not payload.startswith(MAGIC):
+        return None, payload
+    fmt, compression, body = payload[1:2], payload[2:3], payload[3:]
+    if compression == COMPRESS_ZSTD:
+        body = zstandard.ZstdDecompressor().decompress(body)
+    elif compression == COMPRESS_GZIP:
+        body = gzip.decompress(body)
+    return fmt, body
+
+
+def encode(value) -> bytes:
+    fmt = default_format()
+    return frame(serialize(value, fmt), fmt)
+
+
+def decode(payload: bytes):
+    fmt, raw = unframe(payload)
+    if fmt is None:
+        # 이전 형식(헤더 없는 JSON). 타입 필드는 호출하는 쪽에서 스키마로 변환합니다. (workspace_model.py)
+        return json.loads(raw)
+    return deserialize(raw, fmt)
@@ -0,0 +1,177 @@
+# agents/workspace_model.py
+"""
+워크스페이스 저장 형식의 스키마입니다. (메시지, tool_call, meta)
+타입이 있는 필드는 여기 선언된 것뿐입니다.
+- 메시지의 tool_calls: ToolCall (저장/메모리 모두 {"id", "type", "function": {"name", "arguments"}} dict)
+- meta의 created_at / updated_at: datetime (ISO 문자열로 저장)
+저장할 때와 불러올 때 이 필드만 명시적으로 변환하고, 그 밖의 값(VOC 문장, 요약, 페르소나 ...)은 그대로 둡니다.
+예전처럼 모든 문자열에 fromisoformat을 시도하거나, id/function 키가 있는 아무 dict를 tool_call로 바꾸지 않습니다.
+메모리에서는 기존 코드가 쓰던 dict 형태를 그대로 유지합니다. (to_dict)
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+
+HISTORY_FIELDS = ("internal_history", "user_history")
+META_DATETIME_FIELDS = ("created_at", "updated_at")
+
+
+def _get(obj, name: str, default=None):
+    """dict와 OpenAI 응답 객체(pydantic)를 같은 방식으로 읽습니다."""
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+
+def encode_datetime(value: datetime | None) -> str | None:
+    return value.isoformat() if value is not None else None
+
+
+def decode_datetime(value) -> datetime | None:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+@dataclass(slots=True)
+class ToolCall:
+    id: str
+    name: str
+    arguments: str
+    type: str = "function"
+
+    @classmethod
+    def from_value(cls, obj) -> "ToolCall":
+        function = _get(obj, "function")
+        return cls(
+            id=_get(obj, "id"),
+            name=_get(function, "name"),
+            arguments=_get(function, "arguments") or "",
+            type=_get(obj, "type") or "function",
+        )
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "type": self.type, "function": {"name": self.name, "arguments": self.arguments}}
+
+
+@dataclass(slots=True)
+class Message:
+    role: str
+    content: str | None = None
+    tool_calls: list[ToolCall] | None = None
+    tool_call_id: str | None = None
+    name: str | None = None
+    extra: dict = field(default_factory=dict)  # 스키마에 없는 키 (그대로 보존)
+
+    @classmethod
+    def from_value(cls, obj) -> "Message":
+        if not isinstance(obj, dict):
+            obj = obj.model_dump(exclude_none=True)
+        tool_calls = obj.get("tool_calls")
+        return cls(
+            role=obj["role"],
+            content=obj.get("content"),
+            tool_calls=[ToolCall.from_value(tc) for tc in tool_calls] if tool_calls else None,
+            tool_call_id=obj.get("tool_call_id"),
+            name=obj.get("name"),
+            extra={k: v for k, v in obj.items()
+                   if k not in ("role", "content", "tool_calls", "tool_call_id", "name")},
+        )
+
+    def to_dict(self) -> dict:
+        data = {"role": self.role, "content": self.content}
+        if self.tool_calls:
+            data["tool_calls"] = [tc.to_dict() for tc in self.tool_calls]
+        if self.tool_call_id is not None:
+            data["tool_call_id"] = self.tool_call_id
+        if self.name is not None:
+            data["name"] = self.name
+        data.update(self.extra)
+        return data
+
+
+@dataclass(slots=True)
+class WorkspaceMeta:
+    current_state: str | None = None
+    last_request_type: str | None = None
+    pending_jobs: list = field(default_factory=list)
+    artifact_names: list = field(default_factory=list)
+    artifact_summaries: dict = field(default_factory=dict)  # 이름 -> 한 줄 요약 (artifact_summary.py)
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+    extra: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_workspace(cls, workspace: dict, artifact_names: list, artifact_summaries: dict | None = None) -> "WorkspaceMeta":
+        known = ("current_state", "last_request_type", "pending_jobs", "artifacts", "artifact_names",
+                 "artifact_summaries") + HISTORY_FIELDS + META_DATETIME_FIELDS
+        return cls(
+            current_state=workspace.get("current_state"),
+            last_request_type=workspace.get("last_request_type"),
+            pending_jobs=list(workspace.get("pending_jobs") or []),
+            artifact_names=list(artifact_names),
+            artifact_summaries=dict(artifact_summaries or {}),
+            created_at=decode_datetime(workspace.get("created_at")),
+            updated_at=decode_datetime(workspace.get("updated_at")),
+            extra={k: v for k, v in workspace.items() if k not in known},
+        )
+
+    @classmethod
+    def from_record(cls, record: dict) -> "WorkspaceMeta":
+        known = ("current_state", "last_request_type", "pending_jobs", "artifact_names",
+                 "artifact_summaries") + META_DATETIME_FIELDS
+        return cls(
+            current_state=record.get("current_state"),
+            last_request_type=record.get("last_request_type"),
+            pending_jobs=record.get("pending_jobs") or [],
+            artifact_names=record.get("artifact_names") or [],
+            artifact_summaries=record.get("artifact_summaries") or {},
+            created_at=decode_datetime(record.get("created_at")),
+            updated_at=decode_datetime(record.get("updated_at")),
+            extra={k: v for k, v in record.items() if k not in known},
+        )
+
+    def to_record(self) -> dict:
+        """Redis에 저장할 dict. datetime 필드는 여기서만 문자열로 바뀝니다."""
+        return {
+            **self.extra,
+            "current_state": self.current_state,
+            "last_request_type": self.last_request_type,
+            "pending_jobs": self.pending_jobs,
+            "artifact_names": self.artifact_names,
+            "artifact_summaries": self.artifact_summaries,
+            "created_at": encode_datetime(self.created_at),
+            "updated_at": encode_datetime(self.updated_at),
+        }
+
+    def to_workspace_fields(self) -> dict:
+        """워크스페이스 dict에 들어갈 meta 필드 (artifact_names/artifact_summaries는 LazyArtifacts가 가집니다)."""
+        return {
+            **self.extra,
+            "current_state": self.current_state,
+            "last_request_type": self.last_request_type,
+            "pending_jobs": self.pending_jobs,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+def encode_message(message) -> dict:
+    return Message.from_value(message).to_dict()
+
+
+def decode_message(record: dict) -> dict:
+    return Message.from_value(record).to_dict()
+
+
+def workspace_from_record(record: dict) -> dict:
+    """
+    이전 형식(단일 JSON) 워크스페이스나 파일에서 읽은 일반 dict를 스키마에 맞춥니다.
+    메시지와 meta의 타입 필드만 변환하고 아티팩트는 그대로 둡니다.
+    """
+    meta = WorkspaceMeta.from_workspace(record, [])
+    workspace = meta.to_workspace_fields()
+    for name in HISTORY_FIELDS:
+        workspace[name] = [decode_message(m) for m in record.get(name) or []]
+    workspace["artifacts"] = record.get("artifacts") or {}
+    return workspace
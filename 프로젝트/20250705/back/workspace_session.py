@@ -0,0 +1,187 @@
+# agents/workspace_session.py
+"""
+요청 하나 동안의 워크스페이스 작업 단위(unit of work)입니다.
+- 요청 시작 시 한 번 불러오고, 요청 동안의 변경은 메모리의 workspace에만 쌓았다가 끝날 때 한 번만 저장합니다.
+  (도구 실행 후, 마지막 LLM 응답 후마다 잠금을 잡고 다시 직렬화하던 중간 저장을 없앱니다)
+- 본문이 예외나 요청 취소(클라이언트 연결 끊김)로 중간에 끝나도 __aexit__에서 그때까지의 변경을 저장합니다.
+- 저장이 끝내 실패하면 워크스페이스를 WORKSPACE_SPOOL_DIR에 파일로 남겨 두고, 같은 세션의 다음 요청에서 복구합니다.
+  파일에는 불러올 당시 Redis 워크스페이스의 저장 시각(base_updated_at)을 함께 남겨, 그 뒤 Redis가 다른 곳(다른 워커,
+  작업 완료 반영)에서 갱신되었으면 파일을 버리고 Redis 쪽을 씁니다. WORKSPACE_SPOOL_TTL이 지난 파일도 버립니다.
+- 불러오기가 실패하면 WorkspaceUnavailable을 올립니다. 빈 워크스페이스로 대신해 저장하면 기존 아티팩트가 지워지기 때문입니다.
+- 요청마다 Redis에서 보낸 시간과 쓴 바이트를 모아 로그와 응답 헤더(Server-Timing, X-Workspace-Bytes)로 남깁니다.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from contextlib import contextmanager
+
+from .utils import save_workspace_to_redis, load_workspace_from_redis
+from .workspace_codec import encode, decode
+from .workspace_model import workspace_from_record, decode_datetime, encode_datetime
+from .workspace_store import workspace_to_dict, stored_updated_at, WORKSPACE_TTL
+
+WORKSPACE_SPOOL_DIR = os.getenv("WORKSPACE_SPOOL_DIR", "./workspace_spool")
+WORKSPACE_SPOOL_TTL = int(os.getenv("WORKSPACE_SPOOL_TTL", WORKSPACE_TTL))
+
+
+class WorkspaceUnavailable(Exception):
+    """저장소에서 워크스페이스를 읽지 못했습니다. (저장된 워크스페이스가 없는 것과 다릅니다)"""
+
+
+def _spool_path(session_id: str) -> str:
+    return os.path.join(WORKSPACE_SPOOL_DIR, f"{session_id}.ws")
+
+
+def _sweep_spool():
+    """WORKSPACE_SPOOL_TTL이 지난 파일을 지웁니다. (Redis의 워크스페이스도 그때쯤 만료됩니다)"""
+    cutoff = time.time() - WORKSPACE_SPOOL_TTL
+    try:
+        entries = list(os.scandir(WORKSPACE_SPOOL_DIR))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def _spool_workspace(session_id: str, workspace: dict, base_updated_at):
+    os.makedirs(WORKSPACE_SPOOL_DIR, exist_ok=True)
+    _sweep_spool()
+    path = _spool_path(session_id)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    record = {"base_updated_at": encode_datetime(base_updated_at), "workspace": workspace_to_dict(workspace)}
+    with open(tmp_path, "wb") as f:
+        f.write(encode(record))
+    os.replace(tmp_path, path)
+
+
+def _load_spooled(session_id: str) -> tuple:
+    """(스풀된 워크스페이스, 그 워크스페이스가 기반한 Redis 저장 시각). 없거나 만료되었으면 (None, None)."""
+    path = _spool_path(session_id)
+    try:
+        if time.time() - os.path.getmtime(path) > WORKSPACE_SPOOL_TTL:
+            _drop_spooled(session_id)
+            return None, None
+        with open(path, "rb") as f:
+            record = decode(f.read())
+        return workspace_from_record(record["workspace"]), decode_datetime(record.get("base_updated_at"))
+    except FileNotFoundError:
+        return None, None
+    except Exception as e:
+        print(f"⚠️ Failed to read spooled workspace for session {session_id}: {e}")
+        return None, None
+
+
+def _drop_spooled(session_id: str):
+    try:
+        os.remove(_spool_path(session_id))
+    except FileNotFoundError:
+        pass
+
+
+class WorkspaceUnitOfWork:
+    """
+    async with WorkspaceUnitOfWork(session_id, new_workspace=create_new_workspace) as uow:
+        ... uow.workspace 수정 ...
+        await uow.commit()   # 생략하면 블록을 나갈 때 저장됩니다.
+
+    merge_external(session_id, workspace): 요청 밖에서 생긴 변경(끝난 작업 결과 등)을 반영하는 함수.
+    불러온 직후와 저장 직전에 호출되어, 요청 도중 반영된 변경을 이 저장이 덮어쓰지 않게 합니다.
+    """
+
+    def __init__(self, session_id: str, new_workspace=None, merge_external=None):
+        self.session_id = session_id
+        self.new_workspace = new_workspace or dict
+        self.merge_external = merge_external
+        self.workspace = None
+        self.base_updated_at = None  # 불러온 워크스페이스의 Redis 저장 시각 (스풀 파일의 최신 여부 판단용)
+        self.committed = False
+        self.recovered = False
+        self.stats = {"redis_ms": {}, "bytes": 0, "artifacts_written": 0, "messages_written": 0,
+                      "changed_artifacts": [], "spooled": False}
+
+    @contextmanager
+    def timed(self, label: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.stats["redis_ms"][label] = round(self.stats["redis_ms"].get(label, 0.0) + elapsed, 2)
+
+    async def __aenter__(self):
+        try:
+            await self._load()
+        except Exception as e:
+            raise WorkspaceUnavailable(f"워크스페이스를 불러오지 못했습니다: {e}") from e
+        if not self.workspace or not isinstance(self.workspace, dict):
+            self.workspace = self.new_workspace()
+            logging.info(f"New workspace initialized for session: {self.session_id}")
+        if self.merge_external:
+            with self.timed("merge"):
+                await asyncio.to_thread(self.merge_external, self.session_id, self.workspace)
+        return self
+
+    async def _load(self):
+        spooled, spool_base = await asyncio.to_thread(_load_spooled, self.session_id)
+        if spooled is not None:
+            with self.timed("load"):
+                redis_updated_at = await asyncio.to_thread(stored_updated_at, self.session_id)
+            if redis_updated_at is None or (spool_base is not None and redis_updated_at <= spool_base):
+                # 스풀 파일이 기반한 뒤로 Redis가 갱신되지 않았으므로 스풀 쪽이 최신입니다.
+                print(f"♻️ Recovered spooled workspace for session: {self.session_id}")
+                self.workspace, self.recovered, self.base_updated_at = spooled, True, spool_base
+                return
+            print(f"⚠️ Discarding stale spooled workspace for session {self.session_id} "
+                  f"(spooled from {spool_base}, Redis saved at {redis_updated_at})")
+            await asyncio.to_thread(_drop_spooled, self.session_id)
+        with self.timed("load"):
+            self.workspace = await asyncio.to_thread(load_workspace_from_redis, self.session_id)
+        if isinstance(self.workspace, dict):
+            self.base_updated_at = decode_datetime(self.workspace.get("updated_at"))
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if not self.committed:
+            # 본문이 commit 전에 끝났습니다. (예외, 취소) 지금까지의 변경을 잃지 않도록 저장합니다.
+            if exc_type is not None:
+                print(f"⚠️ Request for session {self.session_id} ended early ({exc_type.__name__}); saving workspace")
+            await asyncio.shield(self.commit())
+        return False
+
+    async def commit(self) -> dict:
+        """요청 동안의 변경을 한 번에 저장하고 요청 단위 통계를 반환합니다."""
+        if self.committed:
+            return self.stats
+        self.committed = True
+        if self.merge_external:
+            with self.timed("merge"):
+                await asyncio.to_thread(self.merge_external, self.session_id, self.workspace)
+        try:
+            with self.timed("save"):
+                saved = await asyncio.to_thread(save_workspace_to_redis, self.session_id, self.workspace)
+            for key in ("bytes", "artifacts_written", "messages_written"):
+                self.stats[key] += (saved or {}).get(key, 0)
+            self.stats["changed_artifacts"] = (saved or {}).get("changed_artifacts", [])
+            if self.recovered:
+                await asyncio.to_thread(_drop_spooled, self.session_id)
+        except Exception as e:
+            logging.error(f"Workspace save failed for session {self.session_id}, spooling to disk: {e}")
+            await asyncio.to_thread(_spool_workspace, self.session_id, self.workspace, self.base_updated_at)
+            self.stats["spooled"] = True
+            # 저장하지 못했으므로 이 요청에서 읽거나 바꾼 아티팩트를 모두 응답에 담습니다.
+            artifacts = self.workspace.get("artifacts") or {}
+            self.stats["changed_artifacts"] = list(
+                artifacts.loaded_items() if hasattr(artifacts, "loaded_items") else artifacts)
+        self.stats["redis_ms"]["total"] = round(
+            sum(v for k, v in self.stats["redis_ms"].items() if k != "total"), 2)
+        print(f"📊 Workspace I/O for session {self.session_id}: {self.stats}")
+        return self.stats
+
+    def response_headers(self) -> dict:
+        timings = ", ".join(f"ws-{label};dur={ms}" for label, ms in self.stats["redis_ms"].items())
+        return {"Server-Timing": timings, "X-Workspace-Bytes": str(self.stats["bytes"])}
@@ -0,0 +1,390 @@
+# agents/workspace_store.py
+"""
+워크스페이스를 Redis에 나눠서 저장합니다.
+- session:{id}:ws:meta               아티팩트/히스토리를 뺀 나머지 필드 + 아티팩트 이름 목록 (JSON)
+- session:{id}:ws:artifact:{name}    아티팩트 하나당 키 하나 (JSON)
+- session:{id}:ws:history:{field}    internal_history / user_history 메시지 리스트 (Redis list, 메시지당 JSON 하나)
+
+불러올 때는 meta와 히스토리만 읽고, 아티팩트는 처음 접근할 때 읽습니다. (LazyArtifacts, 여러 개는 MGET 한 번)
+프롬프트용 아티팩트 요약은 meta에 함께 저장되므로 요약만 필요할 때는 아티팩트를 읽지 않습니다.
+저장할 때는 불러온 뒤 내용이 바뀐 아티팩트만 MSET으로 쓰고, 히스토리는 새로 추가된 메시지만 RPUSH 합니다.
+모든 쓰기는 하나의 파이프라인으로 보냅니다. 값의 바이트 형식(msgpack + 압축)은 workspace_codec.py 가,
+메시지/meta의 타입 필드(tool_calls, 날짜) 변환은 workspace_model.py 가 정합니다.
+이전 형식(session:{id}:workspace 단일 JSON)은 처음 불러올 때 읽어서, 다음 저장 때 새 형식으로 옮깁니다.
+아티팩트가 가리키는 사이드 아티팩트(artifact_store)는 저장할 때 세션 pin으로 기록해, 워크스페이스가 살아 있는 동안 지워지지 않게 합니다.
+"""
+
+import hashlib
+import logging
+from datetime import datetime
+from collections.abc import MutableMapping
+
+from redis.lock import Lock
+
+from .utils import get_redis_binary_client
+from .workspace_codec import serialize, deserialize, frame, unframe, default_format, decode
+from .workspace_model import HISTORY_FIELDS, WorkspaceMeta, encode_message, decode_message, workspace_from_record
+from .artifact_summary import summarize_value, artifact_summaries
+from .artifact_store import pin_artifacts, touch_pins, has_pins
+
+WORKSPACE_TTL = 86400
+
+
+def _meta_key(session_id: str) -> str:
+    return f"session:{session_id}:ws:meta"
+
+
+def _artifact_key(session_id: str, name: str) -> str:
+    return f"session:{session_id}:ws:artifact:{name}"
+
+
+def _history_key(session_id: str, field: str) -> str:
+    return f"session:{session_id}:ws:history:{field}"
+
+
+def _legacy_key(session_id: str) -> str:
+    return f"session:{session_id}:workspace"
+
+
+def _digest(raw: bytes) -> str:
+    return hashlib.sha1(raw).hexdigest()
+
+
+def _encode(value) -> tuple:
+    """(Redis에 쓸 값, 변경 감지용 해시). 해시는 압축 전 본문으로 계산해 압축 비용 없이 비교합니다."""
+    fmt = default_format()
+    raw = serialize(value, fmt)
+    return frame(raw, fmt), _digest(raw)
+
+
+def _serialize(value) -> tuple:
+    """(압축 전 본문, 해시). 바뀐 값만 frame()으로 압축하도록 직렬화와 압축을 나눕니다."""
+    raw = serialize(value, default_format())
+    return raw, _digest(raw)
+
+
+def _encode_if_changed(value, previous_digest: str | None) -> tuple | None:
+    """해시가 previous_digest와 다를 때만 압축(frame)까지 해서 (값, 해시)를 반환합니다. 같으면 None."""
+    raw, digest = _serialize(value)
+    if digest == previous_digest:
+        return None
+    return frame(raw, default_format()), digest
+
+
+def _decode(payload: bytes) -> tuple:
+    """(값, 변경 감지용 해시). 이전 형식 값은 해시가 달라지므로 다음 저장 때 새 형식으로 다시 쓰입니다."""
+    fmt, raw = unframe(payload)
+    if fmt is None:
+        return decode(payload), None
+    return deserialize(raw, fmt), _digest(raw)
+
+
+class LazyArtifacts(MutableMapping):
+    """
+    접근할 때 Redis에서 읽어 오는 아티팩트 dict.
+    불러온 시점의 내용 해시를 기억해 두었다가, 저장할 때 해시가 달라진 아티팩트만 씁니다.
+    (값을 통째로 바꾸든, 불러온 dict/list를 직접 수정하든 모두 감지됩니다)
+    """
+
+    def __init__(self, session_id: str, names: list, summaries: dict | None = None):
+        self.session_id = session_id
+        self._names = list(names)  # Redis에 저장된 아티팩트 이름 (저장 순서 유지)
+        self._summaries = dict(summaries or {})  # 마지막 저장 시점의 요약 (읽지 않은 아티팩트용)
+        self._values = {}
+        self._digests = {}  # 이름 -> 불러온(또는 마지막으로 저장한) 시점의 내용 해시
+        self._deleted = set()
+
+    def _load(self, names):
+        missing = [n for n in names if n in self._names and n not in self._values and n not in self._deleted]
+        if not missing:
+            return
+        r = get_redis_binary_client()
+        payloads = r.mget([_artifact_key(self.session_id, n) for n in missing]) if r else [None] * len(missing)
+        for name, payload in zip(missing, payloads):
+            if payload is None:
+                # TTL이 지나 아티팩트 키만 사라진 경우: 없는 아티팩트로 취급합니다. (None을 넣으면 저장 때 None이 쓰입니다)
+                self._names.remove(name)
+                self._summaries.pop(name, None)
+                continue
+            self._values[name], self._digests[name] = _decode(payload)
+
+    def load_all(self):
+        self._load(self._names)
+
+    def __getitem__(self, name):
+        if name in self._deleted:
+            raise KeyError(name)
+        if name not in self._values:
+            if name not in self._names:
+                raise KeyError(name)
+            self._load([name])
+            if name not in self._values:
+                raise KeyError(name)
+        return self._values[name]
+
+    def __setitem__(self, name, value):
+        self._values[name] = value
+        self._deleted.discard(name)
+
+    def __delitem__(self, name):
+        if name not in self:
+            raise KeyError(name)
+        self._values.pop(name, None)
+        self._deleted.add(name)
+
+    def __contains__(self, name):
+        return name not in self._deleted and (name in self._values or name in self._names)
+
+    def __iter__(self):
+        seen = set()
+        for name in list(self._names) + list(self._values):
+            if name not in seen and name not in self._deleted:
+                seen.add(name)
+                yield name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def items(self):
+        self.load_all()
+        return super().items()
+
+    def values(self):
+        self.load_all()
+        return super().values()
+
+    def to_dict(self) -> dict:
+        self.load_all()
+        return {name: self._values[name] for name in self}
+
+    def summaries(self) -> dict:
+        """{이름: 요약 줄}. 읽어 온(또는 새로 넣은) 아티팩트는 현재 값으로, 나머지는 저장된 요약으로 만듭니다."""
+        result = {}
+        for name in self:
+            line = summarize_value(name, self._values[name]) if name in self._values else self._summaries.get(name)
+            if line:
+                result[name] = line
+        return result
+
+    def loaded_items(self) -> dict:
+        """Redis에서 읽어 오지 않고, 이 요청에서 이미 읽었거나 새로 넣은 아티팩트만 반환합니다."""
+        return {name: self._values[name] for name in self if name in self._values}
+
+    def dirty(self) -> tuple:
+        """(바뀐 아티팩트 {이름: 인코딩된 값}, 삭제된 이름 목록)"""
+        changed = {}
+        for name, value in self._values.items():
+            if name in self._deleted:
+                continue
+            encoded = _encode_if_changed(value, self._digests.get(name))
+            if encoded is not None:
+                changed[name] = encoded
+        deleted = [n for n in self._deleted if n in self._names]
+        return changed, deleted
+
+    def mark_clean(self, written: dict, deleted: list, summaries: dict):
+        self._summaries = dict(summaries)
+        for name, (_, digest) in written.items():
+            self._digests[name] = digest
+        self._names = list(self)
+        for name in deleted:
+            self._deleted.discard(name)
+            self._digests.pop(name, None)
+
+
+class StoredWorkspace(dict):
+    """Redis에서 불러온 워크스페이스. 저장 시 비교할 히스토리 기준(불러온 시점의 메시지 해시)을 함께 들고 있습니다."""
+
+    def __init__(self, session_id: str, data: dict, history_digests: dict):
+        super().__init__(data)
+        self.session_id = session_id
+        self.history_digests = history_digests
+
+
+def workspace_to_dict(workspace: dict) -> dict:
+    """응답/직렬화용 일반 dict. 지연 로딩 중인 아티팩트도 모두 읽어 옵니다."""
+    data = dict(workspace)
+    artifacts = data.get("artifacts")
+    if isinstance(artifacts, LazyArtifacts):
+        data["artifacts"] = artifacts.to_dict()
+    return data
+
+
+def stored_updated_at(session_id: str):
+    """Redis에 저장된 워크스페이스의 마지막 저장 시각. 새 형식 meta가 없으면 None."""
+    r = get_redis_binary_client()
+    if not r:
+        raise Exception("Redis connection unavailable")
+    payload = r.get(_meta_key(session_id))
+    return WorkspaceMeta.from_record(_decode(payload)[0]).updated_at if payload else None
+
+
+def workspace_response(workspace: dict, artifact_names: list, include_artifacts: bool = False) -> tuple:
+    """
+    API 응답용 (워크스페이스, 아티팩트). 워크스페이스에는 meta/히스토리와 아티팩트 이름·요약만 담고,
+    아티팩트 값은 artifact_names(이 요청에서 바뀐 것)만 담습니다. 나머지는 필요할 때 load_artifact()로 받습니다.
+    include_artifacts=True면 이전 응답 형식대로 모든 아티팩트를 읽어 워크스페이스와 아티팩트 양쪽에 담습니다.
+    """
+    artifacts = workspace.get("artifacts") or {}
+    data = {k: v for k, v in workspace.items() if k != "artifacts"}
+    data["artifact_names"] = list(artifacts.keys())
+    data["artifact_summaries"] = artifact_summaries(artifacts)
+    if include_artifacts:
+        data["artifacts"] = dict(artifacts.items())
+        return data, data["artifacts"]
+    return data, {name: artifacts[name] for name in artifact_names if name in artifacts}
+
+
+def load_artifact(session_id: str, name: str):
+    """저장된 아티팩트 하나를 읽습니다. 없으면 KeyError."""
+    r = get_redis_binary_client()
+    if not r:
+        raise Exception("Redis connection unavailable")
+    payload = r.get(_artifact_key(session_id, name))
+    if payload is None:
+        raise KeyError(name)
+    return _decode(payload)[0]
+
+
+def load_workspace(session_id: str) -> dict | None:
+    r = get_redis_binary_client()
+    if not r:
+        raise Exception("Redis connection unavailable")
+    with Lock(r, f"lock:session:{session_id}", timeout=10):
+        pipe = r.pipeline()
+        pipe.get(_meta_key(session_id))
+        for field in HISTORY_FIELDS:
+            pipe.lrange(_history_key(session_id, field), 0, -1)
+        meta_payload, *histories = pipe.execute()
+
+        if meta_payload is None:
+            legacy_payload = r.get(_legacy_key(session_id))
+            if legacy_payload:
+                # 이전 형식: 전체를 읽어 일반 dict로 반환하면 다음 저장 때 새 형식으로 모두 기록됩니다.
+                print(f"✅ Workspace loaded for session: {session_id} (legacy format)")
+                return workspace_from_record(_decode(legacy_payload)[0])
+            print(f"ℹ️ No workspace found for session: {session_id}")
+            return None
+
+        meta = WorkspaceMeta.from_record(_decode(meta_payload)[0])
+        names = meta.artifact_names
+        data = meta.to_workspace_fields()
+        history_digests = {}
+        for field, payloads in zip(HISTORY_FIELDS, histories):
+            decoded = [_decode(p) for p in payloads]
+            data[field] = [decode_message(value) for value, _ in decoded]
+            history_digests[field] = [digest for _, digest in decoded]
+        data["artifacts"] = LazyArtifacts(session_id, names, meta.artifact_summaries)
+
+        # 로드 시 TTL 갱신
+        pipe = r.pipeline()
+        for key in [_meta_key(session_id)] + [_history_key(session_id, f) for f in HISTORY_FIELDS] + \
+                   [_artifact_key(session_id, n) for n in names]:
+            pipe.expire(key, WORKSPACE_TTL)
+        pipe.execute()
+        touch_pins(session_id)
+        print(f"✅ Workspace loaded for session: {session_id}")
+        return StoredWorkspace(session_id, data, history_digests)
+
+
+def _queue_history_writes(pipe, key: str, baseline: list | None, stored_len: int, serialized: list):
+    """
+    히스토리 리스트를 갱신하는 명령을 파이프라인에 넣고 (메시지 해시 목록, 쓴 메시지 수, 쓴 바이트)를 반환합니다.
+    불러온 기준과 비교해 뒤에 추가만 되었으면 RPUSH, 앞부분이 잘렸으면 LTRIM + RPUSH, 그 밖에는 전체를 다시 씁니다.
+    serialized는 [(압축 전 본문, 해시)]이고, 실제로 쓰는 메시지만 frame()으로 압축합니다.
+    """
+    digests = [digest for _, digest in serialized]
+    start = 0
+    if baseline is not None and stored_len == len(baseline):
+        for trimmed in range(len(baseline) + 1):
+            kept = baseline[trimmed:]
+            if digests[:len(kept)] == kept:
+                if trimmed:
+                    pipe.ltrim(key, trimmed, -1)
+                start = len(kept)
+                break
+    else:
+        pipe.delete(key)
+    new_items = [frame(raw, default_format()) for raw, _ in serialized[start:]]
+    if new_items:
+        pipe.rpush(key, *new_items)
+    return digests, len(new_items), sum(len(p) for p in new_items)
+
+
+def save_workspace(session_id: str, workspace: dict) -> dict:
+    """
+    워크스페이스를 저장하고 쓰기 통계를 반환합니다. {"artifacts_written", "artifacts_deleted", "messages_written", "bytes"}
+    """
+    r = get_redis_binary_client()
+    if not r:
+        logging.error("Redis client not available")
+        raise Exception("Redis connection unavailable")
+
+    with Lock(r, f"lock:session:{session_id}", timeout=10):
+        artifacts = workspace.get("artifacts") or {}
+        tracked = isinstance(artifacts, LazyArtifacts) and artifacts.session_id == session_id
+        baselines = workspace.history_digests if (
+            isinstance(workspace, StoredWorkspace) and workspace.session_id == session_id) else {}
+
+        # 현재 저장된 상태 확인: 다른 요청이 그 사이에 히스토리를 바꿨으면 증분 쓰기 대신 전체를 다시 씁니다.
+        pipe = r.pipeline()
+        pipe.get(_meta_key(session_id))
+        for field in HISTORY_FIELDS:
+            pipe.llen(_history_key(session_id, field))
+        meta_payload, *stored_lens = pipe.execute()
+        stored_names = _decode(meta_payload)[0].get("artifact_names", []) if meta_payload else []
+
+        if tracked:
+            changed, deleted = artifacts.dirty()
+        else:
+            changed = {name: _encode(value) for name, value in artifacts.items()}
+            deleted = [n for n in stored_names if n not in artifacts]
+
+        pipe = r.pipeline()
+        if changed:
+            pipe.mset({_artifact_key(session_id, n): p for n, (p, _) in changed.items()})
+        if deleted:
+            pipe.delete(*[_artifact_key(session_id, n) for n in deleted])
+
+        new_baselines, messages_written, history_bytes = {}, 0, 0
+        for field, stored_len in zip(HISTORY_FIELDS, stored_lens):
+            serialized = [_serialize(encode_message(m)) for m in workspace.get(field, [])]
+            new_baselines[field], written, written_bytes = _queue_history_writes(
+                pipe, _history_key(session_id, field), baselines.get(field), stored_len, serialized)
+            messages_written += written
+            history_bytes += written_bytes
+
+        meta = WorkspaceMeta.from_workspace(workspace, list(artifacts.keys()), artifact_summaries(artifacts))
+        meta.updated_at = datetime.now()
+        meta.created_at = meta.created_at or meta.updated_at
+        meta_payload, _ = _encode(meta.to_record())
+        pipe.set(_meta_key(session_id), meta_payload, ex=WORKSPACE_TTL)
+
+        for key in [_history_key(session_id, f) for f in HISTORY_FIELDS] + \
+                   [_artifact_key(session_id, n) for n in meta.artifact_names]:
+            pipe.expire(key, WORKSPACE_TTL)
+        pipe.delete(_legacy_key(session_id))
+        pipe.execute()
+
+    try:
+        # pin이 아직 없는 세션(pin 도입 전에 저장된 워크스페이스)은 한 번 전체 아티팩트를 기록합니다.
+        full = not tracked or not has_pins(session_id)
+        pinned = dict(artifacts.items()) if full else {name: artifacts[name] for name in changed}
+        pin_artifacts(session_id, pinned, deleted, ttl=WORKSPACE_TTL, replace=full)
+    except Exception as e:
+        logging.error(f"Failed to pin artifacts for session {session_id}: {e}")
+    if tracked:
+        artifacts.mark_clean(changed, deleted, meta.artifact_summaries)
+    if isinstance(workspace, StoredWorkspace):
+        workspace.history_digests = new_baselines
+    workspace["created_at"], workspace["updated_at"] = meta.created_at, meta.updated_at
+
+    stats = {
+        "artifacts_written": len(changed),
+        "artifacts_deleted": len(deleted),
+        "messages_written": messages_written,
+        "changed_artifacts": list(changed),
+        "bytes": sum(len(p) for p, _ in changed.values()) + history_bytes + len(meta_payload),
+    }
+    print(f"💾 Workspace saved for session: {session_id} ({stats})")
+    return stats
@@ -0,0 +1,18 @@
+# tests/conftest.py
+"""
+저장소에서는 agents 패키지 디렉터리 이름이 back 이므로, 테스트에서 `agents` 패키지로 불러올 수 있게 등록합니다.
+배포 환경처럼 agents 를 이미 불러올 수 있으면 그대로 씁니다.
+실행: 20250705 디렉터리에서 python -m pytest -q tests
+"""
+
+import os
+import sys
+import importlib.util
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "back")
+
+if "agents" not in sys.modules and importlib.util.find_spec("agents") is None:
+    # __init__.py는 모든 도구 모듈을 불러오므로 실행하지 않고, 하위 모듈 경로만 등록합니다.
+    spec = importlib.util.spec_from_file_location(
+        "agents", os.path.join(PACKAGE_DIR, "__init__.py"), submodule_search_locations=[PACKAGE_DIR])
+    sys.modules["agents"] = importlib.util.module_from_spec(spec)
@@ -0,0 +1,100 @@
+# tests/test_artifact_store.py
+import os
+import time
+
+import numpy as np
+import pytest
+
+from agents import artifact_store
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifact_store, "ARTIFACT_DIR", str(tmp_path))
+    monkeypatch.setattr(artifact_store, "PIN_DIR", str(tmp_path / "pins"))
+    monkeypatch.setattr(artifact_store, "ARTIFACT_MAX_BYTES", 10 ** 9)
+    monkeypatch.setattr(artifact_store, "ARTIFACT_MIN_AGE", 0)
+    return artifact_store
+
+
+def _save_aged(store, value: int, age: float, durable: bool = False) -> dict:
+    """크기가 같은 아티팩트를 저장하고 마지막 사용 시각을 age초 전으로 돌립니다."""
+    ref = store.save_table({"x": np.full(256, value, dtype=np.int64)}, durable=durable)
+    past = time.time() - age
+    os.utime(store._artifact_path(ref["artifact_id"]), (past, past))
+    return ref
+
+
+def _exists(store, ref) -> bool:
+    return os.path.exists(store._artifact_path(ref["artifact_id"]))
+
+
+def test_evicts_least_recently_used_first(store):
+    oldest, middle, newest = (_save_aged(store, v, age) for v, age in ((1, 300), (2, 200), (3, 100)))
+    store.ARTIFACT_MAX_BYTES = 2 * store._dir_size(store._artifact_path(newest["artifact_id"]))
+    store._evict_if_needed()
+    assert not _exists(store, oldest)
+    assert _exists(store, middle) and _exists(store, newest)
+
+
+def test_keep_is_never_evicted(store):
+    old, new = _save_aged(store, 1, 300), _save_aged(store, 2, 100)
+    store.ARTIFACT_MAX_BYTES = 0
+    store._evict_if_needed(keep=store._artifact_path(old["artifact_id"]))
+    assert _exists(store, old)
+    assert not _exists(store, new)
+
+
+def test_min_age_protects_recent_artifacts(store):
+    old, recent = _save_aged(store, 1, 7200), _save_aged(store, 2, 10)
+    store.ARTIFACT_MIN_AGE = 3600
+    store.ARTIFACT_MAX_BYTES = 0
+    store._evict_if_needed()
+    assert not _exists(store, old)
+    assert _exists(store, recent)
+
+
+def test_pinned_artifacts_survive_until_pin_expires(store):
+    pinned, unpinned = _save_aged(store, 1, 300), _save_aged(store, 2, 200)
+    store.pin_artifacts("session-a", {"tfidf": {"matrix": pinned}})
+    store.ARTIFACT_MAX_BYTES = 0
+    store._evict_if_needed()
+    assert _exists(store, pinned)
+    assert not _exists(store, unpinned)
+
+    store.pin_artifacts("session-a", {"tfidf": {"matrix": pinned}}, ttl=0)
+    past = time.time() - 10
+    os.utime(store._pin_path("session-a"), (past, past))
+    store._evict_if_needed()
+    assert not _exists(store, pinned)
+    assert not store.has_pins("session-a")
+
+
+def test_pin_updates_only_changed_names(store):
+    a, b = _save_aged(store, 1, 0), _save_aged(store, 2, 0)
+    store.pin_artifacts("session-a", {"first": a, "second": [b]})
+    store.pin_artifacts("session-a", {"first": "no longer a ref"})
+    assert store._pinned_ids() == {b["artifact_id"]}
+    store.pin_artifacts("session-a", {}, deleted=["second"])
+    assert store._pinned_ids() == set()
+
+
+def test_durable_artifacts_skip_size_eviction_until_durable_ttl(store):
+    durable, plain = _save_aged(store, 1, 300, durable=True), _save_aged(store, 2, 200)
+    store.ARTIFACT_MAX_BYTES = 0
+    store._evict_if_needed()
+    assert _exists(store, durable)
+    assert not _exists(store, plain)
+
+    past = time.time() - store.ARTIFACT_DURABLE_TTL - 10
+    os.utime(store._artifact_path(durable["artifact_id"]), (past, past))
+    store._evict_if_needed()
+    assert not _exists(store, durable)
+
+
+def test_non_artifact_directories_are_ignored(store, tmp_path):
+    (tmp_path / "tfidf_index").mkdir()
+    (tmp_path / "tfidf_index" / "vocab.json").write_text("{}")
+    store.ARTIFACT_MAX_BYTES = 0
+    store._evict_if_needed()
+    assert (tmp_path / "tfidf_index" / "vocab.json").exists()
@@ -0,0 +1,23 @@
+# tests/test_cluster_selection.py
+import numpy as np
+import pytest
+from scipy.sparse import random as sparse_random
+from sklearn.metrics import calinski_harabasz_score
+
+from agents.cluster_selection import calinski_harabasz_sparse
+
+
+@pytest.mark.parametrize("k", [2, 3, 7])
+def test_calinski_harabasz_sparse_matches_sklearn_on_dense_copy(k):
+    rng = np.random.default_rng(k)
+    X = sparse_random(200, 50, density=0.1, format="csr", random_state=k)
+    labels = np.concatenate([np.arange(k), rng.integers(0, k, size=200 - k)]).astype(np.int32)
+    expected = calinski_harabasz_score(X.toarray(), labels)
+    assert calinski_harabasz_sparse(X, labels) == pytest.approx(expected, rel=1e-9)
+
+
+def test_calinski_harabasz_sparse_degenerate_inputs():
+    X = sparse_random(5, 4, density=0.5, format="csr", random_state=0)
+    # 군집이 하나뿐이거나 문서 수가 군집 수 이하이면 0
+    assert calinski_harabasz_sparse(X, np.zeros(5, dtype=np.int32)) == 0.0
+    assert calinski_harabasz_sparse(X, np.arange(5, dtype=np.int32)) == 0.0
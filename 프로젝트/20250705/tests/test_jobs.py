@@ -0,0 +1,43 @@
+# tests/test_jobs.py
+from agents.jobs import job_inputs, _is_stale
+
+
+def _workspace(table_id="a" * 40, clustering_id="c1"):
+    return {"artifacts": {
+        "retrieved_data": {"query": "배터리", "web_results_ref": {"kind": "table", "artifact_id": table_id, "num_rows": 3}},
+        "_cx_temp_data": {"clustering_id": clustering_id},
+    }}
+
+
+def _job(tool, workspace):
+    return {"tool": tool, "inputs": job_inputs(tool, workspace["artifacts"])}
+
+
+def test_job_is_fresh_when_inputs_unchanged():
+    workspace = _workspace()
+    assert not _is_stale(_job("run_ward_clustering", workspace), workspace)
+    assert not _is_stale(_job("run_topic_modeling_lda_all", workspace), workspace)
+
+
+def test_job_is_stale_after_new_search():
+    job = _job("run_ward_clustering", _workspace())
+    assert _is_stale(job, _workspace(table_id="b" * 40))
+
+
+def test_clustering_change_only_affects_jobs_that_read_it():
+    before, after = _workspace(), _workspace(clustering_id="c2")
+    assert not _is_stale(_job("run_ward_clustering", before), after)
+    assert _is_stale(_job("run_topic_modeling_lda_all", before), after)
+    assert _is_stale(_job("calculate_opportunity_scores", before), after)
+
+
+def test_legacy_web_results_use_query_and_count():
+    legacy = {"artifacts": {"retrieved_data": {"query": "배터리", "web_results": [{"sentence": "a"}, {"sentence": "b"}]}}}
+    job = _job("run_ward_clustering", legacy)
+    assert not _is_stale(job, legacy)
+    grown = {"artifacts": {"retrieved_data": {"query": "배터리", "web_results": [{"sentence": "a"}] * 3}}}
+    assert _is_stale(job, grown)
+
+
+def test_job_without_recorded_inputs_is_never_stale():
+    assert not _is_stale({"tool": "run_ward_clustering"}, _workspace())
@@ -0,0 +1,33 @@
+# tests/test_voc_monitor.py
+from agents.voc_monitor import _daily_deltas
+
+
+def test_daily_deltas_compare_with_previous_recorded_day():
+    daily = {
+        "2025-07-01": {"0": {"count": 4, "sentiment": 0.5}, "1": {"count": 2, "sentiment": -0.2}},
+        "2025-07-03": {"0": {"count": 6, "sentiment": 0.25}, "10": {"count": 1, "sentiment": 0.9}},
+    }
+    deltas = _daily_deltas(daily, ["2025-07-03"])
+
+    assert list(deltas) == ["2025-07-03"]
+    # 클러스터 ID는 문자열이지만 숫자 순서로 정렬됩니다.
+    assert list(deltas["2025-07-03"]) == ["0", "1", "10"]
+    assert deltas["2025-07-03"]["0"] == {"count": 6, "count_delta": 2, "sentiment": 0.25, "sentiment_delta": -0.25}
+    # 사라진 클러스터는 0건, 새 클러스터는 이전 값 0에서의 변화로 봅니다.
+    assert deltas["2025-07-03"]["1"] == {"count": 0, "count_delta": -2, "sentiment": 0.0, "sentiment_delta": 0.2}
+    assert deltas["2025-07-03"]["10"] == {"count": 1, "count_delta": 1, "sentiment": 0.9, "sentiment_delta": 0.9}
+
+
+def test_daily_deltas_first_day_and_backfilled_day():
+    daily = {
+        "2025-07-01": {"0": {"count": 3, "sentiment": 0.1}},
+        "2025-07-02": {"0": {"count": 5, "sentiment": 0.4}},
+        "2025-07-05": {"0": {"count": 2, "sentiment": 0.3}},
+    }
+    deltas = _daily_deltas(daily, ["2025-07-01", "2025-07-02"])
+
+    assert deltas["2025-07-01"]["0"]["count_delta"] == 3
+    assert deltas["2025-07-01"]["0"]["sentiment_delta"] == 0.1
+    # 뒤늦게 들어온 날짜도 그 앞의 기록 일자와 비교합니다. (이후 일자는 영향을 주지 않습니다)
+    assert deltas["2025-07-02"]["0"]["count_delta"] == 2
+    assert deltas["2025-07-02"]["0"]["sentiment_delta"] == 0.3
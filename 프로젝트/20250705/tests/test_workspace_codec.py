@@ -0,0 +1,97 @@
+# tests/test_workspace_codec.py
+import json
+from datetime import datetime, date
+
+import numpy as np
+import pytest
+
+from agents import workspace_codec as codec
+from agents.workspace_codec import (
+    encode, decode, serialize, deserialize, frame, unframe,
+    MAGIC, FORMAT_JSON, FORMAT_MSGPACK, COMPRESS_NONE, COMPRESS_GZIP, COMPRESS_ZSTD,
+)
+
+FORMATS = [
+    FORMAT_JSON,
+    pytest.param(FORMAT_MSGPACK, marks=pytest.mark.skipif(codec.msgpack is None, reason="msgpack 미설치")),
+]
+
+VALUE = {
+    "created_at": datetime(2025, 7, 5, 13, 30, 15, 123456),
+    "period": {"start": date(2025, 6, 1), "end": date(2025, 6, 30)},
+    "history": [{"role": "user", "content": "배터리 불만 분석해줘", "time": datetime(2025, 7, 5, 9, 0)}],
+    "lda_by_cluster": {0: {"topics": ["배터리", "충전"]}, 12: {"topics": []}},
+    "iso_like_string": "2025-07-05T13:30:15",
+}
+
+
+@pytest.fixture(params=[True, False], ids=["orjson", "json"])
+def json_backend(request, monkeypatch):
+    if not request.param:
+        monkeypatch.setattr(codec, "orjson", None)
+    elif codec.orjson is None:
+        pytest.skip("orjson 미설치")
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_round_trip_keeps_types(fmt, json_backend):
+    restored = deserialize(serialize(VALUE, fmt), fmt)
+    assert restored == VALUE
+    assert type(restored["created_at"]) is datetime
+    assert type(restored["period"]["start"]) is date
+    # 태그가 없는 문자열은 날짜처럼 보여도 그대로 둡니다.
+    assert restored["iso_like_string"] == "2025-07-05T13:30:15"
+    assert list(restored["lda_by_cluster"]) == [0, 12]
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_numpy_values_and_keys_become_plain(fmt, json_backend):
+    value = {np.int64(3): np.float32(0.5), "labels": np.array([1, 2, 3], dtype=np.int32)}
+    assert deserialize(serialize(value, fmt), fmt) == {3: 0.5, "labels": [1, 2, 3]}
+
+
+def test_json_map_tag_only_for_non_string_keys():
+    raw = serialize({"a": {1: "x"}, "b": {"c": 1}}, FORMAT_JSON)
+    assert json.loads(raw) == {"a": {"$map": [[1, "x"]]}, "b": {"c": 1}}
+
+
+def test_same_value_serializes_to_same_bytes():
+    assert serialize(VALUE, FORMAT_JSON) == serialize(dict(VALUE), FORMAT_JSON)
+
+
+@pytest.mark.parametrize("compression", [
+    COMPRESS_GZIP,
+    pytest.param(COMPRESS_ZSTD, marks=pytest.mark.skipif(codec.zstandard is None, reason="zstandard 미설치")),
+])
+def test_frame_compresses_only_above_threshold(compression, monkeypatch):
+    monkeypatch.setattr(codec, "WORKSPACE_COMPRESS_THRESHOLD", 64)
+    small, large = b'{"a":1}', json.dumps({"sentences": ["배터리가 빨리 닳아요"] * 50}).encode("utf-8")
+
+    framed = frame(small, FORMAT_JSON, compression)
+    assert framed == MAGIC + FORMAT_JSON + COMPRESS_NONE + small
+    assert unframe(framed) == (FORMAT_JSON, small)
+
+    framed = frame(large, FORMAT_JSON, compression)
+    assert framed[:3] == MAGIC + FORMAT_JSON + compression
+    assert len(framed) < len(large)
+    assert unframe(framed) == (FORMAT_JSON, large)
+
+
+def test_compression_none_never_compresses(monkeypatch):
+    monkeypatch.setattr(codec, "WORKSPACE_COMPRESS_THRESHOLD", 0)
+    assert frame(b"x" * 1000, FORMAT_JSON, COMPRESS_NONE)[2:3] == COMPRESS_NONE
+
+
+def test_encode_decode_round_trip_with_compression(monkeypatch):
+    monkeypatch.setattr(codec, "WORKSPACE_COMPRESS_THRESHOLD", 16)
+    payload = encode(VALUE)
+    assert payload.startswith(MAGIC) and payload[2:3] != COMPRESS_NONE
+    assert decode(payload) == VALUE
+
+
+def test_decode_headerless_legacy_json():
+    legacy = {"created_at": "2025-07-05T13:30:15", "clusters": {"0": [1, 2]}}
+    restored = decode(json.dumps(legacy, ensure_ascii=False).encode("utf-8"))
+    # 이전 형식은 그대로 읽고, 타입 변환은 workspace_model 스키마에 맡깁니다.
+    assert restored == legacy
+    assert unframe(b'{"a": 1}') == (None, b'{"a": 1}')